@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from src.engines import reading_primary
+
+# =============================================
+# RESPONSE CACHE
+# =============================================
+#
+# Cached entries are keyed by endpoint, query args and the current version of
+# every table the endpoint depends on. Committing a change to one of those
+# tables bumps its version, so stale entries are simply never read again and
+# age out of the backend by LRU/TTL. Versions live in the backend, which makes
+# invalidation visible to every worker when the backend is shared. Misses
+# are rendered from the primary database, never a read replica.
+
+PENDING_TAGS = 'response_cache_tags'
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL; each worker has its own copy"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_versions(self, tags):
+        with self.lock:
+            return [self.versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self.lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+
+class RedisBackend:
+    """Shared cache for multi-worker deployments; needs the optional `redis` package"""
+
+    def __init__(self, url, prefix='ongon:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_TYPE='redis' requires the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def get_versions(self, tags):
+        values = self.client.mget([f'{self.prefix}version:{tag}' for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags):
+        pipeline = self.client.pipeline(transaction=False)
+        for tag in tags:
+            pipeline.incr(f'{self.prefix}version:{tag}')
+        pipeline.execute()
+
+class NullBackend:
+    """Caching disabled: every lookup misses"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def get_versions(self, tags):
+        return [0] * len(tags)
+
+    def bump(self, tags):
+        pass
+
+class ResponseCache:
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.default_ttl = 300
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+        self._watched = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cache_type = app.config.get('CACHE_TYPE', 'memory')
+        if cache_type == 'memory':
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        elif cache_type == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        else:
+            self.backend = NullBackend()
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        app.extensions['response_cache'] = self
+
+    def cached(self, depends_on, ttl=None):
+        """Cache a GET view's 200 responses until `ttl` passes or a dependency changes.
+
+        `depends_on` lists models, any committed insert/update/delete of which
+        invalidates the endpoint, or model attributes (e.g. User.first_name)
+        when only changes to that column matter.
+        """
+        tags = [self.watch(dependency) for dependency in depends_on]
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                versions = self.backend.get_versions(tags)
+                key = '{}:{}:{}'.format(
+                    request.endpoint,
+                    '.'.join(map(str, versions)),
+                    '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+                )
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self._count(request.endpoint, 'hits')
+                    mimetype, body = entry.split(b'\n', 1)
+                    response = current_app.response_class(body, status=200, mimetype=mimetype.decode())
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._count(request.endpoint, 'misses')
+                # A lagging replica could still return what the last version bump replaced
+                with reading_primary():
+                    response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    self.backend.set(key, response.mimetype.encode() + b'\n' + response.get_data(), ttl or self.default_ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, dependencies):
+        """Bump dependencies' tags now, for writes that bypass mapper events (bulk inserts)"""
+        self.backend.bump(sorted(self.watch(dependency) for dependency in dependencies))
+
+    def get_stats(self):
+        with self.stats_lock:
+            return {endpoint: dict(counts) for endpoint, counts in self.stats.items()}
+
+    def _count(self, endpoint, outcome):
+        with self.stats_lock:
+            counts = self.stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counts[outcome] += 1
+
+    def watch(self, dependency):
+        """Invalidate `dependency`'s tag on committed writes; returns the tag for get_versions()"""
+        if isinstance(dependency, type):
+            model, attribute = dependency, None
+            tag = model.__tablename__
+        else:
+            model, attribute = dependency.class_, dependency.key
+            tag = f'{model.__tablename__}.{attribute}'
+        if tag in self._watched:
+            return tag
+        self._watched.add(tag)
+
+        def changed(mapper, connection, target):
+            _mark(target, tag)
+
+        def updated(mapper, connection, target):
+            if attribute is None or inspect(target).attrs[attribute].history.has_changes():
+                _mark(target, tag)
+
+        event.listen(model, 'after_insert', changed)
+        event.listen(model, 'after_update', updated)
+        event.listen(model, 'after_delete', changed)
+        return tag
+
+def _mark(target, tag):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_TAGS, set()).add(tag)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed_tags(session):
+    tags = session.info.pop(PENDING_TAGS, None)
+    if tags:
+        response_cache.backend.bump(sorted(tags))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_tags(session):
+    session.info.pop(PENDING_TAGS, None)
+
+response_cache = ResponseCache()
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import click
+from src.config import SQLiteProfile
+from src.engines import benchmark_writes
+from src.fieldsets import benchmark as benchmark_lists
+from src.json_provider import benchmark as benchmark_json
+from src.models.agriculture import AgriculturalProduct, WeatherData
+from src.models.business import JobPosting
+from src.models.community import Donation, ForumReply, Project
+from src.models.counters import reconcile_counters
+from src.models.education import Course
+from src.models.geo import reindex_coordinates
+from src.models.healthcare import BloodDonor, refresh_donor_eligibility
+from src.models.search import reindex_search
+from src.models.user import User, db
+from src.passwords import benchmark as benchmark_password_hashing, password_hasher
+from src.seed import SEED_VERSION, SchemaMismatch, init_db, seed_defaults
+from src.serializers import check_parity
+from src.startup import benchmark_startup, import_times
+from src.static_assets import benchmark as benchmark_static, static_manifest
+from src.storage import purge_expired_sessions
+
+def register_commands(app):
+    """Attach maintenance commands to the `flask` CLI"""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables and columns, seed default data and record the schema version."""
+        try:
+            added, counts = init_db()
+        except SchemaMismatch as e:
+            raise click.ClickException(str(e))
+        for column in added:
+            click.echo(f'{column}: column added')
+        if added:
+            click.echo('Run `flask reconcile-counters` and `flask reindex-locations` to fill in added columns')
+        for table, inserted in counts:
+            click.echo(f'{table}: {inserted} default row(s) inserted')
+    
+    @app.cli.command('seed')
+    @click.option('--force', is_flag=True, help='Seed even if the recorded seed version is current.')
+    def seed_command(force):
+        """Insert any missing default roles, permissions, categories, loan products and crops."""
+        counts = seed_defaults(force=force)
+        if not counts:
+            click.echo(f'Seed version {SEED_VERSION} already applied (use --force to re-check)')
+        for table, inserted in counts:
+            click.echo(f'{table}: {inserted} default row(s) inserted')
+
+    @app.cli.command('reconcile-counters')
+    def reconcile_counters_command():
+        """Recompute denormalized counter columns from their child tables."""
+        for name, fixed in reconcile_counters():
+            click.echo(f'{name}: {fixed} row(s) corrected')
+    
+    @app.cli.command('reindex-search')
+    def reindex_search_command():
+        """Rebuild the search index from the searchable tables."""
+        for doc_type, indexed in reindex_search():
+            click.echo(f'{doc_type}: {indexed} document(s) indexed')
+    
+    @app.cli.command('reindex-locations')
+    def reindex_locations_command():
+        """Re-parse location_coordinates into the latitude/longitude/geohash columns."""
+        for table, updated in reindex_coordinates():
+            click.echo(f'{table}: {updated} row(s) indexed')
+    
+    @app.cli.command('refresh-donor-eligibility')
+    def refresh_donor_eligibility_command():
+        """Fill in next_eligible_date for blood donors that lack it."""
+        click.echo(f'blood_donors: {refresh_donor_eligibility()} row(s) updated')
+    
+    @app.cli.command('purge-uploads')
+    def purge_uploads_command():
+        """Delete resumable uploads that expired unfinished, with their partial files."""
+        click.echo(f'upload_sessions: {purge_expired_sessions()} expired session(s) removed')
+    
+    @app.cli.command('bench-passwords')
+    @click.option('--seconds', default=5.0, help='How long to run.')
+    @click.option('--clients', default=0, help='Concurrent callers (default: workers + queue).')
+    def bench_passwords_command(seconds, clients):
+        """Measure password checks (logins) per second through the hashing pool."""
+        completed, rejected, elapsed = benchmark_password_hashing(seconds, clients or None)
+        cores = min(password_hasher.workers, os.cpu_count() or 1)
+        rate = completed / elapsed
+        click.echo(f'method: {password_hasher.method}, workers: {password_hasher.workers}, queue: {password_hasher.queue_limit}')
+        click.echo(f'{completed} login(s) in {elapsed:.2f}s, {rejected} rejected as busy')
+        click.echo(f'{rate:.1f} logins/sec, {rate / cores:.1f} logins/sec per core')
+    
+    @app.cli.command('bench-startup')
+    @click.option('--runs', default=5, help='Fresh processes to time.')
+    @click.option('--config', 'config_name', default='production', help='Configuration to boot with.')
+    def bench_startup_command(runs, config_name):
+        """Time cold starts (import + create_app) of fresh worker processes."""
+        timings = sorted(benchmark_startup(config_name, runs))
+        click.echo(f'{runs} cold start(s): min {timings[0] * 1000:.0f} ms, '
+                   f'median {timings[len(timings) // 2] * 1000:.0f} ms, max {timings[-1] * 1000:.0f} ms')
+    
+    @app.cli.command('check-import-time')
+    @click.option('--budget-ms', type=float, default=None, help='Defaults to IMPORT_TIME_BUDGET_MS.')
+    @click.option('--top', default=10, help='Slowest top-level imports to list.')
+    def check_import_time_command(budget_ms, top):
+        """Fail when importing src.main (python -X importtime) exceeds the budget."""
+        budget_ms = budget_ms or app.config['IMPORT_TIME_BUDGET_MS']
+        total, modules = import_times('src.main')
+        for cumulative, name in modules[:top]:
+            click.echo(f'{cumulative / 1000:8.1f} ms  {name}')
+        click.echo(f'src.main imports in {total / 1000:.1f} ms (budget {budget_ms:.0f} ms)')
+        if total / 1000 > budget_ms:
+            raise click.ClickException('import time budget exceeded')
+    
+    @app.cli.command('compress-static')
+    def compress_static_command():
+        """Write full-quality .br/.gz files next to the built frontend assets (run after the build)."""
+        click.echo(f'{static_manifest.compress_to_disk(app.static_folder)} compressed file(s) written')
+    
+    @app.cli.command('bench-static')
+    @click.option('--seconds', default=2.0, help='How long to run each case.')
+    def bench_static_command(seconds):
+        """Measure requests/sec for asset hits, index.html and SPA fallbacks."""
+        for label, path, completed, elapsed in benchmark_static(app, seconds):
+            click.echo(f'{label:>12}: {completed / elapsed:8.1f} requests/sec ({path})')
+    
+    @app.cli.command('bench-json')
+    @click.option('--rows', default=500, help='Rows per serialized list.')
+    @click.option('--seconds', default=1.0, help='How long to run each model and provider.')
+    def bench_json_command(rows, seconds):
+        """Compare to_dict() + JSON encoding throughput per model for each JSON provider."""
+        models = [JobPosting, Donation, Project, AgriculturalProduct, WeatherData]
+        for name, rates in benchmark_json(app, models, rows, seconds):
+            click.echo(f'{name:>20}: ' + ', '.join(f'{provider} {rate:9.0f} rows/sec' for provider, rate in rates.items()))
+    
+    @app.cli.command('bench-lists')
+    @click.option('--rows', default=200, help='Sample rows per model (rolled back afterwards).')
+    @click.option('--per-page', default=50, help='Items per list page.')
+    def bench_lists_command(rows, per_page):
+        """Compare course, job and project list pages with and without the deferred large columns."""
+        owner = User(email='bench-lists@example.invalid', password_hash='-', first_name='Bench', last_name='Lists')
+        db.session.add(owner)
+        db.session.flush()
+        text = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 40
+        urls = [f'/api/files/{index:036d}' for index in range(8)]
+        samples = {
+            Course: lambda index: Course(title=f'Course {index}', instructor_id=owner.id, description=text,
+                                         prerequisites=text[:600], is_published=True),
+            JobPosting: lambda index: JobPosting(title=f'Job {index}', employer_id=owner.id, description=text),
+            Project: lambda index: Project(title=f'Project {index}', manager_id=owner.id, description=text[:300],
+                                           images=urls, documents=urls)
+        }
+        for name, variant, size, milliseconds, peak in benchmark_lists(samples, rows, per_page):
+            click.echo(f'{name:>12} {variant:>12}: {size:7.0f} bytes/item, {milliseconds:6.2f} ms/page, '
+                       f'{peak:7.0f} KiB peak')
+    
+    @app.cli.command('check-serializers')
+    @click.option('--limit', default=500, help='Rows to compare per model.')
+    def check_serializers_command(limit):
+        """Fail when a row serializer's output differs from to_dict() on rows in the database."""
+        failed = False
+        for model in (WeatherData, Donation, ForumReply, BloodDonor):
+            mismatches = check_parity(db.session, model, limit)
+            for key, field, expected, actual in mismatches[:10]:
+                click.echo(f'{model.__name__} {key} {field}: to_dict() {expected!r}, row serializer {actual!r}')
+            click.echo(f'{model.__name__}: {len(mismatches)} mismatch(es)')
+            failed = failed or bool(mismatches)
+        if failed:
+            raise click.ClickException('row serializers differ from to_dict()')
+    
+    @app.cli.command('bench-writes')
+    @click.option('--threads', default=8, help='Concurrent writers.')
+    @click.option('--seconds', default=3.0, help='How long to run each profile.')
+    def bench_writes_command(threads, seconds):
+        """Compare SQLite write throughput of the legacy engine settings, the WAL profile and the write queue."""
+        for profile in ('legacy', 'profile', 'queue'):
+            with tempfile.TemporaryDirectory() as directory:
+                committed, failed, elapsed = benchmark_writes(
+                    os.path.join(directory, 'bench.db'), profile, threads, seconds, SQLiteProfile.SQLITE_PRAGMAS
+                )
+            click.echo(f'{profile:>8}: {committed / elapsed:8.1f} commits/sec, {failed} failed ({threads} threads)')
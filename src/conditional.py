@@ -0,0 +1,84 @@
+import hashlib
+from datetime import datetime, timezone
+from flask import current_app, request
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+
+# =============================================
+# CONDITIONAL GET
+# =============================================
+#
+# Every successful GET gets an ETag hashed from its body, so clients that
+# send If-None-Match receive an empty 304 instead of the payload. List
+# endpoints over tables with an updated_at column can do better with
+# QueryValidators: the ETag is derived from the row count and newest
+# timestamp of the filtered result set, so a matching request is answered
+# before any row is loaded or serialized. Lists that embed columns of related
+# rows (a manager's or organizer's name) name those relationships too, and
+# the newest timestamp of the related rows joins the fingerprint.
+
+def register_conditional_get(app):
+    """ETag every JSON GET response and answer matching If-None-Match with 304"""
+    app.after_request(_tag_response)
+
+def _tag_response(response):
+    if request.method != 'GET' or response.status_code != 200 or response.direct_passthrough:
+        return response
+    if not response.is_json:
+        return response
+    if 'ETag' not in response.headers:
+        response.add_etag()
+    etag, _ = response.get_etag()
+    if request.if_none_match.contains(etag):
+        not_modified = current_app.response_class(status=304)
+        for header in ('ETag', 'Last-Modified', 'Cache-Control', 'Vary'):
+            if header in response.headers:
+                not_modified.headers[header] = response.headers[header]
+        return not_modified
+    return response
+
+class QueryValidators:
+    """ETag and Last-Modified for a list query, computed with one aggregate query.
+
+    The fingerprint covers the endpoint, its query args, the current date (for
+    date-relative fields such as is_active) and the count and newest
+    `timestamp` of every row the query matches, so inserts, deletes and
+    updates of any row in the set change it. `related` lists the many-to-one
+    relationships whose columns to_dict() embeds; the newest updated_at of
+    the rows they point to is added, so renaming a manager changes the ETag
+    of the lists showing their name. Last-Modified is informational: a delete
+    does not move it, so revalidation goes through the ETag only.
+    """
+
+    def __init__(self, query, timestamp, related=()):
+        query = query.order_by(None)
+        aggregates = [func.count(), func.max(timestamp)]
+        for relationship in related:
+            target = aliased(relationship.property.mapper.class_)
+            query = query.outerjoin(relationship.of_type(target))
+            aggregates.append(func.max(target.updated_at))
+        count, *timestamps = query.with_entities(*aggregates).one()
+        newest = max((value for value in timestamps if value is not None), default=None)
+        self.last_modified = newest.replace(tzinfo=timezone.utc, microsecond=0) if newest else None
+        fingerprint = '|'.join([
+            request.endpoint,
+            '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True))),
+            datetime.utcnow().date().isoformat(),
+            str(count),
+            *(value.isoformat() if value else '' for value in timestamps)
+        ])
+        self.etag = hashlib.sha1(fingerprint.encode()).hexdigest()
+
+    @property
+    def not_modified(self):
+        """True when the client's If-None-Match still holds"""
+        return request.if_none_match.contains(self.etag)
+
+    def not_modified_response(self):
+        return self.apply(current_app.response_class(status=304))
+
+    def apply(self, response):
+        response.set_etag(self.etag)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        return response
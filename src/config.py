@@ -15,6 +15,15 @@ class Config:
         'pool_pre_ping': True
     }
     
+    # Read replicas: SQLALCHEMY_BINDS entries that GET requests may read from (see src/engines.py)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {
+        'replica': {'url': REPLICA_DATABASE_URL, 'pool_size': 10, 'max_overflow': 10}
+    } if REPLICA_DATABASE_URL else {}
+    READ_REPLICA_BINDS = ['replica'] if REPLICA_DATABASE_URL else []
+    REPLICA_MAX_LAG_SECONDS = 5  # should exceed the check interval
+    REPLICA_LAG_CHECK_INTERVAL = 2
+    
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -26,6 +35,11 @@ class Config:
     # File upload configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+    UPLOAD_MAX_SIZE = 256 * 1024 * 1024  # whole-file limit for resumable uploads (sent in chunks)
+    
+    # Frontend assets (see src/static_assets.py)
+    STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # for content-hashed file names
+    STATIC_COMPRESS_MIN_SIZE = 1024  # smaller files are sent uncompressed
     
     # Email configuration (for notifications)
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
@@ -34,27 +48,76 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     
+    # Response cache for read-mostly endpoints: 'memory' (per worker), 'redis' (shared) or 'null'
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = 300  # seconds
+    CACHE_MAX_ENTRIES = 1024
+    
+    # JSON encoder for responses: 'auto' (orjson if installed), 'orjson' or 'stdlib'
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+    
     # Pagination
     POSTS_PER_PAGE = 20
+    # How list endpoints compute `total`: exact, cached, estimate or none (see src/pagination.py)
+    PAGINATION_TOTALS_DEFAULT = 'exact'
+    PAGINATION_TOTALS = {
+        'business.get_jobs': 'cached',
+        'agriculture.get_agricultural_products': 'cached',
+        'user.get_users': 'cached'
+    }
+    PAGINATION_TOTALS_TTL = 60  # seconds
     USERS_PER_PAGE = 50
     
+    # Boot only checks the schema version; tables and default data come from `flask init-db`
+    AUTO_INIT_DB = False
+    IMPORT_TIME_BUDGET_MS = 1000  # `flask check-import-time` fails above this
+    
     # Security
-    BCRYPT_LOG_ROUNDS = 12
+    # Full Werkzeug method string; stored hashes made with other parameters are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = None  # defaults to the CPU count
+    PASSWORD_HASH_QUEUE = 8  # checks allowed to wait for a worker before answering 429
     
     # API Rate limiting
     RATELIMIT_STORAGE_URL = 'memory://'
 
-class DevelopmentConfig(Config):
+class SQLiteProfile:
+    """WAL, a read pool and a single writer for SQLite databases (see src/engines.py)"""
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,  # ms other processes wait for the write lock
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # KiB
+        'temp_store': 'memory',
+    }
+    SQLITE_READ_POOL_SIZE = 8
+    # The default engine is the writer: one connection, queued for up to pool_timeout seconds
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 1,
+        'max_overflow': 0,
+        'pool_timeout': 30,
+        'connect_args': {'check_same_thread': False, 'timeout': 5}
+    }
+    WRITE_QUEUE_BATCH = 64
+
+class DevelopmentConfig(SQLiteProfile, Config):
     DEBUG = True
+    AUTO_INIT_DB = True  # run init-db on boot when the schema version is missing or old
     SQLALCHEMY_DATABASE_URI = 'sqlite:///dev_ongon_bangladesh.db'
 
-class ProductionConfig(Config):
+class ProductionConfig(SQLiteProfile, Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///ongon_bangladesh.db'
     CORS_ORIGINS = ['*']
     
 class TestingConfig(Config):
     TESTING = True
+    AUTO_INIT_DB = True
+    # Lets tests count statements per request via flask_sqlalchemy.record_queries
+    SQLALCHEMY_RECORD_QUERIES = True
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_ongon_bangladesh.db'
 
 config = {
@@ -0,0 +1,355 @@
+import atexit
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+# =============================================
+# SQLITE ENGINE PROFILE
+# =============================================
+#
+# SQLite allows one writer at a time, and pysqlite's default deferred
+# transactions turn concurrent writers into "database is locked" errors
+# instead of a queue. With SQLITE_PRAGMAS configured, the app gets:
+#   - WAL journalling and the other pragmas on every connection, so readers
+#     never block the writer or each other
+#   - a read pool (SQLITE_READ_POOL_SIZE connections, query_only) serving
+#     every statement of a session until it first writes
+#   - the default engine as a one-connection write pool whose transactions
+#     start with BEGIN IMMEDIATE; threads wanting to write wait their turn on
+#     the pool (up to the configured pool_timeout) rather than spinning on
+#     SQLITE_BUSY, and other processes wait through busy_timeout
+# A session switches to the writer at its first flush or at any statement
+# that isn't a SELECT (DML, raw SQL, or connection() asked for without one)
+# and stays there until the transaction ends, so it reads its own writes.
+
+READ_ENGINE = 'sqlite_read_engine'
+WRITING = 'routing_writing'
+
+def apply_sqlite_profile(engine, pragmas, immediate=False, query_only=False):
+    """Set `pragmas` on each new connection of `engine` and issue our own BEGINs"""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        # Stop pysqlite from managing transactions so the 'begin' hook below decides
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        if query_only:
+            cursor.execute('PRAGMA query_only=ON')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin(connection):
+        connection.exec_driver_sql('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+
+def sqlite_read_engine(url, pragmas, pool_size):
+    engine = create_engine(
+        url, pool_size=pool_size, max_overflow=0,
+        connect_args={'check_same_thread': False}
+    )
+    apply_sqlite_profile(engine, pragmas, query_only=True)
+    return engine
+
+def init_sqlite_profile(app, db):
+    """Split `db`'s default SQLite engine into a read pool and a single writer"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    with app.app_context():
+        engine = db.engine
+    if not pragmas or engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+        return
+    apply_sqlite_profile(engine, pragmas, immediate=True)
+    app.extensions[READ_ENGINE] = sqlite_read_engine(engine.url, pragmas, app.config.get('SQLITE_READ_POOL_SIZE', 8))
+
+# =============================================
+# READ REPLICAS
+# =============================================
+#
+# READ_REPLICA_BINDS names SQLALCHEMY_BINDS entries that are read replicas of
+# the primary database (a Postgres streaming replica, or a copied SQLite
+# file locally). GET/HEAD requests and functions decorated with @read_only
+# read from a replica that is within REPLICA_MAX_LAG_SECONDS of the
+# primary. Once a session has written, the rest of its request reads the
+# primary so it sees its own writes.
+#
+# Lag is measured with a heartbeat: every REPLICA_LAG_CHECK_INTERVAL seconds
+# a worker stamps the time into app_meta on the primary (through the write
+# queue) and reads the stamp back from each replica. A replica whose stamp
+# is missing or too old is skipped until it catches up, so the measured lag
+# includes up to one check interval.
+#
+# Results that outlive the request (cached responses and totals, the role
+# permission map, users' authz versions) are read inside reading_primary():
+# a commit bumps the cache version at once, and a replica that hasn't
+# replayed it yet would store pre-commit data under the new version for the
+# whole TTL.
+
+REPLICAS = 'read_replicas'
+READ_ONLY = 'routing_read_only'
+READ_PRIMARY = 'routing_read_primary'
+WROTE = 'routing_wrote'
+HEARTBEAT_KEY = 'replication_heartbeat'
+
+class ReplicaSet:
+    def __init__(self, bind_keys, max_lag, check_interval):
+        self.bind_keys = list(bind_keys)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag = {}
+        self.healthy = []
+        self.checked_at = 0
+        self._lock = threading.Lock()
+
+    def choose(self, engines):
+        """Engine of a replica that is caught up enough to read from, or None"""
+        if time.monotonic() - self.checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self.check(engines)
+            finally:
+                self._lock.release()
+        healthy = self.healthy
+        return engines[random.choice(healthy)] if healthy else None
+
+    def check(self, engines):
+        now = time.time()
+        write_queue.submit(_stamp_heartbeat, now)
+        lag = {}
+        for key in self.bind_keys:
+            try:
+                with engines[key].connect() as connection:
+                    stamp = connection.execute(
+                        text('SELECT value FROM app_meta WHERE key = :key'), {'key': HEARTBEAT_KEY}
+                    ).scalar()
+                lag[key] = now - float(stamp) if stamp is not None else None
+            except Exception:
+                lag[key] = None
+        self.lag = lag
+        self.healthy = [key for key, seconds in lag.items() if seconds is not None and seconds <= self.max_lag]
+        self.checked_at = time.monotonic()
+
+def _stamp_heartbeat(session, now):
+    parameters = {'key': HEARTBEAT_KEY, 'value': repr(now)}
+    updated = session.execute(text('UPDATE app_meta SET value = :value WHERE key = :key'), parameters)
+    if not updated.rowcount:
+        session.execute(text('INSERT INTO app_meta (key, value) VALUES (:key, :value)'), parameters)
+
+def init_read_replicas(app):
+    bind_keys = app.config.get('READ_REPLICA_BINDS')
+    if bind_keys:
+        app.extensions[REPLICAS] = ReplicaSet(
+            bind_keys, app.config.get('REPLICA_MAX_LAG_SECONDS', 5), app.config.get('REPLICA_LAG_CHECK_INTERVAL', 2)
+        )
+
+def read_only(function):
+    """Let `function`'s queries go to a read replica even outside GET requests"""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        info = current_app.extensions['sqlalchemy'].session.info
+        info[READ_ONLY] = info.get(READ_ONLY, 0) + 1
+        try:
+            return function(*args, **kwargs)
+        finally:
+            info[READ_ONLY] -= 1
+    return wrapper
+
+@contextmanager
+def reading_primary():
+    """Keep the block's reads off the replicas, for results that are cached beyond the request"""
+    info = current_app.extensions['sqlalchemy'].session.info
+    info[READ_PRIMARY] = info.get(READ_PRIMARY, 0) + 1
+    try:
+        yield
+    finally:
+        info[READ_PRIMARY] -= 1
+
+# =============================================
+# ROUTING SESSION
+# =============================================
+
+class RoutingSession(FlaskSession):
+    """Session sending reads to a replica or the SQLite read pool and writes to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or engine is not self._db.engine:
+            return engine
+        # Only statements known to be SELECTs may read elsewhere
+        if self._flushing or self.info.get(WRITING) or not getattr(clause, 'is_select', False):
+            self.info[WRITING] = self.info[WROTE] = True
+            return engine
+
+        extensions = current_app.extensions
+        replicas = extensions.get(REPLICAS)
+        if replicas is not None and not self.info.get(WROTE) and self._may_lag():
+            replica = replicas.choose(self._db.engines)
+            if replica is not None:
+                return replica
+        return extensions.get(READ_ENGINE, engine)
+
+    def _may_lag(self):
+        """Whether this read tolerates replica lag: GET requests and @read_only code"""
+        if self.info.get(READ_PRIMARY):
+            return False
+        if self.info.get(READ_ONLY):
+            return True
+        return has_request_context() and request.method in ('GET', 'HEAD')
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _end_writing(session):
+    session.info.pop(WRITING, None)
+
+# =============================================
+# BATCHED WRITE QUEUE
+# =============================================
+#
+# Small fire-and-forget writes (login bookkeeping and the like) don't need a
+# request's session at all. write_queue.submit(job, *args) hands `job` to a
+# single background thread that runs up to WRITE_QUEUE_BATCH queued jobs in
+# one transaction, each inside its own SAVEPOINT so a failing job only loses
+# its own changes, and commits once for the whole batch. Jobs are called as
+# job(session, *args) with a plain SQLAlchemy session on the write engine;
+# submit() returns a Future for callers that want to wait.
+
+class WriteQueue:
+    def __init__(self, app=None):
+        self.engine = None
+        self.max_batch = 64
+        self.jobs = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        with app.app_context():
+            self.engine = app.extensions['sqlalchemy'].engine
+        self.max_batch = app.config.get('WRITE_QUEUE_BATCH', 64)
+        app.extensions['write_queue'] = self
+
+    def submit(self, job, *args):
+        future = Future()
+        self.jobs.put((job, args, future))
+        self._ensure_worker()
+        return future
+
+    def drain(self, timeout=5.0):
+        """Wait for every job queued so far to be committed"""
+        self.submit(lambda session: None).result(timeout)
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                    self._worker.start()
+                    atexit.register(self.drain)
+
+    def _run(self):
+        while True:
+            batch = [self.jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with Session(self.engine) as session, session.begin():
+                for job, args, future in batch:
+                    try:
+                        with session.begin_nested():
+                            outcomes.append((future, job(session, *args), None))
+                    except Exception as error:
+                        outcomes.append((future, None, error))
+        except Exception as error:
+            for _, _, future in batch:
+                future.set_exception(error)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+write_queue = WriteQueue()
+
+# =============================================
+# WRITE THROUGHPUT BENCHMARK
+# =============================================
+
+def benchmark_writes(path, profile, threads=8, seconds=3.0, pragmas=None, read_pool_size=8):
+    """Small read-then-insert transactions from `threads` threads against SQLite file `path`.
+
+    `profile` is 'legacy' (pysqlite defaults with the old pool settings),
+    'profile' (pragmas, read pool and single writer) or 'queue' (profile,
+    with the inserts going through a WriteQueue). Returns (committed,
+    failed, elapsed seconds).
+    """
+    url = f'sqlite:///{path}'
+    legacy = profile == 'legacy'
+    write_engine = create_engine(
+        url, pool_size=10 if legacy else 1, max_overflow=10 if legacy else 0, pool_timeout=30,
+        connect_args={'check_same_thread': False, 'timeout': 5}
+    )
+    read_engine = write_engine
+    if not legacy:
+        apply_sqlite_profile(write_engine, pragmas, immediate=True)
+        read_engine = sqlite_read_engine(write_engine.url, pragmas, read_pool_size)
+    with write_engine.begin() as connection:
+        connection.exec_driver_sql('CREATE TABLE IF NOT EXISTS bench_writes (id INTEGER PRIMARY KEY, worker INTEGER, value INTEGER)')
+
+    writes = None
+    if profile == 'queue':
+        writes = WriteQueue()
+        writes.engine = write_engine
+
+    def insert(connection, worker, value):
+        connection.exec_driver_sql('INSERT INTO bench_writes (worker, value) VALUES (?, ?)', (worker, value))
+
+    counts = {'committed': 0, 'failed': 0}
+    counts_lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(worker):
+        while time.perf_counter() < deadline:
+            try:
+                if legacy:
+                    with write_engine.begin() as connection:
+                        value = connection.exec_driver_sql('SELECT count(*) FROM bench_writes').scalar()
+                        insert(connection, worker, value)
+                else:
+                    with read_engine.begin() as connection:
+                        value = connection.exec_driver_sql('SELECT count(*) FROM bench_writes').scalar()
+                    if writes is not None:
+                        writes.submit(lambda session: insert(session.connection(), worker, value)).result()
+                    else:
+                        with write_engine.begin() as connection:
+                            insert(connection, worker, value)
+                outcome = 'committed'
+            except Exception:
+                outcome = 'failed'
+            with counts_lock:
+                counts[outcome] += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=client, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    write_engine.dispose()
+    if read_engine is not write_engine:
+        read_engine.dispose()
+    return counts['committed'], counts['failed'], elapsed
@@ -0,0 +1,152 @@
+import time
+import tracemalloc
+from flask import current_app
+from sqlalchemy.orm import load_only
+
+# =============================================
+# SPARSE FIELDSETS
+# =============================================
+#
+# List endpoints accept ?fields=id,title,price to return only those fields of
+# each item and ?expand=modules to add nested data that is left out by
+# default. A model lists the names clients may ask for in a FieldSet: plain
+# columns, and computed fields along with the columns and relationship
+# loaders they read. A sparse request then selects just those columns
+# (load_only) and loads only the relationships its fields need; without
+# ?fields= the items come from the model's own to_dict() and load_plan().
+#
+# Large Text/JSON fields that list views rarely show (descriptions, lesson
+# bodies, document lists) can be marked `deferred`. Default list items keep
+# them, so existing clients see no change; a client that opts in with
+# ?compact=true gets items without them, and their columns are not selected,
+# unless it names them in ?fields= or ?expand=. Detail routes load rows
+# without these options, so they still return every column from a single
+# SELECT.
+
+class Computed:
+    """A field that isn't a plain column: how to compute it and what it reads"""
+
+    def __init__(self, compute, columns=(), load=None):
+        self.compute = compute
+        self.columns = tuple(columns)
+        self.load = load  # returns loader options for the relationships `compute` reads
+
+    def options(self):
+        return self.load() if self.load else []
+
+class FieldSet:
+    def __init__(self, columns, computed=None, expand=None, deferred=()):
+        self.columns = tuple(columns)
+        self.computed = computed or {}
+        self.expand = expand or {}
+        self.deferred = tuple(deferred)  # left out of ?compact=true list items unless asked for
+        self.model = None
+
+    def __set_name__(self, model, name):
+        self.model = model
+
+    def select(self, args):
+        """The Selection asked for by `args` (request.args); raises ValueError for names not allowed"""
+        fields = _names(args.get('fields'))
+        expand = _names(args.get('expand'))
+        unknown = [name for name in fields if name not in self.columns and name not in self.computed]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. "
+                             f"Allowed: {', '.join([*self.columns, *self.computed])}")
+        unknown = [name for name in expand if name not in self.expand and name not in self.deferred]
+        if unknown:
+            raise ValueError(f"Unknown expand: {', '.join(unknown)}. "
+                             f"Allowed: {', '.join([*self.expand, *self.deferred]) or 'none'}")
+
+        if not fields and self.deferred and _is_true(args.get('compact')):
+            fields = [name for name in (*self.columns, *self.computed) if name not in self.deferred]
+        if fields:
+            fields += [name for name in expand if name in self.deferred and name not in fields]
+        return Selection(self, fields or None, [name for name in expand if name in self.expand])
+
+class Selection:
+    def __init__(self, fieldset, fields, expand):
+        self.fieldset = fieldset
+        self.fields = fields  # None: everything to_dict() returns
+        self.expand = expand
+
+    def options(self, *always):
+        """Loader options for the list query; `always` are columns read besides the fields (sort keys)"""
+        fieldset, model = self.fieldset, self.fieldset.model
+        if self.fields is None:
+            options = list(model.load_plan()) if hasattr(model, 'load_plan') else []
+        else:
+            columns, options = {column.key for column in always}, []
+            for name in self.fields:
+                if name in fieldset.computed:
+                    columns.update(fieldset.computed[name].columns)
+                    options.extend(fieldset.computed[name].options())
+                else:
+                    columns.add(name)
+            options.insert(0, load_only(*(getattr(model, column) for column in sorted(columns))))
+        for name in self.expand:
+            options.extend(fieldset.expand[name].options())
+        return options
+
+    def dump(self, item):
+        if self.fields is None:
+            data = item.to_dict()
+        else:
+            computed = self.fieldset.computed
+            data = {name: computed[name].compute(item) if name in computed else getattr(item, name)
+                    for name in self.fields}
+        for name in self.expand:
+            data[name] = self.fieldset.expand[name].compute(item)
+        return data
+
+def _is_true(value):
+    return str(value).lower() in ('true', '1', 'on', 'yes')
+
+def _names(value):
+    names = []
+    for name in (value or '').split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def benchmark(samples, rows=200, per_page=50, repeat=20):
+    """Compare list pages holding every allowed field with ?compact=true pages that defer large ones.
+
+    `samples` maps each model to a function building its i-th row. The rows
+    are flushed in the current transaction, which is rolled back afterwards
+    together with anything else the caller added. Returns
+    [(model name, variant, JSON bytes per item, ms per page, peak KiB per page)].
+    """
+    from src.models.user import db  # models import this module
+
+    results = []
+    try:
+        for model, build in samples.items():
+            db.session.add_all(build(index) for index in range(rows))
+            db.session.flush()
+            fieldset = model.api_fields
+            variants = [
+                ('all fields', fieldset.select({'fields': ','.join([*fieldset.columns, *fieldset.computed])})),
+                ('compact', fieldset.select({'compact': 'true'}))
+            ]
+            for variant, selection in variants:
+                def page():
+                    db.session.expunge_all()
+                    items = model.query.options(*selection.options(model.created_at)).order_by(
+                        model.created_at.desc(), model.id.desc()).limit(per_page).all()
+                    return [selection.dump(item) for item in items]
+
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    items = page()
+                elapsed = (time.perf_counter() - started) / repeat
+                tracemalloc.start()
+                page()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                size = len(current_app.json.dumps(items)) / max(len(items), 1)
+                results.append((model.__name__, variant, size, elapsed * 1000, peak / 1024))
+    finally:
+        db.session.rollback()
+    return results
@@ -0,0 +1,99 @@
+from flask import g
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+from src.cache import MemoryBackend
+from src.engines import reading_primary
+from src.models.user import PENDING_AUTHZ_VERSIONS, User, db, permission_map
+
+# =============================================
+# CURRENT USER
+# =============================================
+#
+# Protected views resolve the JWT identity through load_current_user(), which
+# fetches the user and their roles in a single joined query the first time it
+# is called in a request and returns the same instance afterwards. Permission
+# checks on that user read the process-wide role map, so they need no SQL.
+
+def load_current_user():
+    """The authenticated User with roles loaded, or None if the account no longer exists"""
+    if '_current_user' not in g:
+        user_id = get_jwt_identity()
+        g._current_user = db.session.get(User, user_id, options=[joinedload(User.roles)]) if user_id else None
+    return g._current_user
+
+# =============================================
+# AUTHORIZATION CLAIMS
+# =============================================
+#
+# Access tokens carry the user's role names, a permission bitmask, the
+# fingerprint of the grants the mask was computed from, and the user's
+# authz_version. A token whose authz_version is behind the user's is rejected
+# as revoked; the latest version per user is kept in a small in-process cache
+# so the check costs a query only on a miss. A token ahead of the cache was
+# issued after a bump another worker committed, so the version is re-read
+# from the primary rather than the token refused. token_has_permission() and
+# token_has_role() then answer from the claims alone, and fall back to the
+# database only for tokens issued before the current grants.
+
+AUTHZ_VERSION_TTL = 60  # seconds another worker's bump can go unseen
+AUTHZ_VERSION_ENTRIES = 10000
+
+_authz_versions = MemoryBackend(AUTHZ_VERSION_ENTRIES)
+
+def authz_claims(user):
+    permissions = permission_map()
+    return {
+        'authz': user.authz_version,
+        'roles': sorted(role.name for role in user.roles),
+        'perms': permissions.mask(user.roles),
+        'pv': permissions.fingerprint
+    }
+
+def issue_access_token(user):
+    return create_access_token(identity=user.id, additional_claims=authz_claims(user))
+
+def current_authz_version(user_id, refresh=False):
+    """Latest authz_version of a user, or 0 once the account is gone; `refresh` skips the cache"""
+    version = None if refresh else _authz_versions.get(user_id)
+    if version is None:
+        with reading_primary():
+            version = db.session.query(User.authz_version).filter(User.id == user_id).scalar() or 0
+        _authz_versions.set(user_id, version, AUTHZ_VERSION_TTL)
+    return version
+
+def register_token_checks(jwt):
+    """Reject access tokens issued before the user's roles or status last changed"""
+    @jwt.token_in_blocklist_loader
+    def is_token_revoked(jwt_header, jwt_payload):
+        # Refresh tokens stay valid: /refresh re-reads the user and issues fresh claims
+        if jwt_payload.get('type') != 'access' or 'authz' not in jwt_payload:
+            return False
+        version = current_authz_version(jwt_payload['sub'])
+        if jwt_payload['authz'] > version:
+            version = current_authz_version(jwt_payload['sub'], refresh=True)
+        return jwt_payload['authz'] != version
+
+def token_has_permission(permission_name):
+    claims = get_jwt()
+    permissions = permission_map()
+    if 'perms' in claims and claims.get('pv') == permissions.fingerprint:
+        return bool(claims['perms'] & permissions.bits.get(permission_name, 0))
+    user = load_current_user()
+    return user is not None and user.has_permission(permission_name)
+
+def token_has_role(role_name):
+    claims = get_jwt()
+    if 'roles' in claims:
+        return role_name in claims['roles']
+    user = load_current_user()
+    return user is not None and user.has_role(role_name)
+
+@event.listens_for(Session, 'after_commit')
+def _publish_authz_versions(session):
+    for user_id, version in session.info.pop(PENDING_AUTHZ_VERSIONS, {}).items():
+        _authz_versions.set(user_id, version, AUTHZ_VERSION_TTL)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_authz_versions(session):
+    session.info.pop(PENDING_AUTHZ_VERSIONS, None)
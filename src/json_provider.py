@@ -0,0 +1,116 @@
+import json
+import time
+import uuid
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from sqlalchemy import inspect
+
+try:
+    import orjson
+except ImportError:  # in requirements.txt; without it responses go through the stdlib encoder
+    orjson = None
+
+# =============================================
+# JSON RESPONSES
+# =============================================
+#
+# Models hand raw column values to jsonify(): Numeric columns come back as
+# Decimal and DateTime/Date columns as datetime/date, and the provider turns
+# them into JSON numbers and ISO 8601 strings (naive datetimes stay naive,
+# as .isoformat() wrote them). With orjson installed, the whole response is
+# encoded in C and only Decimals call back into Python; JSON_PROVIDER picks
+# 'orjson' or 'stdlib' explicitly, 'auto' uses orjson when it is there.
+# Keys are sorted either way so the bytes, and ETags, don't depend on it.
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time_of_day)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return DefaultJSONProvider.default(value)
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider with Decimal as a number and datetimes as ISO 8601 instead of HTTP dates"""
+    default = staticmethod(_default)
+
+class OrjsonProvider(JSONProvider):
+    options = 0 if orjson is None else orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj), mimetype='application/json')
+
+    def _encode(self, obj):
+        options = self.options | (orjson.OPT_INDENT_2 if self._app.debug else 0)
+        try:
+            return orjson.dumps(obj, default=_default, option=options)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which only the stdlib encoder handles
+            return json.dumps(obj, default=_default, sort_keys=True, separators=(',', ':')).encode()
+
+PROVIDERS = {'orjson': OrjsonProvider, 'stdlib': StdlibJSONProvider}
+
+def init_json_provider(app):
+    name = app.config.get('JSON_PROVIDER', 'auto')
+    if name == 'auto':
+        name = 'stdlib' if orjson is None else 'orjson'
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER is orjson but the orjson package is not installed')
+    app.json = PROVIDERS[name](app)
+
+def _sample_value(column):
+    """A typical non-null value for `column`, to fill in rows for the benchmark"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = str
+    samples = {
+        Decimal: Decimal('12345.67'),
+        datetime: datetime(2024, 5, 17, 9, 30, 12, 345678),
+        date: date(2024, 5, 17),
+        int: 42,
+        float: 23.5,
+        bool: True,
+        dict: {'key': 'value'},
+        list: ['first', 'second', 'third'],
+    }
+    if python_type is str:
+        return 'Sample text for benchmarking serialization'[:column.type.length or None]
+    return samples.get(python_type, 'sample')
+
+def benchmark(app, models, rows=500, seconds=1.0):
+    """Rows/sec through to_dict() and each available provider for `models`.
+
+    Rows are transient instances with every column set to a typical value,
+    so relationships read by to_dict() are empty. Returns
+    [(model name, {provider name: rows per second})].
+    """
+    results = []
+    providers = {name: provider(app) for name, provider in PROVIDERS.items()
+                 if name != 'orjson' or orjson is not None}
+    for model in models:
+        instances = []
+        for _ in range(rows):
+            instance = model()
+            for attribute in inspect(model).column_attrs:
+                setattr(instance, attribute.key, _sample_value(attribute.columns[0]))
+            instances.append(instance)
+        rates = {}
+        for name, provider in providers.items():
+            serialized = 0
+            started = time.perf_counter()
+            while time.perf_counter() - started < seconds:
+                provider.dumps([instance.to_dict() for instance in instances])
+                serialized += rows
+            rates[name] = serialized / (time.perf_counter() - started)
+        results.append((model.__name__, rates))
+    return results
@@ -1,4 +1,8 @@
-from src.models.user import db
+from sqlalchemy.orm import joinedload, selectinload
+from src.models.user import db, USER_NAME_FIELDS
+from src.models.search import register_search, visible_when
+from src.models.geo import track_coordinates
+from src.serializers import RowSerializer
 from datetime import datetime
 
 class Farmer(db.Model):
@@ -27,16 +31,16 @@ class Farmer(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'user_name': self.user.full_name if self.user else None,
-            'farm_size_acres': float(self.farm_size_acres) if self.farm_size_acres else None,
+            'farm_size_acres': self.farm_size_acres,
             'farming_experience_years': self.farming_experience_years,
             'primary_crops': self.primary_crops,
             'farming_methods': self.farming_methods,
             'land_ownership': self.land_ownership,
             'irrigation_access': self.irrigation_access,
             'equipment_owned': self.equipment_owned,
-            'annual_income': float(self.annual_income) if self.annual_income else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'annual_income': self.annual_income,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Farm(db.Model):
@@ -47,6 +51,9 @@ class Farm(db.Model):
     name = db.Column(db.String(255))
     location_address = db.Column(db.Text)
     location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     total_area_acres = db.Column(db.Numeric(8, 2))
     soil_type = db.Column(db.String(50))
     water_source = db.Column(db.String(50))
@@ -64,11 +71,11 @@ class Farm(db.Model):
             'name': self.name,
             'location_address': self.location_address,
             'location_coordinates': self.location_coordinates,
-            'total_area_acres': float(self.total_area_acres) if self.total_area_acres else None,
+            'total_area_acres': self.total_area_acres,
             'soil_type': self.soil_type,
             'water_source': self.water_source,
             'infrastructure': self.infrastructure,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class Crop(db.Model):
@@ -100,7 +107,7 @@ class Crop(db.Model):
             'water_requirements': self.water_requirements,
             'soil_requirements': self.soil_requirements,
             'climate_requirements': self.climate_requirements,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class CropCycle(db.Model):
@@ -131,14 +138,14 @@ class CropCycle(db.Model):
             'farm_name': self.farm.name if self.farm else None,
             'crop_id': self.crop_id,
             'crop_name': self.crop.name if self.crop else None,
-            'area_planted_acres': float(self.area_planted_acres) if self.area_planted_acres else None,
-            'planting_date': self.planting_date.isoformat() if self.planting_date else None,
-            'expected_harvest_date': self.expected_harvest_date.isoformat() if self.expected_harvest_date else None,
-            'actual_harvest_date': self.actual_harvest_date.isoformat() if self.actual_harvest_date else None,
+            'area_planted_acres': self.area_planted_acres,
+            'planting_date': self.planting_date,
+            'expected_harvest_date': self.expected_harvest_date,
+            'actual_harvest_date': self.actual_harvest_date,
             'status': self.status,
             'is_completed': self.is_completed,
             'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class CropYield(db.Model):
@@ -166,16 +173,16 @@ class CropYield(db.Model):
         return {
             'id': self.id,
             'crop_cycle_id': self.crop_cycle_id,
-            'quantity_harvested': float(self.quantity_harvested) if self.quantity_harvested else None,
+            'quantity_harvested': self.quantity_harvested,
             'unit': self.unit,
             'quality_grade': self.quality_grade,
-            'market_price': float(self.market_price) if self.market_price else None,
-            'total_revenue': float(self.total_revenue) if self.total_revenue else None,
-            'production_cost': float(self.production_cost) if self.production_cost else None,
-            'profit': float(self.profit) if self.profit else None,
+            'market_price': self.market_price,
+            'total_revenue': self.total_revenue,
+            'production_cost': self.production_cost,
+            'profit': self.profit,
             'profit_margin': self.profit_margin,
-            'harvest_date': self.harvest_date.isoformat() if self.harvest_date else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'harvest_date': self.harvest_date,
+            'created_at': self.created_at
         }
 
 class WeatherData(db.Model):
@@ -183,6 +190,9 @@ class WeatherData(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     date = db.Column(db.Date)
     temperature_min = db.Column(db.Numeric(4, 1))
     temperature_max = db.Column(db.Numeric(4, 1))
@@ -191,19 +201,26 @@ class WeatherData(db.Model):
     wind_speed = db.Column(db.Numeric(5, 2))
     weather_condition = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # to_dict() for rows of a Core select(), used by the weather history list
+    row_serializer = RowSerializer(
+        columns=('id', 'location_coordinates', 'date', 'temperature_min', 'temperature_max', 'humidity',
+                 'rainfall_mm', 'wind_speed', 'weather_condition', 'created_at')
+    )
     
     def to_dict(self):
         return {
             'id': self.id,
             'location_coordinates': self.location_coordinates,
-            'date': self.date.isoformat() if self.date else None,
-            'temperature_min': float(self.temperature_min) if self.temperature_min else None,
-            'temperature_max': float(self.temperature_max) if self.temperature_max else None,
-            'humidity': float(self.humidity) if self.humidity else None,
-            'rainfall_mm': float(self.rainfall_mm) if self.rainfall_mm else None,
-            'wind_speed': float(self.wind_speed) if self.wind_speed else None,
+            'date': self.date,
+            'temperature_min': self.temperature_min,
+            'temperature_max': self.temperature_max,
+            'humidity': self.humidity,
+            'rainfall_mm': self.rainfall_mm,
+            'wind_speed': self.wind_speed,
             'weather_condition': self.weather_condition,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class AgriculturalAdvisory(db.Model):
@@ -220,6 +237,7 @@ class AgriculturalAdvisory(db.Model):
     valid_until = db.Column(db.Date)
     issued_by = db.Column(db.String(36), db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     issuer = db.relationship('User', backref='issued_advisories')
@@ -242,16 +260,19 @@ class AgriculturalAdvisory(db.Model):
             'target_crops': self.target_crops,
             'target_regions': self.target_regions,
             'severity_level': self.severity_level,
-            'valid_from': self.valid_from.isoformat() if self.valid_from else None,
-            'valid_until': self.valid_until.isoformat() if self.valid_until else None,
+            'valid_from': self.valid_from,
+            'valid_until': self.valid_until,
             'is_active': self.is_active,
             'issued_by': self.issued_by,
             'issuer_name': self.issuer.full_name if self.issuer else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class AgriculturalProduct(db.Model):
     __tablename__ = 'agricultural_products'
+    __table_args__ = (
+        db.Index('ix_agricultural_products_available_created', 'is_available', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     farmer_id = db.Column(db.Integer, db.ForeignKey('farmers.id'), nullable=False)
@@ -265,6 +286,9 @@ class AgriculturalProduct(db.Model):
     harvest_date = db.Column(db.Date)
     location_address = db.Column(db.Text)
     location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     images = db.Column(db.JSON)  # Array of image URLs
     is_organic = db.Column(db.Boolean, default=False)
     is_available = db.Column(db.Boolean, default=True)
@@ -278,6 +302,16 @@ class AgriculturalProduct(db.Model):
     def inquiry_count(self):
         return len(self.inquiries)
     
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.farmer).load_only(Farmer.id, Farmer.user_id)
+                .joinedload(Farmer.user).load_only(*USER_NAME_FIELDS),
+            joinedload(cls.crop).load_only(Crop.id, Crop.name),
+            selectinload(cls.inquiries).load_only(ProductInquiry.id, ProductInquiry.product_id)
+        ]
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -287,19 +321,19 @@ class AgriculturalProduct(db.Model):
             'crop_name': self.crop.name if self.crop else None,
             'title': self.title,
             'description': self.description,
-            'quantity_available': float(self.quantity_available) if self.quantity_available else None,
+            'quantity_available': self.quantity_available,
             'unit': self.unit,
-            'price_per_unit': float(self.price_per_unit) if self.price_per_unit else None,
+            'price_per_unit': self.price_per_unit,
             'quality_grade': self.quality_grade,
-            'harvest_date': self.harvest_date.isoformat() if self.harvest_date else None,
+            'harvest_date': self.harvest_date,
             'location_address': self.location_address,
             'location_coordinates': self.location_coordinates,
             'images': self.images,
             'is_organic': self.is_organic,
             'is_available': self.is_available,
             'inquiry_count': self.inquiry_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class ProductInquiry(db.Model):
@@ -325,11 +359,19 @@ class ProductInquiry(db.Model):
             'product_title': self.product.title if self.product else None,
             'buyer_id': self.buyer_id,
             'buyer_name': self.buyer.full_name if self.buyer else None,
-            'quantity_requested': float(self.quantity_requested) if self.quantity_requested else None,
-            'offered_price': float(self.offered_price) if self.offered_price else None,
+            'quantity_requested': self.quantity_requested,
+            'offered_price': self.offered_price,
             'message': self.message,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
+register_search(AgriculturalProduct, 'product', 'agriculture',
+                {'title': 3, 'quality_grade': 1, 'description': 1, 'location_address': 1},
+                url='/agriculture/products/{id}', visible=visible_when('is_available'),
+                location='location_address')
+
+track_coordinates(Farm)
+track_coordinates(WeatherData)
+track_coordinates(AgriculturalProduct)
@@ -1,4 +1,8 @@
-from src.models.user import db
+from sqlalchemy.orm import joinedload
+from src.models.user import db, USER_NAME_FIELDS
+from src.fieldsets import Computed, FieldSet
+from src.models.counters import maintain_count, maintain_sum
+from src.models.search import register_search, visible_when
 from datetime import datetime
 
 class LoanProduct(db.Model):
@@ -25,14 +29,14 @@ class LoanProduct(db.Model):
             'id': self.id,
             'name': self.name,
             'description': self.description,
-            'min_amount': float(self.min_amount) if self.min_amount else None,
-            'max_amount': float(self.max_amount) if self.max_amount else None,
-            'interest_rate': float(self.interest_rate) if self.interest_rate else None,
+            'min_amount': self.min_amount,
+            'max_amount': self.max_amount,
+            'interest_rate': self.interest_rate,
             'tenure_months': self.tenure_months,
             'eligibility_criteria': self.eligibility_criteria,
             'required_documents': self.required_documents,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class LoanApplication(db.Model):
@@ -64,6 +68,30 @@ class LoanApplication(db.Model):
     def is_reviewed(self):
         return self.reviewed_at is not None
     
+    # What ?fields= may name on application lists, and what ?compact=true leaves out
+    api_fields = FieldSet(
+        columns=('id', 'applicant_id', 'loan_product_id', 'requested_amount', 'purpose', 'business_plan',
+                 'monthly_income', 'existing_loans', 'collateral_details', 'guarantor_info', 'documents',
+                 'status', 'applied_at', 'reviewed_at', 'reviewed_by', 'review_notes'),
+        computed={
+            'applicant_name': Computed(
+                lambda application: application.applicant.full_name if application.applicant else None,
+                ['applicant_id'], lambda: [joinedload(LoanApplication.applicant).load_only(*USER_NAME_FIELDS)]
+            ),
+            'loan_product_name': Computed(
+                lambda application: application.loan_product.name if application.loan_product else None,
+                ['loan_product_id'],
+                lambda: [joinedload(LoanApplication.loan_product).load_only(LoanProduct.id, LoanProduct.name)]
+            ),
+            'reviewer_name': Computed(
+                lambda application: application.reviewer.full_name if application.reviewer else None,
+                ['reviewed_by'], lambda: [joinedload(LoanApplication.reviewer).load_only(*USER_NAME_FIELDS)]
+            ),
+            'is_reviewed': Computed(lambda application: application.is_reviewed, ['reviewed_at'])
+        },
+        deferred=('business_plan',)
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -71,17 +99,17 @@ class LoanApplication(db.Model):
             'applicant_name': self.applicant.full_name if self.applicant else None,
             'loan_product_id': self.loan_product_id,
             'loan_product_name': self.loan_product.name if self.loan_product else None,
-            'requested_amount': float(self.requested_amount) if self.requested_amount else None,
+            'requested_amount': self.requested_amount,
             'purpose': self.purpose,
             'business_plan': self.business_plan,
-            'monthly_income': float(self.monthly_income) if self.monthly_income else None,
-            'existing_loans': float(self.existing_loans) if self.existing_loans else None,
+            'monthly_income': self.monthly_income,
+            'existing_loans': self.existing_loans,
             'collateral_details': self.collateral_details,
             'guarantor_info': self.guarantor_info,
             'documents': self.documents,
             'status': self.status,
-            'applied_at': self.applied_at.isoformat() if self.applied_at else None,
-            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
+            'applied_at': self.applied_at,
+            'reviewed_at': self.reviewed_at,
             'reviewed_by': self.reviewed_by,
             'reviewer_name': self.reviewer.full_name if self.reviewer else None,
             'review_notes': self.review_notes,
@@ -102,6 +130,8 @@ class Loan(db.Model):
     disbursement_date = db.Column(db.Date)
     maturity_date = db.Column(db.Date)
     outstanding_balance = db.Column(db.Numeric(12, 2))
+    total_paid = db.Column(db.Numeric(12, 2), default=0)  # maintained from payments
+    payment_count = db.Column(db.Integer, default=0)  # maintained from payments
     status = db.Column(db.String(20), default='active')  # active, closed, defaulted
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -110,13 +140,13 @@ class Loan(db.Model):
     borrower = db.relationship('User', backref='loans')
     payments = db.relationship('LoanPayment', backref='loan', cascade='all, delete-orphan')
     
-    @property
-    def total_paid(self):
-        return sum(payment.amount_paid for payment in self.payments)
-    
-    @property
-    def payment_count(self):
-        return len(self.payments)
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.borrower).load_only(*USER_NAME_FIELDS),
+            joinedload(cls.loan_product).load_only(LoanProduct.id, LoanProduct.name)
+        ]
     
     def to_dict(self):
         return {
@@ -126,18 +156,18 @@ class Loan(db.Model):
             'borrower_name': self.borrower.full_name if self.borrower else None,
             'loan_product_id': self.loan_product_id,
             'loan_product_name': self.loan_product.name if self.loan_product else None,
-            'principal_amount': float(self.principal_amount) if self.principal_amount else None,
-            'interest_rate': float(self.interest_rate) if self.interest_rate else None,
+            'principal_amount': self.principal_amount,
+            'interest_rate': self.interest_rate,
             'tenure_months': self.tenure_months,
-            'monthly_emi': float(self.monthly_emi) if self.monthly_emi else None,
-            'disbursement_date': self.disbursement_date.isoformat() if self.disbursement_date else None,
-            'maturity_date': self.maturity_date.isoformat() if self.maturity_date else None,
-            'outstanding_balance': float(self.outstanding_balance) if self.outstanding_balance else None,
-            'total_paid': float(self.total_paid) if self.total_paid else 0,
+            'monthly_emi': self.monthly_emi,
+            'disbursement_date': self.disbursement_date,
+            'maturity_date': self.maturity_date,
+            'outstanding_balance': self.outstanding_balance,
+            'total_paid': self.total_paid or 0,
             'payment_count': self.payment_count,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class LoanPayment(db.Model):
@@ -158,14 +188,14 @@ class LoanPayment(db.Model):
         return {
             'id': self.id,
             'loan_id': self.loan_id,
-            'payment_date': self.payment_date.isoformat() if self.payment_date else None,
-            'amount_paid': float(self.amount_paid) if self.amount_paid else None,
-            'principal_component': float(self.principal_component) if self.principal_component else None,
-            'interest_component': float(self.interest_component) if self.interest_component else None,
+            'payment_date': self.payment_date,
+            'amount_paid': self.amount_paid,
+            'principal_component': self.principal_component,
+            'interest_component': self.interest_component,
             'payment_method': self.payment_method,
             'transaction_reference': self.transaction_reference,
-            'late_fee': float(self.late_fee) if self.late_fee else 0,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'late_fee': self.late_fee or 0,
+            'created_at': self.created_at
         }
 
 class TrainingProgram(db.Model):
@@ -178,6 +208,7 @@ class TrainingProgram(db.Model):
     duration_hours = db.Column(db.Integer)
     trainer_id = db.Column(db.String(36), db.ForeignKey('users.id'))
     max_participants = db.Column(db.Integer)
+    enrollment_count = db.Column(db.Integer, default=0)  # maintained from enrollments
     fee = db.Column(db.Numeric(8, 2), default=0)
     prerequisites = db.Column(db.Text)
     certification_provided = db.Column(db.Boolean, default=False)
@@ -192,10 +223,6 @@ class TrainingProgram(db.Model):
     trainer = db.relationship('User', backref='training_programs')
     enrollments = db.relationship('TrainingEnrollment', backref='program', cascade='all, delete-orphan')
     
-    @property
-    def enrollment_count(self):
-        return len(self.enrollments)
-    
     @property
     def is_enrollment_open(self):
         if self.max_participants and self.enrollment_count >= self.max_participants:
@@ -215,16 +242,16 @@ class TrainingProgram(db.Model):
             'trainer_name': self.trainer.full_name if self.trainer else None,
             'max_participants': self.max_participants,
             'enrollment_count': self.enrollment_count,
-            'fee': float(self.fee) if self.fee else 0,
+            'fee': self.fee or 0,
             'prerequisites': self.prerequisites,
             'certification_provided': self.certification_provided,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
             'location_address': self.location_address,
             'is_online': self.is_online,
             'is_active': self.is_active,
             'is_enrollment_open': self.is_enrollment_open,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class TrainingEnrollment(db.Model):
@@ -257,10 +284,10 @@ class TrainingEnrollment(db.Model):
             'program_name': self.program.name if self.program else None,
             'participant_id': self.participant_id,
             'participant_name': self.participant.full_name if self.participant else None,
-            'enrollment_date': self.enrollment_date.isoformat() if self.enrollment_date else None,
-            'completion_date': self.completion_date.isoformat() if self.completion_date else None,
-            'attendance_percentage': float(self.attendance_percentage) if self.attendance_percentage else None,
-            'final_score': float(self.final_score) if self.final_score else None,
+            'enrollment_date': self.enrollment_date,
+            'completion_date': self.completion_date,
+            'attendance_percentage': self.attendance_percentage,
+            'final_score': self.final_score,
             'certificate_issued': self.certificate_issued,
             'certificate_url': self.certificate_url,
             'is_completed': self.is_completed
@@ -286,12 +313,15 @@ class JobCategory(db.Model):
             'description': self.description,
             'parent_id': self.parent_id,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'subcategories': [sub.to_dict() for sub in self.subcategories] if self.subcategories else []
         }
 
 class JobPosting(db.Model):
     __tablename__ = 'job_postings'
+    __table_args__ = (
+        db.Index('ix_job_postings_active_created', 'is_active', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -306,6 +336,7 @@ class JobPosting(db.Model):
     salary_min = db.Column(db.Numeric(10, 2))
     salary_max = db.Column(db.Numeric(10, 2))
     application_deadline = db.Column(db.Date)
+    application_count = db.Column(db.Integer, default=0)  # maintained from applications
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -315,9 +346,34 @@ class JobPosting(db.Model):
     employer = db.relationship('User', backref='job_postings')
     applications = db.relationship('JobApplication', backref='job', cascade='all, delete-orphan')
     
-    @property
-    def application_count(self):
-        return len(self.applications)
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.category).load_only(JobCategory.id, JobCategory.name),
+            joinedload(cls.employer).load_only(*USER_NAME_FIELDS)
+        ]
+    
+    # What ?fields= may name on job lists, and what ?compact=true leaves out
+    api_fields = FieldSet(
+        columns=('id', 'title', 'description', 'category_id', 'employer_id', 'company_name', 'location_address',
+                 'employment_type', 'experience_required', 'skills_required', 'salary_min', 'salary_max',
+                 'application_deadline', 'application_count', 'is_active', 'created_at', 'updated_at'),
+        computed={
+            'category_name': Computed(
+                lambda job: job.category.name if job.category else None, ['category_id'],
+                lambda: [joinedload(JobPosting.category).load_only(JobCategory.id, JobCategory.name)]
+            ),
+            'employer_name': Computed(
+                lambda job: job.employer.full_name if job.employer else None, ['employer_id'],
+                lambda: [joinedload(JobPosting.employer).load_only(*USER_NAME_FIELDS)]
+            ),
+            'is_application_open': Computed(
+                lambda job: job.is_application_open, ['application_deadline', 'is_active']
+            )
+        },
+        deferred=('description',)
+    )
     
     @property
     def is_application_open(self):
@@ -339,14 +395,14 @@ class JobPosting(db.Model):
             'employment_type': self.employment_type,
             'experience_required': self.experience_required,
             'skills_required': self.skills_required,
-            'salary_min': float(self.salary_min) if self.salary_min else None,
-            'salary_max': float(self.salary_max) if self.salary_max else None,
-            'application_deadline': self.application_deadline.isoformat() if self.application_deadline else None,
+            'salary_min': self.salary_min,
+            'salary_max': self.salary_max,
+            'application_deadline': self.application_deadline,
             'application_count': self.application_count,
             'is_active': self.is_active,
             'is_application_open': self.is_application_open,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class JobApplication(db.Model):
@@ -377,7 +433,16 @@ class JobApplication(db.Model):
             'cover_letter': self.cover_letter,
             'resume_url': self.resume_url,
             'status': self.status,
-            'applied_at': self.applied_at.isoformat() if self.applied_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'applied_at': self.applied_at,
+            'updated_at': self.updated_at
         }
 
+maintain_count(TrainingProgram.enrollment_count, TrainingEnrollment.program_id)
+maintain_count(JobPosting.application_count, JobApplication.job_id)
+maintain_count(Loan.payment_count, LoanPayment.loan_id)
+maintain_sum(Loan.total_paid, LoanPayment.loan_id, LoanPayment.amount_paid)
+
+register_search(JobPosting, 'job', 'business',
+                {'title': 3, 'company_name': 2, 'skills_required': 2, 'description': 1, 'location_address': 1},
+                url='/business/jobs/{id}', visible=visible_when('is_active'),
+                location='location_address')
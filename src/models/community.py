@@ -1,4 +1,10 @@
-from src.models.user import db
+from sqlalchemy.orm import joinedload, selectinload
+from src.models.user import db, USER_NAME_FIELDS
+from src.fieldsets import Computed, FieldSet
+from src.serializers import Derived, RowSerializer, full_name
+from src.models.counters import maintain_count, maintain_sum, reconcile_sum
+from src.models.search import register_search, visible_when
+from src.models.geo import track_coordinates
 from datetime import datetime
 
 # =============================================
@@ -36,11 +42,14 @@ class Forum(db.Model):
             'is_public': self.is_public,
             'is_active': self.is_active,
             'post_count': self.post_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class ForumPost(db.Model):
     __tablename__ = 'forum_posts'
+    __table_args__ = (
+        db.Index('ix_forum_posts_forum_order', 'forum_id', 'is_pinned', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     forum_id = db.Column(db.Integer, db.ForeignKey('forums.id'), nullable=False)
@@ -62,6 +71,15 @@ class ForumPost(db.Model):
     def reply_count(self):
         return len(self.replies)
     
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.forum).load_only(Forum.id, Forum.name),
+            joinedload(cls.author).load_only(*USER_NAME_FIELDS),
+            selectinload(cls.replies).load_only(ForumReply.id, ForumReply.post_id)
+        ]
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -76,8 +94,8 @@ class ForumPost(db.Model):
             'views_count': self.views_count,
             'likes_count': self.likes_count,
             'reply_count': self.reply_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class ForumReply(db.Model):
@@ -96,6 +114,13 @@ class ForumReply(db.Model):
     author = db.relationship('User', backref='forum_replies')
     parent_reply = db.relationship('ForumReply', remote_side=[id], backref='child_replies')
     
+    # to_dict() for rows of a Core select(), used by the replies list
+    row_serializer = RowSerializer(
+        columns=('id', 'post_id', 'author_id', 'content', 'parent_reply_id', 'likes_count', 'created_at',
+                 'updated_at'),
+        computed={'author_name': Derived(full_name, 'author.first_name', 'author.last_name')}
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -105,12 +130,15 @@ class ForumReply(db.Model):
             'content': self.content,
             'parent_reply_id': self.parent_reply_id,
             'likes_count': self.likes_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        db.Index('ix_events_start', 'start_datetime', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -121,11 +149,15 @@ class Event(db.Model):
     end_datetime = db.Column(db.DateTime)
     location_address = db.Column(db.Text)
     location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     is_online = db.Column(db.Boolean, default=False)
     meeting_link = db.Column(db.Text)
     capacity = db.Column(db.Integer)
     registration_fee = db.Column(db.Numeric(8, 2), default=0)
     registration_deadline = db.Column(db.DateTime)
+    registration_count = db.Column(db.Integer, default=0)  # maintained from registrations
     is_public = db.Column(db.Boolean, default=True)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -135,9 +167,12 @@ class Event(db.Model):
     organizer = db.relationship('User', backref='organized_events')
     registrations = db.relationship('EventRegistration', backref='event', cascade='all, delete-orphan')
     
-    @property
-    def registration_count(self):
-        return len(self.registrations)
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.organizer).load_only(*USER_NAME_FIELDS)
+        ]
     
     @property
     def is_registration_open(self):
@@ -155,21 +190,21 @@ class Event(db.Model):
             'event_type': self.event_type,
             'organizer_id': self.organizer_id,
             'organizer_name': self.organizer.full_name if self.organizer else None,
-            'start_datetime': self.start_datetime.isoformat() if self.start_datetime else None,
-            'end_datetime': self.end_datetime.isoformat() if self.end_datetime else None,
+            'start_datetime': self.start_datetime,
+            'end_datetime': self.end_datetime,
             'location_address': self.location_address,
             'location_coordinates': self.location_coordinates,
             'is_online': self.is_online,
             'meeting_link': self.meeting_link,
             'capacity': self.capacity,
             'registration_count': self.registration_count,
-            'registration_fee': float(self.registration_fee) if self.registration_fee else 0,
-            'registration_deadline': self.registration_deadline.isoformat() if self.registration_deadline else None,
+            'registration_fee': self.registration_fee or 0,
+            'registration_deadline': self.registration_deadline,
             'is_public': self.is_public,
             'is_active': self.is_active,
             'is_registration_open': self.is_registration_open,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class EventRegistration(db.Model):
@@ -196,7 +231,7 @@ class EventRegistration(db.Model):
             'event_title': self.event.title if self.event else None,
             'participant_id': self.participant_id,
             'participant_name': self.participant.full_name if self.participant else None,
-            'registration_date': self.registration_date.isoformat() if self.registration_date else None,
+            'registration_date': self.registration_date,
             'attendance_status': self.attendance_status,
             'payment_status': self.payment_status,
             'special_requirements': self.special_requirements
@@ -204,6 +239,9 @@ class EventRegistration(db.Model):
 
 class VolunteerOpportunity(db.Model):
     __tablename__ = 'volunteer_opportunities'
+    __table_args__ = (
+        db.Index('ix_volunteer_opportunities_active_created', 'is_active', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -214,10 +252,14 @@ class VolunteerOpportunity(db.Model):
     time_commitment = db.Column(db.String(100))
     location_address = db.Column(db.Text)
     location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     is_remote = db.Column(db.Boolean, default=False)
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
     volunteers_needed = db.Column(db.Integer)
+    application_count = db.Column(db.Integer, default=0)  # maintained from applications
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -226,9 +268,12 @@ class VolunteerOpportunity(db.Model):
     organization = db.relationship('User', backref='volunteer_opportunities')
     applications = db.relationship('VolunteerApplication', backref='opportunity', cascade='all, delete-orphan')
     
-    @property
-    def application_count(self):
-        return len(self.applications)
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.organization).load_only(*USER_NAME_FIELDS)
+        ]
     
     @property
     def is_application_open(self):
@@ -251,14 +296,14 @@ class VolunteerOpportunity(db.Model):
             'location_address': self.location_address,
             'location_coordinates': self.location_coordinates,
             'is_remote': self.is_remote,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
             'volunteers_needed': self.volunteers_needed,
             'application_count': self.application_count,
             'is_active': self.is_active,
             'is_application_open': self.is_application_open,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class VolunteerApplication(db.Model):
@@ -295,8 +340,8 @@ class VolunteerApplication(db.Model):
             'motivation': self.motivation,
             'availability': self.availability,
             'status': self.status,
-            'applied_at': self.applied_at.isoformat() if self.applied_at else None,
-            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
+            'applied_at': self.applied_at,
+            'reviewed_at': self.reviewed_at,
             'reviewed_by': self.reviewed_by,
             'reviewer_name': self.reviewer.full_name if self.reviewer else None,
             'is_reviewed': self.is_reviewed
@@ -331,14 +376,14 @@ class VolunteerHours(db.Model):
             'volunteer_name': self.volunteer.full_name if self.volunteer else None,
             'opportunity_id': self.opportunity_id,
             'opportunity_title': self.opportunity.title if self.opportunity else None,
-            'date': self.date.isoformat() if self.date else None,
-            'hours_worked': float(self.hours_worked) if self.hours_worked else None,
+            'date': self.date,
+            'hours_worked': self.hours_worked,
             'activity_description': self.activity_description,
             'verified_by': self.verified_by,
             'verifier_name': self.verifier.full_name if self.verifier else None,
-            'verified_at': self.verified_at.isoformat() if self.verified_at else None,
+            'verified_at': self.verified_at,
             'is_verified': self.is_verified,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 # =============================================
@@ -347,6 +392,9 @@ class VolunteerHours(db.Model):
 
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        db.Index('ix_projects_status_created', 'status', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -355,10 +403,15 @@ class Project(db.Model):
     manager_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     target_amount = db.Column(db.Numeric(15, 2))
     raised_amount = db.Column(db.Numeric(15, 2), default=0)
+    donation_count = db.Column(db.Integer, default=0)  # maintained from donations
+    total_expenses = db.Column(db.Numeric(15, 2), default=0)  # maintained from approved expenses
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
     location_address = db.Column(db.Text)
     location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     images = db.Column(db.JSON)  # Array of image URLs
     documents = db.Column(db.JSON)  # Array of document URLs
     status = db.Column(db.String(20), default='active')  # active, completed, cancelled, on_hold
@@ -371,19 +424,37 @@ class Project(db.Model):
     donations = db.relationship('Donation', backref='project', cascade='all, delete-orphan')
     expenses = db.relationship('ProjectExpense', backref='project', cascade='all, delete-orphan')
     
-    @property
-    def donation_count(self):
-        return len(self.donations)
-    
     @property
     def progress_percentage(self):
         if self.target_amount and self.raised_amount:
             return min((self.raised_amount / self.target_amount) * 100, 100)
         return 0
     
-    @property
-    def total_expenses(self):
-        return sum(expense.amount for expense in self.expenses if expense.approved_at)
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.manager).load_only(*USER_NAME_FIELDS)
+        ]
+    
+    # What ?fields= may name on project lists, and what ?compact=true leaves out
+    api_fields = FieldSet(
+        columns=('id', 'title', 'description', 'category', 'manager_id', 'target_amount', 'donation_count',
+                 'start_date', 'end_date', 'location_address', 'location_coordinates', 'images', 'documents',
+                 'status', 'is_featured', 'created_at', 'updated_at'),
+        computed={
+            'manager_name': Computed(
+                lambda project: project.manager.full_name if project.manager else None, ['manager_id'],
+                lambda: [joinedload(Project.manager).load_only(*USER_NAME_FIELDS)]
+            ),
+            'raised_amount': Computed(lambda project: project.raised_amount or 0, ['raised_amount']),
+            'progress_percentage': Computed(
+                lambda project: project.progress_percentage, ['target_amount', 'raised_amount']
+            ),
+            'total_expenses': Computed(lambda project: project.total_expenses or 0, ['total_expenses'])
+        },
+        deferred=('images', 'documents')
+    )
     
     def to_dict(self):
         return {
@@ -393,21 +464,21 @@ class Project(db.Model):
             'category': self.category,
             'manager_id': self.manager_id,
             'manager_name': self.manager.full_name if self.manager else None,
-            'target_amount': float(self.target_amount) if self.target_amount else None,
-            'raised_amount': float(self.raised_amount) if self.raised_amount else 0,
+            'target_amount': self.target_amount,
+            'raised_amount': self.raised_amount or 0,
             'progress_percentage': self.progress_percentage,
             'donation_count': self.donation_count,
-            'total_expenses': float(self.total_expenses) if self.total_expenses else 0,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'total_expenses': self.total_expenses or 0,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
             'location_address': self.location_address,
             'location_coordinates': self.location_coordinates,
             'images': self.images,
             'documents': self.documents,
             'status': self.status,
             'is_featured': self.is_featured,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Donation(db.Model):
@@ -436,7 +507,24 @@ class Donation(db.Model):
     
     @property
     def is_processed(self):
-        return self.payment_status == 'completed' and self.processed_at is not None
+        return _is_processed(self.payment_status, self.processed_at)
+    
+    # to_dict() for rows of a Core select(), used by a project's donation list
+    row_serializer = RowSerializer(
+        columns=('id', 'donor_id', 'project_id', 'amount', 'currency', 'donation_type', 'frequency',
+                 'is_anonymous', 'message', 'payment_method', 'transaction_id', 'payment_status',
+                 'tax_deductible', 'receipt_url', 'donated_at', 'processed_at'),
+        computed={
+            'donor_name': Derived(
+                lambda first_name, last_name, is_anonymous:
+                    full_name(first_name, last_name) if first_name is not None and not is_anonymous else 'Anonymous',
+                'donor.first_name', 'donor.last_name', 'is_anonymous'
+            ),
+            'project_title': 'project.title',
+            'is_processed': Derived(lambda status, processed_at: _is_processed(status, processed_at),
+                                    'payment_status', 'processed_at')
+        }
+    )
     
     def to_dict(self):
         return {
@@ -445,7 +533,7 @@ class Donation(db.Model):
             'donor_name': self.donor.full_name if self.donor and not self.is_anonymous else 'Anonymous',
             'project_id': self.project_id,
             'project_title': self.project.title if self.project else None,
-            'amount': float(self.amount) if self.amount else None,
+            'amount': self.amount,
             'currency': self.currency,
             'donation_type': self.donation_type,
             'frequency': self.frequency,
@@ -456,11 +544,14 @@ class Donation(db.Model):
             'payment_status': self.payment_status,
             'tax_deductible': self.tax_deductible,
             'receipt_url': self.receipt_url,
-            'donated_at': self.donated_at.isoformat() if self.donated_at else None,
-            'processed_at': self.processed_at.isoformat() if self.processed_at else None,
+            'donated_at': self.donated_at,
+            'processed_at': self.processed_at,
             'is_processed': self.is_processed
         }
 
+def _is_processed(payment_status, processed_at):
+    return payment_status == 'completed' and processed_at is not None
+
 class PaymentTransaction(db.Model):
     __tablename__ = 'payment_transactions'
     
@@ -480,13 +571,13 @@ class PaymentTransaction(db.Model):
             'id': self.id,
             'donation_id': self.donation_id,
             'transaction_type': self.transaction_type,
-            'amount': float(self.amount) if self.amount else None,
+            'amount': self.amount,
             'currency': self.currency,
             'payment_gateway': self.payment_gateway,
             'gateway_transaction_id': self.gateway_transaction_id,
             'gateway_response': self.gateway_response,
             'status': self.status,
-            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+            'processed_at': self.processed_at
         }
 
 class ProjectExpense(db.Model):
@@ -519,15 +610,41 @@ class ProjectExpense(db.Model):
             'project_title': self.project.title if self.project else None,
             'category': self.category,
             'description': self.description,
-            'amount': float(self.amount) if self.amount else None,
-            'expense_date': self.expense_date.isoformat() if self.expense_date else None,
+            'amount': self.amount,
+            'expense_date': self.expense_date,
             'receipt_url': self.receipt_url,
             'approved_by': self.approved_by,
             'approver_name': self.approver.full_name if self.approver else None,
-            'approved_at': self.approved_at.isoformat() if self.approved_at else None,
+            'approved_at': self.approved_at,
             'created_by': self.created_by,
             'creator_name': self.creator.full_name if self.creator else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'is_approved': self.is_approved
         }
 
+maintain_count(Event.registration_count, EventRegistration.event_id)
+maintain_count(VolunteerOpportunity.application_count, VolunteerApplication.opportunity_id)
+maintain_count(Project.donation_count, Donation.project_id)
+maintain_sum(Project.total_expenses, ProjectExpense.project_id, ProjectExpense.amount, when=ProjectExpense.approved_at)
+# raised_amount is incremented atomically by confirm_donation
+reconcile_sum(Project.raised_amount, Donation.project_id, Donation.amount, Donation.payment_status == 'completed')
+
+register_search(ForumPost, 'forum_post', 'community',
+                {'title': 3, 'content': 1},
+                url='/community/forums/posts/{id}')
+register_search(Event, 'event', 'community',
+                {'title': 3, 'event_type': 2, 'description': 1, 'location_address': 1},
+                url='/community/events/{id}', visible=visible_when('is_active', 'is_public'),
+                location='location_address')
+register_search(VolunteerOpportunity, 'volunteer', 'community',
+                {'title': 3, 'category': 2, 'skills_required': 2, 'description': 1, 'location_address': 1},
+                url='/community/volunteer-opportunities/{id}', visible=visible_when('is_active'),
+                location='location_address')
+register_search(Project, 'project', 'projects',
+                {'title': 3, 'category': 2, 'description': 1, 'location_address': 1},
+                url='/projects/{id}', visible=visible_when('status', check=lambda project: project.status != 'cancelled'),
+                location='location_address')
+
+track_coordinates(Event)
+track_coordinates(VolunteerOpportunity)
+track_coordinates(Project)
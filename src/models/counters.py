@@ -0,0 +1,120 @@
+from sqlalchemy import event, func, inspect, or_, select
+from src.models.user import db
+
+# (parent column attribute, child foreign key, summed child attribute or None
+# for a row count, SQL criterion a child row must meet to count or None)
+_aggregates = []
+
+def maintain_count(counter, foreign_key):
+    """Keep a denormalized child-row count on the parent table.
+
+    The counter is bumped by an UPDATE issued from the child's after_insert /
+    after_delete mapper events, so it commits or rolls back together with the
+    row that changed it. reconcile_counters() recomputes it from scratch.
+    """
+    _maintain(counter, foreign_key, None, None)
+
+def maintain_sum(total, foreign_key, amount, when=None):
+    """Keep a running total of a child column on the parent table.
+
+    Works like maintain_count(); when `when` is given only child rows with
+    that attribute set contribute (e.g. expenses once approved_at is filled
+    in), and updates that change either attribute adjust the total.
+    """
+    _maintain(total, foreign_key, amount, when)
+
+def reconcile_sum(total, foreign_key, amount, criterion):
+    """Register a total that is kept up to date elsewhere for reconciliation.
+
+    Used for columns bumped by explicit atomic UPDATEs rather than mapper
+    events, e.g. Project.raised_amount from confirmed donations.
+    """
+    _aggregates.append((total, foreign_key, amount, criterion))
+
+def _maintain(column, foreign_key, amount, when):
+    _aggregates.append((column, foreign_key, amount, when.isnot(None) if when is not None else None))
+    child = foreign_key.class_
+    event.listen(child, 'after_insert', _listener(column, foreign_key, amount, when, 'insert'))
+    event.listen(child, 'after_delete', _listener(column, foreign_key, amount, when, 'delete'))
+    if amount is not None or when is not None:
+        for attr in (amount, when):
+            if attr is not None:
+                # Load the old value before it is overwritten, even when the
+                # attribute was expired, so after_update can see the delta.
+                event.listen(attr, 'set', _keep_history, active_history=True)
+        event.listen(child, 'after_update', _listener(column, foreign_key, amount, when, 'update'))
+
+def _keep_history(target, value, oldvalue, initiator):
+    pass
+
+def _contribution(value_of, amount, when):
+    if when is not None and value_of(when) is None:
+        return 0
+    if amount is None:
+        return 1
+    return value_of(amount) or 0
+
+def _previous_value(target):
+    state = inspect(target)
+
+    def value_of(attr):
+        history = state.attrs[attr.key].history
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(target, attr.key)
+
+    return value_of
+
+def _listener(column, foreign_key, amount, when, operation):
+    table = column.class_.__table__
+    target_column = table.c[column.key]
+
+    def listener(mapper, connection, target):
+        parent_id = getattr(target, foreign_key.key)
+        if parent_id is None:
+            return
+
+        current = _contribution(lambda attr: getattr(target, attr.key), amount, when)
+        if operation == 'insert':
+            delta = current
+        elif operation == 'delete':
+            delta = -current
+        else:
+            delta = current - _contribution(_previous_value(target), amount, when)
+
+        if not delta:
+            return
+        connection.execute(
+            table.update()
+            .where(table.c.id == parent_id)
+            .values({target_column: func.coalesce(target_column, 0) + delta})
+        )
+
+    return listener
+
+def reconcile_counters():
+    """Recompute every maintained counter and total from its child table"""
+    results = []
+    for column, foreign_key, amount, criterion in _aggregates:
+        table = column.class_.__table__
+        target_column = table.c[column.key]
+        child_table = foreign_key.class_.__table__
+
+        if amount is None:
+            aggregate = func.count()
+        else:
+            aggregate = func.coalesce(func.sum(child_table.c[amount.key]), 0)
+        actual = select(aggregate).where(child_table.c[foreign_key.key] == table.c.id)
+        if criterion is not None:
+            actual = actual.where(criterion)
+        actual = actual.scalar_subquery()
+
+        result = db.session.execute(
+            table.update()
+            .where(or_(target_column.is_(None), target_column != actual))
+            .values({target_column: actual})
+        )
+        results.append((f'{table.name}.{column.key}', result.rowcount))
+
+    db.session.commit()
+    return results
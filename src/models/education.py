@@ -1,4 +1,8 @@
-from src.models.user import db
+from sqlalchemy.orm import joinedload, selectinload
+from src.models.user import db, USER_NAME_FIELDS
+from src.fieldsets import Computed, FieldSet
+from src.models.counters import maintain_count
+from src.models.search import register_search, visible_when
 from datetime import datetime
 
 class CourseCategory(db.Model):
@@ -23,12 +27,15 @@ class CourseCategory(db.Model):
             'parent_id': self.parent_id,
             'sort_order': self.sort_order,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'subcategories': [sub.to_dict() for sub in self.subcategories] if self.subcategories else []
         }
 
 class Course(db.Model):
     __tablename__ = 'courses'
+    __table_args__ = (
+        db.Index('ix_courses_published_created', 'is_published', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -45,6 +52,7 @@ class Course(db.Model):
     is_free = db.Column(db.Boolean, default=True)
     is_published = db.Column(db.Boolean, default=False)
     enrollment_limit = db.Column(db.Integer)
+    enrollment_count = db.Column(db.Integer, default=0)  # maintained from enrollments
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -57,9 +65,44 @@ class Course(db.Model):
     enrollments = db.relationship('Enrollment', backref='course', cascade='all, delete-orphan')
     assessments = db.relationship('Assessment', backref='course', cascade='all, delete-orphan')
     
-    @property
-    def enrollment_count(self):
-        return len(self.enrollments)
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [
+            joinedload(cls.category).load_only(CourseCategory.id, CourseCategory.name),
+            joinedload(cls.instructor).load_only(*USER_NAME_FIELDS)
+        ]
+    
+    # What ?fields= and ?expand= may name on course lists, and what ?compact=true leaves out
+    api_fields = FieldSet(
+        columns=('id', 'title', 'description', 'category_id', 'instructor_id', 'difficulty_level',
+                 'duration_hours', 'language', 'prerequisites', 'learning_objectives', 'course_image_url',
+                 'is_free', 'is_published', 'enrollment_limit', 'enrollment_count', 'start_date',
+                 'end_date', 'created_at', 'updated_at'),
+        computed={
+            'category_name': Computed(
+                lambda course: course.category.name if course.category else None, ['category_id'],
+                lambda: [joinedload(Course.category).load_only(CourseCategory.id, CourseCategory.name)]
+            ),
+            'instructor_name': Computed(
+                lambda course: course.instructor.full_name if course.instructor else None, ['instructor_id'],
+                lambda: [joinedload(Course.instructor).load_only(*USER_NAME_FIELDS)]
+            ),
+            'price': Computed(lambda course: course.price or 0, ['price']),
+            'is_enrollment_open': Computed(
+                lambda course: course.is_enrollment_open,
+                ['enrollment_limit', 'enrollment_count', 'end_date', 'is_published']
+            )
+        },
+        expand={
+            # Lesson bodies stay on the course detail route; lists only count them
+            'modules': Computed(
+                lambda course: [module.to_dict() for module in course.modules], (),
+                lambda: [selectinload(Course.modules).selectinload(CourseModule.lessons).load_only(Lesson.id)]
+            )
+        },
+        deferred=('description', 'prerequisites')
+    )
     
     @property
     def is_enrollment_open(self):
@@ -84,16 +127,16 @@ class Course(db.Model):
             'prerequisites': self.prerequisites,
             'learning_objectives': self.learning_objectives,
             'course_image_url': self.course_image_url,
-            'price': float(self.price) if self.price else 0,
+            'price': self.price or 0,
             'is_free': self.is_free,
             'is_published': self.is_published,
             'enrollment_limit': self.enrollment_limit,
             'enrollment_count': self.enrollment_count,
             'is_enrollment_open': self.is_enrollment_open,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
         
         if include_modules:
@@ -123,7 +166,7 @@ class CourseModule(db.Model):
             'description': self.description,
             'sort_order': self.sort_order,
             'is_published': self.is_published,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'lesson_count': len(self.lessons)
         }
         
@@ -157,7 +200,7 @@ class Lesson(db.Model):
             'duration_minutes': self.duration_minutes,
             'sort_order': self.sort_order,
             'is_published': self.is_published,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class Enrollment(db.Model):
@@ -191,10 +234,10 @@ class Enrollment(db.Model):
             'course_title': self.course.title if self.course else None,
             'student_id': self.student_id,
             'student_name': self.student.full_name if self.student else None,
-            'enrollment_date': self.enrollment_date.isoformat() if self.enrollment_date else None,
-            'completion_date': self.completion_date.isoformat() if self.completion_date else None,
+            'enrollment_date': self.enrollment_date,
+            'completion_date': self.completion_date,
             'progress_percentage': self.progress_percentage,
-            'final_grade': float(self.final_grade) if self.final_grade else None,
+            'final_grade': self.final_grade,
             'certificate_issued': self.certificate_issued,
             'certificate_url': self.certificate_url,
             'is_completed': self.is_completed
@@ -226,8 +269,8 @@ class LessonProgress(db.Model):
             'enrollment_id': self.enrollment_id,
             'lesson_id': self.lesson_id,
             'lesson_title': self.lesson.title if self.lesson else None,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'started_at': self.started_at,
+            'completed_at': self.completed_at,
             'time_spent_minutes': self.time_spent_minutes,
             'is_completed': self.is_completed
         }
@@ -264,7 +307,7 @@ class Assessment(db.Model):
             'time_limit_minutes': self.time_limit_minutes,
             'attempts_allowed': self.attempts_allowed,
             'is_published': self.is_published,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'question_count': len(self.questions)
         }
         
@@ -339,8 +382,8 @@ class AssessmentSubmission(db.Model):
             'student_id': self.student_id,
             'student_name': self.student.full_name if self.student else None,
             'answers': self.answers,
-            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
-            'graded_at': self.graded_at.isoformat() if self.graded_at else None,
+            'submitted_at': self.submitted_at,
+            'graded_at': self.graded_at,
             'graded_by': self.graded_by,
             'total_marks': self.total_marks,
             'obtained_marks': self.obtained_marks,
@@ -387,9 +430,9 @@ class Scholarship(db.Model):
             'id': self.id,
             'name': self.name,
             'description': self.description,
-            'amount': float(self.amount) if self.amount else None,
+            'amount': self.amount,
             'eligibility_criteria': self.eligibility_criteria,
-            'application_deadline': self.application_deadline.isoformat() if self.application_deadline else None,
+            'application_deadline': self.application_deadline,
             'selection_criteria': self.selection_criteria,
             'total_slots': self.total_slots,
             'available_slots': self.available_slots,
@@ -398,7 +441,7 @@ class Scholarship(db.Model):
             'is_application_open': self.is_application_open,
             'created_by': self.created_by,
             'creator_name': self.creator.full_name if self.creator else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class ScholarshipApplication(db.Model):
@@ -436,11 +479,16 @@ class ScholarshipApplication(db.Model):
             'application_data': self.application_data,
             'documents': self.documents,
             'status': self.status,
-            'applied_at': self.applied_at.isoformat() if self.applied_at else None,
-            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
+            'applied_at': self.applied_at,
+            'reviewed_at': self.reviewed_at,
             'reviewed_by': self.reviewed_by,
             'reviewer_name': self.reviewer.full_name if self.reviewer else None,
             'review_notes': self.review_notes,
             'is_reviewed': self.is_reviewed
         }
 
+maintain_count(Course.enrollment_count, Enrollment.course_id)
+
+register_search(Course, 'course', 'education',
+                {'title': 3, 'description': 1, 'prerequisites': 1},
+                url='/education/courses/{id}', visible=visible_when('is_published'))
@@ -0,0 +1,183 @@
+import math
+from sqlalchemy import and_, event, inspect, or_
+from src.models.user import db
+
+# =============================================
+# COORDINATE INDEXING
+# =============================================
+#
+# Models keep the user-supplied "lat,lng" string in location_coordinates and
+# carry parsed latitude / longitude columns plus an indexed geohash. Radius
+# queries probe the geohash index for the few cells covering the search box,
+# then narrow by an equirectangular distance that needs only arithmetic, so
+# the same SQL runs on SQLite and PostgreSQL.
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~5 m cells
+MAX_COVERING_CELLS = 9
+KM_PER_DEGREE = 111.195
+EARTH_RADIUS_KM = 6371.0
+
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 500
+
+_tracked = []
+
+def parse_coordinates(value):
+    """Parse a "lat,lng" string into a (lat, lng) float pair, or None if invalid"""
+    if not value:
+        return None
+    try:
+        lat, lng = (float(part) for part in str(value).split(','))
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+def _bits(precision):
+    """Latitude and longitude bits in a geohash of `precision` characters"""
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+def geohash(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    code, bits, value, even = [], 0, 0, True
+    while len(code) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            code.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(code)
+
+def bounding_box(origin, radius_km):
+    """(south, west, north, east) of the box enclosing a circle around origin"""
+    lat, lng = origin
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return max(lat - lat_delta, -90), max(lng - lng_delta, -180), min(lat + lat_delta, 90), min(lng + lng_delta, 180)
+
+def covering_cells(south, west, north, east):
+    """Geohash prefixes of the finest grid that covers the box in at most MAX_COVERING_CELLS cells"""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_bits, lng_bits = _bits(precision)
+        lat_step, lng_step = 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+        rows = range(int((south + 90) // lat_step), int(min(north + 90, 179.999999) // lat_step) + 1)
+        columns = range(int((west + 180) // lng_step), int(min(east + 180, 359.999999) // lng_step) + 1)
+        if len(rows) * len(columns) <= MAX_COVERING_CELLS:
+            return sorted({
+                geohash((row + 0.5) * lat_step - 90, (column + 0.5) * lng_step - 180, precision)
+                for row in rows for column in columns
+            })
+    return ['']
+
+def distance_km(origin, target):
+    """Great-circle (haversine) distance between two (lat, lng) pairs"""
+    lat1, lng1 = map(math.radians, origin)
+    lat2, lng2 = map(math.radians, target)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def track_coordinates(model):
+    """Fill `model`'s latitude, longitude and geohash columns from location_coordinates on write"""
+    _tracked.append(model)
+
+    def before_insert(mapper, connection, target):
+        _apply_coordinates(target)
+
+    def before_update(mapper, connection, target):
+        if inspect(target).attrs.location_coordinates.history.has_changes():
+            _apply_coordinates(target)
+
+    event.listen(model, 'before_insert', before_insert)
+    event.listen(model, 'before_update', before_update)
+
+def _apply_coordinates(target):
+    point = parse_coordinates(target.location_coordinates)
+    if point is None:
+        target.latitude = target.longitude = target.geohash = None
+    else:
+        target.latitude, target.longitude = point
+        target.geohash = geohash(*point)
+
+def within_radius(query, model, origin, radius_km):
+    """Restrict `query` to `model` rows within radius_km of origin, nearest first"""
+    lat, lng = origin
+    south, west, north, east = bounding_box(origin, radius_km)
+    # Equirectangular approximation; accurate to well under 1% at these radii
+    lng_scale = math.cos(math.radians(lat))
+    squared_km = (
+        ((model.latitude - lat) * KM_PER_DEGREE) * ((model.latitude - lat) * KM_PER_DEGREE)
+        + ((model.longitude - lng) * (KM_PER_DEGREE * lng_scale)) * ((model.longitude - lng) * (KM_PER_DEGREE * lng_scale))
+    )
+    cells = [
+        and_(model.geohash >= cell, model.geohash < cell + '~')
+        for cell in covering_cells(south, west, north, east)
+    ]
+    return query.filter(
+        or_(*cells),
+        model.latitude.between(south, north),
+        model.longitude.between(west, east),
+        squared_km <= radius_km * radius_km
+    ).order_by(squared_km)
+
+def parse_radius(args):
+    """radius_km= from request args, clamped to [0, MAX_RADIUS_KM]; raises ValueError for nan and inf"""
+    radius_km = args.get('radius_km', DEFAULT_RADIUS_KM, type=float)
+    if not math.isfinite(radius_km):
+        raise ValueError('radius_km must be a finite number')
+    return min(max(radius_km, 0), MAX_RADIUS_KM)
+
+def near_arguments(args):
+    """Read near=lat,lng and radius_km= from request args.
+
+    Returns (origin, radius_km), with origin None when near is absent.
+    Raises ValueError for a malformed point or radius.
+    """
+    near = args.get('near')
+    if not near:
+        return None, None
+    origin = parse_coordinates(near)
+    if origin is None:
+        raise ValueError('near must be "lat,lng"')
+    return origin, parse_radius(args)
+
+def to_dicts_near(rows, origin):
+    """to_dict() of each row, plus distance_km when a near= origin was given"""
+    results = []
+    for row in rows:
+        data = row.to_dict()
+        if origin is not None and row.latitude is not None:
+            data['distance_km'] = round(distance_km(origin, (row.latitude, row.longitude)), 2)
+        results.append(data)
+    return results
+
+def add_distances(items, rows, origin):
+    """Set distance_km on serialized `items` from the latitude and longitude of their `rows`"""
+    if origin is not None:
+        for data, row in zip(items, rows):
+            if row.latitude is not None:
+                data['distance_km'] = round(distance_km(origin, (row.latitude, row.longitude)), 2)
+    return items
+
+def reindex_coordinates(batch_size=500):
+    """Re-parse location_coordinates for every tracked table"""
+    counts = []
+    for model in _tracked:
+        updated = 0
+        for target in model.query.order_by(model.id).yield_per(batch_size):
+            _apply_coordinates(target)
+            updated += 1
+        db.session.flush()
+        counts.append((model.__tablename__, updated))
+    db.session.commit()
+    return counts
@@ -1,5 +1,24 @@
+from sqlalchemy import case, event
 from src.models.user import db
-from datetime import datetime
+from src.models.counters import maintain_count
+from src.models.geo import track_coordinates, within_radius
+from src.serializers import Derived, RowSerializer, full_name
+from datetime import datetime, timedelta
+
+# Minimum gap between whole-blood donations
+DONATION_INTERVAL_DAYS = 90
+
+# Recipient blood group -> donor groups whose red cells it can receive
+COMPATIBLE_DONOR_GROUPS = {
+    'O-': ['O-'],
+    'O+': ['O+', 'O-'],
+    'A-': ['A-', 'O-'],
+    'A+': ['A+', 'A-', 'O+', 'O-'],
+    'B-': ['B-', 'O-'],
+    'B+': ['B+', 'B-', 'O+', 'O-'],
+    'AB-': ['AB-', 'A-', 'B-', 'O-'],
+    'AB+': ['AB+', 'AB-', 'A+', 'A-', 'B+', 'B-', 'O+', 'O-'],
+}
 
 class HealthcareProvider(db.Model):
     __tablename__ = 'healthcare_providers'
@@ -31,12 +50,12 @@ class HealthcareProvider(db.Model):
             'specialization': self.specialization,
             'qualifications': self.qualifications,
             'experience_years': self.experience_years,
-            'consultation_fee': float(self.consultation_fee) if self.consultation_fee else None,
+            'consultation_fee': self.consultation_fee,
             'availability_schedule': self.availability_schedule,
             'is_verified': self.is_verified,
             'verified_by': self.verified_by,
-            'verified_at': self.verified_at.isoformat() if self.verified_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'verified_at': self.verified_at,
+            'created_at': self.created_at
         }
 
 class Patient(db.Model):
@@ -67,14 +86,14 @@ class Patient(db.Model):
             'user_name': self.user.full_name if self.user else None,
             'blood_group': self.blood_group,
             'height_cm': self.height_cm,
-            'weight_kg': float(self.weight_kg) if self.weight_kg else None,
+            'weight_kg': self.weight_kg,
             'allergies': self.allergies,
             'chronic_conditions': self.chronic_conditions,
             'emergency_contact_name': self.emergency_contact_name,
             'emergency_contact_phone': self.emergency_contact_phone,
             'insurance_info': self.insurance_info,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Consultation(db.Model):
@@ -104,17 +123,17 @@ class Consultation(db.Model):
             'provider_id': self.provider_id,
             'provider_name': self.provider.user.full_name if self.provider and self.provider.user else None,
             'consultation_type': self.consultation_type,
-            'appointment_date': self.appointment_date.isoformat() if self.appointment_date else None,
+            'appointment_date': self.appointment_date,
             'status': self.status,
             'symptoms': self.symptoms,
             'diagnosis': self.diagnosis,
             'prescription': self.prescription,
-            'follow_up_date': self.follow_up_date.isoformat() if self.follow_up_date else None,
-            'consultation_fee': float(self.consultation_fee) if self.consultation_fee else None,
+            'follow_up_date': self.follow_up_date,
+            'consultation_fee': self.consultation_fee,
             'payment_status': self.payment_status,
             'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class MedicalRecord(db.Model):
@@ -144,7 +163,7 @@ class MedicalRecord(db.Model):
             'attachments': self.attachments,
             'created_by': self.created_by,
             'creator_name': self.creator.full_name if self.creator else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class MedicalCamp(db.Model):
@@ -155,11 +174,15 @@ class MedicalCamp(db.Model):
     description = db.Column(db.Text)
     location_address = db.Column(db.Text)
     location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
     services_offered = db.Column(db.JSON)  # Array of services
     organizer_id = db.Column(db.String(36), db.ForeignKey('users.id'))
     capacity = db.Column(db.Integer)
+    registration_count = db.Column(db.Integer, default=0)  # maintained from registrations
     registration_fee = db.Column(db.Numeric(8, 2), default=0)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -168,10 +191,6 @@ class MedicalCamp(db.Model):
     organizer = db.relationship('User', backref='organized_medical_camps')
     registrations = db.relationship('CampRegistration', backref='camp', cascade='all, delete-orphan')
     
-    @property
-    def registration_count(self):
-        return len(self.registrations)
-    
     @property
     def is_registration_open(self):
         if self.capacity and self.registration_count >= self.capacity:
@@ -187,17 +206,17 @@ class MedicalCamp(db.Model):
             'description': self.description,
             'location_address': self.location_address,
             'location_coordinates': self.location_coordinates,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
             'services_offered': self.services_offered,
             'organizer_id': self.organizer_id,
             'organizer_name': self.organizer.full_name if self.organizer else None,
             'capacity': self.capacity,
             'registration_count': self.registration_count,
-            'registration_fee': float(self.registration_fee) if self.registration_fee else 0,
+            'registration_fee': self.registration_fee or 0,
             'is_active': self.is_active,
             'is_registration_open': self.is_registration_open,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class CampRegistration(db.Model):
@@ -221,7 +240,7 @@ class CampRegistration(db.Model):
             'camp_name': self.camp.name if self.camp else None,
             'patient_id': self.patient_id,
             'patient_name': self.patient.user.full_name if self.patient and self.patient.user else None,
-            'registration_date': self.registration_date.isoformat() if self.registration_date else None,
+            'registration_date': self.registration_date,
             'services_requested': self.services_requested,
             'special_requirements': self.special_requirements,
             'attendance_status': self.attendance_status
@@ -229,13 +248,21 @@ class CampRegistration(db.Model):
 
 class BloodDonor(db.Model):
     __tablename__ = 'blood_donors'
+    __table_args__ = (
+        db.Index('ix_blood_donors_matching', 'blood_group', 'is_available', 'next_eligible_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), unique=True, nullable=False)
     blood_group = db.Column(db.String(5), nullable=False)
     last_donation_date = db.Column(db.Date)
+    next_eligible_date = db.Column(db.Date)  # derived from last_donation_date on write
     health_status = db.Column(db.String(20), default='eligible')  # eligible, ineligible, temporary_defer
     medical_conditions = db.Column(db.JSON)  # Array of conditions
+    location_coordinates = db.Column(db.String(100))  # "lat,lng" format
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     is_available = db.Column(db.Boolean, default=True)
     total_donations = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -246,13 +273,21 @@ class BloodDonor(db.Model):
     
     @property
     def can_donate(self):
-        if not self.is_available or self.health_status != 'eligible':
-            return False
-        if self.last_donation_date:
-            # Check if 3 months have passed since last donation
-            from datetime import timedelta
-            return (datetime.utcnow().date() - self.last_donation_date) >= timedelta(days=90)
-        return True
+        return _can_donate(self.is_available, self.health_status, self.next_eligible_date, self.last_donation_date)
+    
+    # to_dict() for rows of a Core select(), used by the donor search
+    row_serializer = RowSerializer(
+        columns=('id', 'user_id', 'blood_group', 'last_donation_date', 'next_eligible_date', 'health_status',
+                 'medical_conditions', 'location_coordinates', 'is_available', 'total_donations', 'created_at',
+                 'updated_at'),
+        computed={
+            'user_name': Derived(full_name, 'user.first_name', 'user.last_name'),
+            'can_donate': Derived(
+                lambda *values: _can_donate(*values),
+                'is_available', 'health_status', 'next_eligible_date', 'last_donation_date'
+            )
+        }
+    )
     
     def to_dict(self):
         return {
@@ -260,14 +295,16 @@ class BloodDonor(db.Model):
             'user_id': self.user_id,
             'user_name': self.user.full_name if self.user else None,
             'blood_group': self.blood_group,
-            'last_donation_date': self.last_donation_date.isoformat() if self.last_donation_date else None,
+            'last_donation_date': self.last_donation_date,
+            'next_eligible_date': self.next_eligible_date,
             'health_status': self.health_status,
             'medical_conditions': self.medical_conditions,
+            'location_coordinates': self.location_coordinates,
             'is_available': self.is_available,
             'can_donate': self.can_donate,
             'total_donations': self.total_donations,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class BloodInventory(db.Model):
@@ -291,10 +328,10 @@ class BloodInventory(db.Model):
             'id': self.id,
             'blood_group': self.blood_group,
             'units_available': self.units_available,
-            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
+            'expiry_date': self.expiry_date,
             'blood_bank_location': self.blood_bank_location,
             'is_expired': self.is_expired,
-            'last_updated': self.last_updated.isoformat() if self.last_updated else None
+            'last_updated': self.last_updated
         }
 
 class BloodRequest(db.Model):
@@ -308,6 +345,10 @@ class BloodRequest(db.Model):
     urgency_level = db.Column(db.String(20))  # low, medium, high, critical
     hospital_name = db.Column(db.String(255))
     hospital_address = db.Column(db.Text)
+    location_coordinates = db.Column(db.String(100))  # "lat,lng" format of the hospital
+    latitude = db.Column(db.Float)  # parsed from location_coordinates
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     contact_phone = db.Column(db.String(20))
     needed_by_date = db.Column(db.Date)
     status = db.Column(db.String(20), default='active')  # active, fulfilled, cancelled
@@ -321,6 +362,26 @@ class BloodRequest(db.Model):
     def is_urgent(self):
         return self.urgency_level in ['high', 'critical']
     
+    def matching_donors(self, origin=None, radius_km=None, limit=20):
+        """Donors who can give to this request today, best match first.
+        
+        Compatible groups, availability and next_eligible_date are all
+        answered by ix_blood_donors_matching. With an origin the search is
+        limited to radius_km and ranked by distance; otherwise exact group
+        matches come first, then the donors who have rested longest.
+        """
+        groups = COMPATIBLE_DONOR_GROUPS.get(self.blood_group, [self.blood_group])
+        query = BloodDonor.query.filter(
+            BloodDonor.blood_group.in_(groups),
+            BloodDonor.is_available.is_(True),
+            BloodDonor.next_eligible_date <= datetime.utcnow().date(),
+            BloodDonor.health_status == 'eligible'
+        )
+        if origin is not None:
+            query = within_radius(query, BloodDonor, origin, radius_km)
+        exact_group_first = case((BloodDonor.blood_group == self.blood_group, 0), else_=1)
+        return query.order_by(exact_group_first, BloodDonor.next_eligible_date, BloodDonor.id).limit(limit).all()
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -333,10 +394,41 @@ class BloodRequest(db.Model):
             'is_urgent': self.is_urgent,
             'hospital_name': self.hospital_name,
             'hospital_address': self.hospital_address,
+            'location_coordinates': self.location_coordinates,
             'contact_phone': self.contact_phone,
-            'needed_by_date': self.needed_by_date.isoformat() if self.needed_by_date else None,
+            'needed_by_date': self.needed_by_date,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
+maintain_count(MedicalCamp.registration_count, CampRegistration.camp_id)
+
+track_coordinates(MedicalCamp)
+track_coordinates(BloodDonor)
+track_coordinates(BloodRequest)
+
+def _next_eligible_date(last_donation_date):
+    if last_donation_date is None:
+        return datetime.utcnow().date()
+    return last_donation_date + timedelta(days=DONATION_INTERVAL_DAYS)
+
+def _can_donate(is_available, health_status, next_eligible_date, last_donation_date):
+    if not is_available or health_status != 'eligible':
+        return False
+    return (next_eligible_date or _next_eligible_date(last_donation_date)) <= datetime.utcnow().date()
+
+@event.listens_for(BloodDonor, 'before_insert')
+@event.listens_for(BloodDonor, 'before_update')
+def _update_next_eligible_date(mapper, connection, target):
+    if target.next_eligible_date is None or target.last_donation_date is not None:
+        target.next_eligible_date = _next_eligible_date(target.last_donation_date)
+
+def refresh_donor_eligibility(batch_size=500):
+    """Recompute next_eligible_date for donors written before it was maintained"""
+    updated = 0
+    for donor in BloodDonor.query.filter(BloodDonor.next_eligible_date.is_(None)).yield_per(batch_size):
+        donor.next_eligible_date = _next_eligible_date(donor.last_donation_date)
+        updated += 1
+    db.session.commit()
+    return updated
@@ -0,0 +1,20 @@
+from datetime import datetime
+from src.models.user import db
+
+# Bump when tables or columns change, so deployments can tell that
+# `flask init-db` (or a migration) is due
+SCHEMA_VERSION = 2  # 2: databases stamped before init-db added missing columns
+
+class AppMeta(db.Model):
+    """Facts about the database itself: schema_version, seed_version"""
+    __tablename__ = 'app_meta'
+    
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.String(255), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+def get_meta(key):
+    return db.session.query(AppMeta.value).filter(AppMeta.key == key).scalar()
+
+def set_meta(key, value):
+    db.session.merge(AppMeta(key=key, value=str(value)))
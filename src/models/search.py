@@ -0,0 +1,244 @@
+from datetime import datetime
+from sqlalchemy import case, event, func, inspect, select
+from src.models.user import db
+from src.models.tokenizer import LOCATION_MARK, MAX_TERM_LENGTH, index_terms, query_terms
+
+# =============================================
+# SEARCH INDEX MODELS
+# =============================================
+
+class SearchDocument(db.Model):
+    __tablename__ = 'search_documents'
+    __table_args__ = (db.UniqueConstraint('doc_type', 'doc_id', name='uq_search_documents_doc'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    doc_type = db.Column(db.String(50), nullable=False)  # course, job, product, event, volunteer, project, forum_post
+    doc_id = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(50), index=True)  # education, business, agriculture, community, projects
+    title = db.Column(db.String(255))
+    summary = db.Column(db.Text)
+    url = db.Column(db.String(255))
+    is_visible = db.Column(db.Boolean, default=True)
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'type': self.doc_type,
+            'id': self.doc_id,
+            'category': self.category,
+            'title': self.title,
+            'description': self.summary,
+            'url': self.url
+        }
+
+class SearchTerm(db.Model):
+    __tablename__ = 'search_terms'
+    __table_args__ = (db.Index('ix_search_terms_term_document', 'term', 'document_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(MAX_TERM_LENGTH), nullable=False)
+    document_id = db.Column(db.Integer, db.ForeignKey('search_documents.id', ondelete='CASCADE'), nullable=False, index=True)
+    weight = db.Column(db.Float, default=1.0)
+
+# =============================================
+# INDEXING
+# =============================================
+
+SUMMARY_LENGTH = 200
+
+# doc_type -> SearchSpec, filled in by register_search() from the model modules
+_specs = {}
+
+class SearchSpec:
+    def __init__(self, model, doc_type, category, fields, url, visible, location=None):
+        self.model = model
+        self.doc_type = doc_type
+        self.category = category
+        self.fields = fields
+        self.url = url
+        self.visible = visible
+        self.location = location
+    
+    def document_values(self, target):
+        title = getattr(target, 'title', None)
+        summary = getattr(target, 'description', None) or getattr(target, 'content', None)
+        return {
+            'doc_type': self.doc_type,
+            'doc_id': target.id,
+            'category': self.category,
+            'title': title[:255] if title else None,
+            'summary': summary[:SUMMARY_LENGTH] if summary else None,
+            'url': self.url.format(id=target.id),
+            'is_visible': bool(self.visible(target)),
+            'indexed_at': datetime.utcnow()
+        }
+    
+    def term_weights(self, target):
+        weights = {}
+        for field, weight in self.fields.items():
+            for term, share in index_terms(getattr(target, field, None)).items():
+                weights[term] = weights.get(term, 0) + weight * share
+        if self.location:
+            # Location terms live in their own namespace so ?location= only matches addresses
+            for term, share in index_terms(getattr(target, self.location, None), LOCATION_MARK).items():
+                weights[term] = weights.get(term, 0) + share
+        return weights
+    
+    def watched_attributes(self):
+        location = [self.location] if self.location else []
+        return list(self.fields) + location + list(getattr(self.visible, 'attributes', ()))
+
+def visible_when(*attributes, check=None):
+    """Visibility rule for register_search(); `attributes` trigger a reindex when changed"""
+    def visible(target):
+        if check is not None:
+            return check(target)
+        return all(getattr(target, attribute) for attribute in attributes)
+    visible.attributes = attributes
+    return visible
+
+def register_search(model, doc_type, category, fields, url, visible=None, location=None):
+    """Index `model` rows into the search tables as they are inserted, updated and deleted.
+    
+    `fields` maps attribute names to the weight their terms contribute to a
+    document's score; `location` names the address attribute that
+    matching_ids(..., location=True) filters on. The index rows are written on
+    the same connection as the model row, so they commit or roll back together.
+    """
+    spec = SearchSpec(model, doc_type, category, fields, url, visible or visible_when(), location)
+    _specs[doc_type] = spec
+    
+    def after_insert(mapper, connection, target):
+        _write_document(connection, spec, target)
+    
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[key].history.has_changes() for key in spec.watched_attributes()):
+            _write_document(connection, spec, target)
+    
+    def after_delete(mapper, connection, target):
+        _delete_document(connection, spec, target.id)
+    
+    event.listen(model, 'after_insert', after_insert)
+    event.listen(model, 'after_update', after_update)
+    event.listen(model, 'after_delete', after_delete)
+
+def _write_document(connection, spec, target):
+    documents = SearchDocument.__table__
+    terms = SearchTerm.__table__
+    values = spec.document_values(target)
+    
+    document_id = connection.execute(
+        select(documents.c.id).where(documents.c.doc_type == spec.doc_type, documents.c.doc_id == target.id)
+    ).scalar()
+    if document_id is None:
+        document_id = connection.execute(documents.insert().values(values)).inserted_primary_key[0]
+    else:
+        connection.execute(documents.update().where(documents.c.id == document_id).values(values))
+        connection.execute(terms.delete().where(terms.c.document_id == document_id))
+    
+    rows = [
+        {'term': term, 'document_id': document_id, 'weight': weight}
+        for term, weight in spec.term_weights(target).items()
+    ]
+    if rows:
+        connection.execute(terms.insert(), rows)
+
+def _delete_document(connection, spec, doc_id):
+    documents = SearchDocument.__table__
+    terms = SearchTerm.__table__
+    document_ids = select(documents.c.id).where(documents.c.doc_type == spec.doc_type, documents.c.doc_id == doc_id)
+    connection.execute(terms.delete().where(terms.c.document_id.in_(document_ids)))
+    connection.execute(documents.delete().where(documents.c.doc_type == spec.doc_type, documents.c.doc_id == doc_id))
+
+def reindex_search(batch_size=500):
+    """Rebuild the whole search index from the source tables"""
+    counts = []
+    connection = db.session.connection()
+    connection.execute(SearchTerm.__table__.delete())
+    connection.execute(SearchDocument.__table__.delete())
+    
+    for doc_type, spec in _specs.items():
+        indexed = 0
+        query = spec.model.query.order_by(spec.model.id)
+        for target in query.yield_per(batch_size):
+            _write_document(connection, spec, target)
+            indexed += 1
+        counts.append((doc_type, indexed))
+    
+    db.session.commit()
+    return counts
+
+# =============================================
+# QUERYING
+# =============================================
+
+def _matched_words(alternatives):
+    """COUNT(DISTINCT ...) of the query words a document's matching terms cover"""
+    return func.count(case(
+        *[(SearchTerm.term.in_(terms), position) for position, terms in enumerate(alternatives)]
+    ).distinct())
+
+def _all_terms(alternatives):
+    return list(dict.fromkeys(term for terms in alternatives for term in terms))
+
+def search_documents(text, category=None, page=1, per_page=20):
+    """Ranked lookup of visible documents matching any word of `text`.
+    
+    Query words match by exact stem, sound key or prefix (see
+    src.models.tokenizer). Documents matching more query words rank first,
+    then by summed term weight, so exact spellings outrank transliterated and
+    partial ones. Returns (documents, total); each document carries `.score`.
+    """
+    alternatives = query_terms(text)
+    if not alternatives:
+        return [], 0
+    
+    matched = _matched_words(alternatives)
+    score = func.sum(SearchTerm.weight)
+    ranked = (
+        db.session.query(SearchTerm.document_id, matched.label('matched'), score.label('score'))
+        .join(SearchDocument, SearchDocument.id == SearchTerm.document_id)
+        .filter(SearchTerm.term.in_(_all_terms(alternatives)), SearchDocument.is_visible.is_(True))
+        .group_by(SearchTerm.document_id)
+    )
+    if category:
+        ranked = ranked.filter(SearchDocument.category == category)
+    
+    total = ranked.order_by(None).count()
+    rows = (
+        ranked.order_by(matched.desc(), score.desc(), SearchTerm.document_id.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
+    
+    documents = {document.id: document for document in SearchDocument.query.filter(
+        SearchDocument.id.in_([row.document_id for row in rows])
+    )}
+    results = []
+    for row in rows:
+        document = documents[row.document_id]
+        document.score = row.score
+        results.append(document)
+    return results, total
+
+def matching_ids(model, text, location=False):
+    """Subquery of `model` ids whose indexed fields match every word of `text`.
+    
+    Words match by exact stem or prefix only; sound keys are too coarse for a
+    hard filter. With location=True only the registered location attribute is
+    searched. For use in list endpoints:
+    query.filter(Model.id.in_(matching_ids(Model, search)))
+    """
+    spec = next(spec for spec in _specs.values() if spec.model is model)
+    alternatives = query_terms(text, LOCATION_MARK if location else '', sound_keys=False)
+    if not alternatives:
+        return select(model.id)
+    return (
+        select(SearchDocument.doc_id)
+        .join(SearchTerm, SearchTerm.document_id == SearchDocument.id)
+        .where(SearchDocument.doc_type == spec.doc_type, SearchTerm.term.in_(_all_terms(alternatives)))
+        .group_by(SearchDocument.doc_id)
+        .having(_matched_words(alternatives) == len(alternatives))
+    )
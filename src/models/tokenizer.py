@@ -0,0 +1,181 @@
+import re
+import unicodedata
+
+# =============================================
+# TEXT NORMALIZATION FOR THE SEARCH INDEX
+# =============================================
+#
+# Every word is reduced to a few index terms:
+#   stem      normalized, lightly stemmed word ("ঢাকা", "course")
+#   ~key      script-independent sound key, shared by Bangla script and
+#             Banglish spellings ("ঢাকা", "dhaka" and "daka" all give "~dk")
+#   ^prefix   leading n-grams of the stem, so partial words still match
+# Location words get the same terms in an "@" namespace.
+
+MAX_TERM_LENGTH = 64
+MIN_PREFIX = 3
+MAX_PREFIX = 10
+
+KEY_MARK = '~'
+PREFIX_MARK = '^'
+LOCATION_MARK = '@'
+
+# Relative weight of each variant against the field weight
+STEM_WEIGHT = 1.0
+KEY_WEIGHT = 0.5
+PREFIX_WEIGHT = 0.25
+
+BANGLA_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+ZERO_WIDTH = dict.fromkeys(map(ord, '\u200c\u200d\ufeff'))
+
+# Bangla letters and signs belong to words even where str.isalnum() says no
+WORD_PATTERN = re.compile(r'[\w\u0980-\u09ff]+')
+
+BANGLA_LETTERS = {
+    # independent vowels
+    'অ': 'o', 'আ': 'a', 'ই': 'i', 'ঈ': 'i', 'উ': 'u', 'ঊ': 'u', 'ঋ': 'ri',
+    'এ': 'e', 'ঐ': 'oi', 'ও': 'o', 'ঔ': 'ou',
+    # vowel signs
+    'া': 'a', 'ি': 'i', 'ী': 'i', 'ু': 'u', 'ূ': 'u', 'ৃ': 'ri',
+    'ে': 'e', 'ৈ': 'oi', 'ো': 'o', 'ৌ': 'ou',
+    # consonants
+    'ক': 'k', 'খ': 'kh', 'গ': 'g', 'ঘ': 'gh', 'ঙ': 'ng',
+    'চ': 'ch', 'ছ': 'chh', 'জ': 'j', 'ঝ': 'jh', 'ঞ': 'n',
+    'ট': 't', 'ঠ': 'th', 'ড': 'd', 'ঢ': 'dh', 'ণ': 'n',
+    'ত': 't', 'থ': 'th', 'দ': 'd', 'ধ': 'dh', 'ন': 'n',
+    'প': 'p', 'ফ': 'ph', 'ব': 'b', 'ভ': 'bh', 'ম': 'm',
+    'য': 'j', 'র': 'r', 'ল': 'l', 'শ': 'sh', 'ষ': 'sh', 'স': 's', 'হ': 'h',
+    '\u09dc': 'r', '\u09dd': 'rh', '\u09df': 'y', 'ৎ': 't',  # ড় ঢ় য়
+    # modifiers
+    'ং': 'ng', 'ঃ': 'h', 'ঁ': '', '্': '',
+}
+
+# NFC keeps ড়, ঢ় and য় decomposed as letter + nukta
+NUKTA_FORMS = {'\u09a1\u09bc': '\u09dc', '\u09a2\u09bc': '\u09dd', '\u09af\u09bc': '\u09df'}
+
+# Inflections dropped from the end of Bangla words, longest first
+BANGLA_SUFFIXES = sorted([
+    'গুলোতে', 'গুলোর', 'গুলো', 'গুলি', 'গুলির', 'দেরকে', 'দের', 'েরা', 'রা',
+    'টির', 'টার', 'টি', 'টা', 'খানা', 'কে', 'তে', 'েতে', 'য়ে', 'ের', 'র', 'ে',
+], key=len, reverse=True)
+
+# Spelling variants folded together before vowels are dropped from a key
+SOUND_FOLDS = [
+    ('chh', 'c'), ('ch', 'c'), ('sh', 's'), ('ph', 'f'), ('bh', 'b'), ('kh', 'k'),
+    ('gh', 'g'), ('jh', 'j'), ('th', 't'), ('dh', 'd'), ('rh', 'r'),
+    ('v', 'b'), ('w', 'o'), ('z', 'j'), ('q', 'k'), ('x', 'ks'), ('ck', 'k'),
+]
+VOWELS = set('aeiouy')
+
+def is_bangla(word):
+    return any('\u0980' <= char <= '\u09ff' for char in word)
+
+def normalize(text):
+    """Case-fold, unify Unicode forms and digits, and strip Latin accents"""
+    text = str(text).translate(ZERO_WIDTH).translate(BANGLA_DIGITS).casefold()
+    if text.isascii():
+        return text
+    # Accents only come off Latin letters; Bangla vowel signs are combining marks too
+    stripped = []
+    for char in unicodedata.normalize('NFD', text):
+        if unicodedata.combining(char) and stripped and stripped[-1].isascii():
+            continue
+        stripped.append(char)
+    text = unicodedata.normalize('NFC', ''.join(stripped))
+    for decomposed, letter in NUKTA_FORMS.items():
+        text = text.replace(decomposed, letter)
+    return text
+
+def words(text):
+    return WORD_PATTERN.findall(normalize(text))
+
+def stem(word):
+    """Strip common inflections, keeping at least three characters of the word"""
+    if is_bangla(word):
+        for suffix in BANGLA_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                return word[:-len(suffix)]
+        return word
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('oes', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+def romanize(word):
+    """Transliterate Bangla script to Latin letters; Latin words pass through"""
+    if not is_bangla(word):
+        return word
+    # Jo-fola (hasanta + য) lengthens the consonant rather than adding a "j"
+    word = word.replace('\u09cd\u09af', 'y')
+    return ''.join(BANGLA_LETTERS.get(char, char) for char in word)
+
+def sound_key(word):
+    """Consonant skeleton of a word, the same for Bangla script and Banglish spellings.
+
+    Aspirates and common spelling variants are folded, doubled letters
+    collapsed and vowels dropped after the first letter, so "ঢাকা", "dhaka"
+    and "dhakka" all give "dk". Returns None when too little is left.
+    """
+    latin = romanize(word)
+    if not latin.isascii() or not latin.isalpha():
+        return None
+    for variant, folded in SOUND_FOLDS:
+        latin = latin.replace(variant, folded)
+    key = latin[0] if latin[0] not in VOWELS else 'a'
+    for char in latin[1:]:
+        if char in VOWELS or char == 'h' or char == key[-1]:
+            continue
+        key += char
+    return key if len(key) >= 2 else None
+
+def word_terms(word):
+    """Index terms for one word as (term, relative weight) pairs"""
+    stemmed = stem(word)
+    if len(stemmed) < 2 and not stemmed.isdigit():
+        return []
+    terms = [(stemmed, STEM_WEIGHT)]
+    key = sound_key(stemmed)
+    if key:
+        terms.append((KEY_MARK + key, KEY_WEIGHT))
+    for length in range(MIN_PREFIX, min(len(stemmed), MAX_PREFIX + 1)):
+        terms.append((PREFIX_MARK + stemmed[:length], PREFIX_WEIGHT))
+    return terms
+
+def index_terms(value, namespace=''):
+    """All index terms of a field value (text or a JSON list of strings) with relative weights"""
+    if not value:
+        return {}
+    if isinstance(value, (list, tuple)):
+        value = ' '.join(str(item) for item in value)
+    weights = {}
+    for word in words(value):
+        for term, weight in word_terms(word):
+            term = (namespace + term)[:MAX_TERM_LENGTH]
+            weights[term] = max(weights.get(term, 0), weight)
+    return weights
+
+def query_terms(text, namespace='', sound_keys=True):
+    """Alternative index terms per distinct query word.
+
+    A word matches a document when any of its alternatives does: the exact
+    stem, its sound key, or (for a partial word) the stem as an indexed prefix.
+    Sound keys are short enough to collide ("dhaka" and "dock" both give "~dk"),
+    so filters leave them out with sound_keys=False and only ranked search,
+    where they weigh less than a real match, uses them.
+    """
+    alternatives = {}
+    for word in words(text):
+        stemmed = stem(word)
+        if len(stemmed) < 2 and not stemmed.isdigit():
+            continue
+        terms = [stemmed]
+        key = sound_key(stemmed) if sound_keys else None
+        if key:
+            terms.append(KEY_MARK + key)
+        if MIN_PREFIX <= len(stemmed) <= MAX_PREFIX:
+            terms.append(PREFIX_MARK + stemmed)
+        alternatives.setdefault(key or stemmed, [(namespace + term)[:MAX_TERM_LENGTH] for term in terms])
+    return list(alternatives.values())
@@ -0,0 +1,63 @@
+from src.models.user import db
+from datetime import datetime
+import uuid
+
+class UploadedFile(db.Model):
+    """One upload by one user; identical content shares a single stored blob"""
+    __tablename__ = 'uploaded_files'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255))
+    size = db.Column(db.BigInteger, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)  # names the blob in storage
+    purpose = db.Column(db.String(50), default='general')  # project_image, medical_record, ...
+    is_public = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def url(self):
+        """Stable URL for Project.images, LoanApplication.documents and the like"""
+        return f'/api/files/{self.id}'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'size': self.size,
+            'type': self.content_type,
+            'sha256': self.sha256,
+            'purpose': self.purpose,
+            'is_public': self.is_public,
+            'url': self.url,
+            'upload_date': self.created_at
+        }
+
+class UploadSession(db.Model):
+    """A resumable upload in progress; the bytes received so far live in a partial file"""
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255))
+    size = db.Column(db.BigInteger, nullable=False)
+    purpose = db.Column(db.String(50), default='general')
+    is_public = db.Column(db.Boolean, default=False)
+    file_id = db.Column(db.String(36), db.ForeignKey('uploaded_files.id'))  # set once complete
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    file = db.relationship('UploadedFile')
+
+    def to_dict(self, offset):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'size': self.size,
+            'offset': offset,
+            'upload_url': f'/api/uploads/{self.id}',
+            'expires_at': self.expires_at,
+            'file': self.file.to_dict() if self.file else None
+        }
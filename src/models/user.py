@@ -1,9 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import selectinload
 from datetime import datetime
+import hashlib
+import threading
+import time
 import uuid
+from src.cache import response_cache
+from src.engines import RoutingSession, reading_primary
+from src.passwords import PasswordHashingBusy, password_hasher
+from src.fieldsets import Computed, FieldSet
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Association tables for many-to-many relationships
 user_roles = db.Table('user_roles',
@@ -36,7 +44,7 @@ class Role(db.Model):
             'name': self.name,
             'description': self.description,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'permissions': [p.name for p in self.permissions]
         }
 
@@ -59,6 +67,9 @@ class Permission(db.Model):
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_created', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
@@ -79,6 +90,7 @@ class User(db.Model):
     email_verified_at = db.Column(db.DateTime)
     phone_verified_at = db.Column(db.DateTime)
     last_login_at = db.Column(db.DateTime)
+    authz_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # see _bump_authz_version
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -86,28 +98,57 @@ class User(db.Model):
     roles = db.relationship('Role', secondary=user_roles, backref='users')
     donor_profile = db.relationship('DonorProfile', backref='user', uselist=False, cascade='all, delete-orphan')
     volunteer_profile = db.relationship('VolunteerProfile', backref='user', uselist=False, cascade='all, delete-orphan')
-    beneficiary_profile = db.relationship('BeneficiaryProfile', backref='user', uselist=False, cascade='all, delete-orphan')
+    beneficiary_profile = db.relationship('BeneficiaryProfile', backref='user', uselist=False, cascade='all, delete-orphan',
+                                          foreign_keys='BeneficiaryProfile.user_id')
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password) 
+        """Check if provided password matches hash, upgrading a hash made with old parameters"""
+        if not password_hasher.verify(self.password_hash, password):
+            return False
+        if password_hasher.needs_rehash(self.password_hash):
+            try:
+                self.set_password(password)
+            except PasswordHashingBusy:
+                pass  # the password is right; the next login retries the upgrade
+        return True
+
     def has_role(self, role_name):
         return any(role.name == role_name for role in self.roles)
     
     def has_permission(self, permission_name):
-        for role in self.roles:
-            if any(perm.name == permission_name for perm in role.permissions):
-                return True
-        return False
+        permissions = role_permission_map()
+        return any(permission_name in permissions.get(role.id, ()) for role in self.roles)
+    
+    def permission_mask(self):
+        return permission_map().mask(self.roles)
     
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    @classmethod
+    def load_plan(cls):
+        """Loader options matching what to_dict() reads, for list queries"""
+        return [selectinload(cls.roles).load_only(Role.id, Role.name)]
+    
+    # What ?fields= may name on user lists; never credentials or authz_version
+    api_fields = FieldSet(
+        columns=('id', 'email', 'phone', 'first_name', 'last_name', 'date_of_birth', 'gender', 'address',
+                 'city', 'state', 'country', 'postal_code', 'profile_image_url', 'is_active', 'is_verified',
+                 'email_verified_at', 'phone_verified_at', 'last_login_at', 'created_at'),
+        computed={
+            'full_name': Computed(lambda user: user.full_name, ['first_name', 'last_name']),
+            'roles': Computed(
+                lambda user: [role.name for role in user.roles], (),
+                lambda: [selectinload(User.roles).load_only(Role.id, Role.name)]
+            )
+        }
+    )
+    
     def to_dict(self, include_sensitive=False):
         data = {
             'id': self.id,
@@ -116,7 +157,7 @@ class User(db.Model):
             'first_name': self.first_name,
             'last_name': self.last_name,
             'full_name': self.full_name,
-            'date_of_birth': self.date_of_birth.isoformat() if self.date_of_birth else None,
+            'date_of_birth': self.date_of_birth,
             'gender': self.gender,
             'address': self.address,
             'city': self.city,
@@ -126,20 +167,99 @@ class User(db.Model):
             'profile_image_url': self.profile_image_url,
             'is_active': self.is_active,
             'is_verified': self.is_verified,
-            'email_verified_at': self.email_verified_at.isoformat() if self.email_verified_at else None,
-            'phone_verified_at': self.phone_verified_at.isoformat() if self.phone_verified_at else None,
-            'last_login_at': self.last_login_at.isoformat() if self.last_login_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'email_verified_at': self.email_verified_at,
+            'phone_verified_at': self.phone_verified_at,
+            'last_login_at': self.last_login_at,
+            'created_at': self.created_at,
             'roles': [role.name for role in self.roles]
         }
         
         if include_sensitive:
             data.update({
-                'updated_at': self.updated_at.isoformat() if self.updated_at else None
+                'updated_at': self.updated_at
             })
         
         return data
 
+# Columns needed for the *_name fields other models derive from a related user
+USER_NAME_FIELDS = (User.id, User.first_name, User.last_name)
+
+# =============================================
+# ROLE PERMISSIONS
+# =============================================
+#
+# Role grants change rarely and are read on almost every protected request,
+# so the whole role -> permission names map is held once per process and
+# rebuilt only when a committed write to roles or permissions bumps their
+# cache version. PERMISSION_MAP_TTL bounds how long a worker can miss a bump
+# made by another worker when the cache backend is not shared. The map is
+# loaded from the primary: it outlives the request, and a lagging replica
+# would keep a revoked grant alive for the whole TTL.
+#
+# Each permission also owns bit `id` of the permission mask carried in access
+# tokens, and the map's fingerprint tells whether a mask was computed against
+# the grants currently in force.
+
+PERMISSION_MAP_TTL = 60
+ROLE_TAGS = [response_cache.watch(Role), response_cache.watch(Permission)]
+
+class PermissionMap:
+    def __init__(self, rows):
+        names, self.bits = {}, {}
+        for role_id, permission_id, name in rows:
+            names.setdefault(role_id, set()).add(name)
+            self.bits[name] = 1 << permission_id
+        self.roles = {role_id: frozenset(permission_names) for role_id, permission_names in names.items()}
+        self.fingerprint = hashlib.sha1(repr(sorted(rows)).encode()).hexdigest()[:12]
+
+    def mask(self, roles):
+        """Bitmask of every permission granted by `roles`"""
+        mask = 0
+        for role in roles:
+            for name in self.roles.get(role.id, ()):
+                mask |= self.bits[name]
+        return mask
+
+_permission_map = (None, 0, None)  # (version, expires_at, PermissionMap), swapped whole
+_permission_map_lock = threading.Lock()
+
+def permission_map():
+    """The current PermissionMap, reloaded in one query when roles change"""
+    global _permission_map
+    version = tuple(response_cache.backend.get_versions(ROLE_TAGS))
+    cached_version, expires_at, current = _permission_map
+    if cached_version == version and expires_at > time.monotonic():
+        return current
+
+    with _permission_map_lock, reading_primary():
+        rows = db.session.query(role_permissions.c.role_id, Permission.id, Permission.name).join(
+            Permission, Permission.id == role_permissions.c.permission_id
+        ).all()
+        current = PermissionMap([tuple(row) for row in rows])
+        _permission_map = (version, time.monotonic() + PERMISSION_MAP_TTL, current)
+        return current
+
+def role_permission_map():
+    """Role id -> frozenset of permission names"""
+    return permission_map().roles
+
+# =============================================
+# AUTHORIZATION VERSION
+# =============================================
+#
+# users.authz_version goes up whenever a user's roles or active flag change,
+# which retires every access token issued with the old value. New values are
+# published to the session on flush and announced once the commit lands.
+
+PENDING_AUTHZ_VERSIONS = 'authz_versions'
+
+@event.listens_for(User, 'before_update')
+def _bump_authz_version(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.roles.history.has_changes() or state.attrs.is_active.history.has_changes():
+        target.authz_version = (target.authz_version or 0) + 1
+        state.session.info.setdefault(PENDING_AUTHZ_VERSIONS, {})[target.id] = target.authz_version
+
 class DonorProfile(db.Model):
     __tablename__ = 'donor_profiles'
     
@@ -164,9 +284,9 @@ class DonorProfile(db.Model):
             'tax_id': self.tax_id,
             'preferred_causes': self.preferred_causes,
             'donation_frequency': self.donation_frequency,
-            'total_donated': float(self.total_donated) if self.total_donated else 0,
+            'total_donated': self.total_donated or 0,
             'is_anonymous': self.is_anonymous,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class VolunteerProfile(db.Model):
@@ -199,7 +319,7 @@ class VolunteerProfile(db.Model):
             'emergency_contact_phone': self.emergency_contact_phone,
             'background_check_status': self.background_check_status,
             'total_hours_volunteered': self.total_hours_volunteered,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class BeneficiaryProfile(db.Model):
@@ -227,14 +347,14 @@ class BeneficiaryProfile(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'household_size': self.household_size,
-            'monthly_income': float(self.monthly_income) if self.monthly_income else None,
+            'monthly_income': self.monthly_income,
             'employment_status': self.employment_status,
             'education_level': self.education_level,
             'health_conditions': self.health_conditions,
             'assistance_needed': self.assistance_needed,
             'eligibility_verified': self.eligibility_verified,
             'verified_by': self.verified_by,
-            'verified_at': self.verified_at.isoformat() if self.verified_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'verified_at': self.verified_at,
+            'created_at': self.created_at
         }
 
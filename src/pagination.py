@@ -0,0 +1,210 @@
+import base64
+import json
+import math
+from datetime import date, datetime
+from flask import current_app, request
+from sqlalchemy import and_, false, literal, or_
+from sqlalchemy.sql import operators
+from src.cache import response_cache
+from src.engines import reading_primary
+from src.models.user import db
+
+# =============================================
+# LIST PAGINATION
+# =============================================
+#
+# List endpoints page either by offset (?page=, the default, with total and
+# pages) or, when the client sends ?cursor= (empty for the first page), by
+# keyset: the sort key of the last row is encoded in an opaque next_cursor
+# and the next page seeks past it with an index range instead of an OFFSET
+# scan, and no COUNT(*) is run.
+#
+# NULLs in nullable sort keys (created_at, is_pinned, start_datetime) are
+# sought where the database sorts them: below every value on SQLite and
+# MySQL, above on PostgreSQL.
+#
+# Offset pages report `total` according to a totals strategy, chosen by
+# ?totals=, else PAGINATION_TOTALS[endpoint], else PAGINATION_TOTALS_DEFAULT:
+#   exact      COUNT(*) on every request
+#   cached     COUNT(*) kept for PAGINATION_TOTALS_TTL seconds per filter
+#              signature, dropped as soon as the listed table is written
+#   estimate   the planner's row estimate (PostgreSQL); elsewhere as cached
+#   none       no total or pages, only has_more
+
+MAX_PER_PAGE = 100
+TOTALS_STRATEGIES = ('exact', 'cached', 'estimate', 'none')
+PAGING_ARGS = {'page', 'per_page', 'cursor', 'totals', 'fields', 'expand'}  # don't change which rows match
+
+class Page:
+    def __init__(self, items, meta):
+        self.items = items
+        self.meta = meta
+
+def paginate_list(query, ordering, page, per_page, seekable=True):
+    """Order `query` by `ordering` and return one Page of it.
+
+    `ordering` is a list of column.asc()/column.desc() clauses that must end
+    in a unique column (normally the primary key) so the order is total.
+    Pass seekable=False when the query is already ordered by something else
+    (e.g. distance), which leaves only offset paging. Raises ValueError for a
+    malformed or unsupported cursor.
+    """
+    per_page = max(per_page, 1)
+    query = query.order_by(*ordering)
+
+    if 'cursor' in request.args and not seekable:
+        raise ValueError('cursor pagination is not available for this ordering')
+
+    if 'cursor' not in request.args:
+        strategy = _totals_strategy()
+        page = max(page, 1)
+        rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+        items = rows[:per_page]
+        has_more = len(rows) > per_page
+        meta = {
+            'current_page': page,
+            'per_page': per_page,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(ordering, items[-1]) if has_more and seekable else None
+        }
+        if strategy != 'none':
+            total = _total(query, strategy)
+            meta['total'] = total
+            meta['pages'] = math.ceil(total / per_page)
+            if strategy == 'estimate':
+                meta['total_is_estimate'] = db.engine.dialect.name == 'postgresql'
+        return Page(items, meta)
+
+    per_page = min(per_page, MAX_PER_PAGE)
+    cursor = request.args.get('cursor')
+    rows = []
+    for clause in _seek(ordering, decode_cursor(ordering, cursor)) if cursor else [None]:
+        rows += (query if clause is None else query.filter(clause)).limit(per_page + 1 - len(rows)).all()
+        if len(rows) > per_page:
+            break
+    items = rows[:per_page]
+    return Page(items, {
+        'per_page': per_page,
+        'next_cursor': encode_cursor(ordering, items[-1]) if len(rows) > per_page else None
+    })
+
+def _totals_strategy():
+    strategy = request.args.get('totals') or current_app.config.get('PAGINATION_TOTALS', {}).get(
+        request.endpoint, current_app.config.get('PAGINATION_TOTALS_DEFAULT', 'exact')
+    )
+    if strategy not in TOTALS_STRATEGIES:
+        raise ValueError(f"totals must be one of {', '.join(TOTALS_STRATEGIES)}")
+    return strategy
+
+def _total(query, strategy):
+    count_query = query.order_by(None)
+    if strategy == 'exact':
+        return count_query.count()
+    if strategy == 'estimate' and db.engine.dialect.name == 'postgresql':
+        return _estimated_count(count_query)
+
+    model = query.column_descriptions[0]['entity']
+    tag = response_cache.watch(model)
+    version, = response_cache.backend.get_versions([tag])
+    key = 'total:{}:{}:{}'.format(
+        request.endpoint,
+        version,
+        '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)) if name not in PAGING_ARGS)
+    )
+    cached = response_cache.backend.get(key)
+    if cached is not None:
+        return int(cached)
+    with reading_primary():
+        total = count_query.count()
+    response_cache.backend.set(key, str(total).encode(), current_app.config.get('PAGINATION_TOTALS_TTL', 60))
+    return total
+
+def _estimated_count(query):
+    """Planner row estimate for `query` from PostgreSQL's table statistics"""
+    compiled = query.statement.compile(db.engine, compile_kwargs={'render_postcompile': True})
+    # Bound to the query so the EXPLAIN runs where the query itself would
+    connection = db.session.connection(bind_arguments={'clause': query.statement})
+    plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def _column(clause):
+    return clause.element, clause.modifier is operators.desc_op
+
+def _seek(ordering, values):
+    """WHERE clauses that, read in turn, select the rows that sort after `values`.
+
+    Expands (a, b, c) > (x, y, z) column by column so mixed directions work.
+    Each clause leads with a plain range or an IS [NOT] NULL test on the
+    first column so it can drive an index: rows whose first key is NULL get
+    a clause of their own rather than an OR that would defeat the range.
+    """
+    nulls_low = db.engine.dialect.name not in ('postgresql', 'oracle')
+    # Whether a NULL in each column sorts after every value in that direction
+    columns = [(column, descending, descending == nulls_low and column.nullable)
+               for column, descending in map(_column, ordering)]
+
+    # Rows level with the cursor on the first column that sort after it on the rest
+    alternatives = []
+    for position in range(1, len(columns)):
+        equal_prefix = [_equal(columns[index][0], values[index]) for index in range(1, position)]
+        alternatives.append(and_(*equal_prefix, _after(*columns[position], values[position])))
+    first, descending, nulls_after = columns[0]
+    level = and_(_equal(first, values[0]), or_(*alternatives)) if alternatives else false()
+
+    if values[0] is None:
+        return [level] if nulls_after else [level, first.isnot(None)]
+    # Bound literals, since SQLAlchemy refuses < / > against a bare True/False
+    bound = literal(values[0], first.type)
+    leading_range = first <= bound if descending else first >= bound
+    after = first < bound if descending else first > bound
+    clauses = [and_(leading_range, or_(after, level))]
+    return clauses + [first.is_(None)] if nulls_after else clauses
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == literal(value, column.type)
+
+def _after(column, descending, nulls_after, value):
+    """Rows whose `column` sorts strictly after `value`"""
+    if value is None:
+        return false() if nulls_after else column.isnot(None)
+    bound = literal(value, column.type)
+    after = column < bound if descending else column > bound
+    return or_(after, column.is_(None)) if nulls_after else after
+
+def encode_cursor(ordering, row):
+    values = []
+    for clause in ordering:
+        value = getattr(row, _column(clause)[0].key)
+        values.append(value.isoformat() if isinstance(value, (date, datetime)) else value)
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(ordering, cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError('Invalid cursor')
+
+    return [_cursor_value(_column(clause)[0], value) for clause, value in zip(ordering, values)]
+
+def _cursor_value(column, value):
+    """A cursor's JSON `value` as `column`'s Python type; raises ValueError if it can't be one"""
+    if value is None:
+        if not column.nullable:
+            raise ValueError('Invalid cursor')
+        return None
+    python_type = column.type.python_type
+    if python_type in (date, datetime):
+        try:
+            return python_type.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+    if python_type is float and type(value) is int:
+        return float(value)
+    # Exact type, so a dict or list never reaches the driver and True isn't taken for 1
+    if type(value) is not python_type:
+        raise ValueError('Invalid cursor')
+    return value
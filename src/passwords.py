@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# =============================================
+# PASSWORD HASHING
+# =============================================
+#
+# Key stretching is expensive by design, so hashes are computed on a small
+# dedicated thread pool (hashlib releases the GIL while it works) instead of
+# by however many request threads arrive at once. At most
+# PASSWORD_HASH_WORKERS hashes run and PASSWORD_HASH_QUEUE more wait; past
+# that, PasswordHashingBusy is raised straight away and routes answer 429, so
+# a burst of logins cannot starve health checks and cheap reads.
+#
+# PASSWORD_HASH_METHOD is a full Werkzeug method string with its parameters
+# spelled out (e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000) so stored
+# hashes can be compared against it: a successful check of a hash made with
+# other parameters rehashes the password with the configured ones, or leaves
+# that to the next login when the pool is too busy to take the extra hash.
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+class PasswordHashingBusy(Exception):
+    """Raised when every hashing worker is busy and the wait queue is full"""
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.workers = os.cpu_count() or 1
+        self.queue_limit = 4 * self.workers
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+        self.queue_limit = app.config.get('PASSWORD_HASH_QUEUE', 4 * self.workers)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.method
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy('Too many password checks in progress, try again shortly')
+        try:
+            future = self._pool().submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+def benchmark(seconds=5.0, clients=None):
+    """Run password checks through the pool from `clients` threads for `seconds`.
+
+    Returns (checks completed, checks rejected as busy, elapsed seconds).
+    """
+    password_hash = password_hasher.hash('benchmark-password')
+    clients = clients or password_hasher.workers + password_hasher.queue_limit
+    counts = {'completed': 0, 'rejected': 0}
+    counts_lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            try:
+                password_hasher.verify(password_hash, 'benchmark-password')
+                outcome = 'completed'
+            except PasswordHashingBusy:
+                outcome = 'rejected'
+                time.sleep(0.001)
+            with counts_lock:
+                counts[outcome] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts['completed'], counts['rejected'], time.perf_counter() - started
+
+password_hasher = PasswordHasher()
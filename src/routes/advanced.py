@@ -1,7 +1,14 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models.user import db
-import requests
+from flask import Blueprint, request, jsonify, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from src.models.user import db, User
+from src.models.uploads import UploadedFile, UploadSession
+from src.storage import OffsetMismatch, append_chunk, blob_path, session_offset, start_session, store_stream
+from src.identity import token_has_permission
+from src.models.search import search_documents
+from src.pagination import MAX_PER_PAGE
+from src.cache import response_cache
 import json
 from datetime import datetime, timedelta
 
@@ -212,7 +219,33 @@ def get_dashboard_analytics():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# Response cache metrics (counted per worker process)
+@advanced_bp.route('/api/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Get response cache hits and misses per endpoint"""
+    try:
+        if not token_has_permission('report_access'):
+            return jsonify({'success': False, 'message': 'Insufficient permissions'}), 403
+        
+        stats = response_cache.get_stats()
+        for counts in stats.values():
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_rate'] = round(counts['hits'] / lookups, 3) if lookups else None
+        
+        return jsonify({
+            'success': True,
+            'backend': type(response_cache.backend).__name__,
+            'endpoints': stats
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 # File upload and management
+def _is_true(value):
+    return str(value).lower() in ('true', '1', 'on', 'yes')
+
 @advanced_bp.route('/api/upload', methods=['POST'])
 @jwt_required()
 def upload_file():
@@ -227,21 +260,173 @@ def upload_file():
         if file.filename == '':
             return jsonify({'success': False, 'message': 'No file selected'}), 400
         
-        # Mock file upload response
-        file_info = {
-            'id': f'file_{datetime.now().timestamp()}',
-            'filename': file.filename,
-            'size': len(file.read()),
-            'upload_date': datetime.now().isoformat(),
-            'url': f'/uploads/{file.filename}',
-            'type': file.content_type
-        }
+        uploaded = store_stream(
+            file.stream,
+            owner_id=user_id,
+            filename=file.filename,
+            content_type=file.content_type,
+            purpose=request.form.get('type', 'general'),
+            is_public=_is_true(request.form.get('public', False))
+        )
+        db.session.commit()
         
         return jsonify({
             'success': True,
-            'file': file_info,
+            'file': uploaded.to_dict(),
             'message': 'File uploaded successfully'
-        }), 200
+        }), 201
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# Resumable uploads: create a session, then PATCH raw chunks at its Upload-Offset
+@advanced_bp.route('/api/uploads', methods=['POST'])
+@jwt_required()
+def create_upload_session():
+    """Start a resumable upload"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        if not data.get('filename') or 'size' not in data:
+            return jsonify({'success': False, 'message': 'filename and size are required'}), 400
+        
+        try:
+            size = int(data['size'])
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'size must be a whole number of bytes'}), 400
+        
+        session = start_session(
+            owner_id=user_id,
+            filename=data['filename'],
+            size=size,
+            content_type=data.get('content_type'),
+            purpose=data.get('purpose', 'general'),
+            is_public=_is_true(data.get('public', False))
+        )
+        db.session.commit()
+        
+        response = jsonify({'success': True, 'upload': session.to_dict(0)})
+        response.headers['Upload-Offset'] = '0'
+        response.headers['Location'] = f'/api/uploads/{session.id}'
+        return response, 201
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def _own_upload_session(session_id):
+    session = db.session.get(UploadSession, session_id)
+    if session is None or session.owner_id != get_jwt_identity():
+        return None
+    return session
+
+@advanced_bp.route('/api/uploads/<string:session_id>', methods=['GET', 'HEAD'])
+@jwt_required()
+def get_upload_session(session_id):
+    """Report how many bytes of a resumable upload have arrived"""
+    try:
+        session = _own_upload_session(session_id)
+        if session is None:
+            return jsonify({'success': False, 'message': 'Upload not found'}), 404
+        
+        offset = session_offset(session)
+        response = jsonify({'success': True, 'upload': session.to_dict(offset)})
+        response.headers['Upload-Offset'] = str(offset)
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@advanced_bp.route('/api/uploads/<string:session_id>', methods=['PATCH'])
+@jwt_required()
+def append_upload_chunk(session_id):
+    """Append the request body to a resumable upload at the given Upload-Offset"""
+    try:
+        session = _own_upload_session(session_id)
+        if session is None:
+            return jsonify({'success': False, 'message': 'Upload not found'}), 404
+        
+        if not request.headers.get('Upload-Offset', '').isdigit():
+            return jsonify({'success': False, 'message': 'Upload-Offset header is required'}), 400
+        
+        try:
+            offset = append_chunk(session, int(request.headers['Upload-Offset']), request.stream)
+        except OffsetMismatch as e:
+            response = jsonify({'success': False, 'message': str(e), 'offset': e.offset})
+            response.headers['Upload-Offset'] = str(e.offset)
+            return response, 409
+        db.session.commit()
+        
+        response = jsonify({'success': True, 'upload': session.to_dict(offset)})
+        response.headers['Upload-Offset'] = str(offset)
+        return response, 201 if session.file_id else 200
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# Stored files, at the URLs handed out by the upload endpoints. They are served
+# from the SPA's origin, so only types a browser can't run script from are
+# shown inline; everything else, whatever type the uploader claimed, is a
+# nosniff octet-stream download.
+FILE_READER_PERMISSIONS = ('user_management', 'patient_management', 'loan_management')
+FILE_MAX_AGE = 365 * 24 * 3600  # the bytes behind a file id never change
+INLINE_FILE_TYPES = ('image/png', 'image/jpeg', 'image/gif', 'image/webp', 'application/pdf')
+
+def _inline_type(content_type):
+    """The MIME type to show `content_type` inline as, or None to send it as a download"""
+    mimetype = (content_type or '').split(';', 1)[0].strip().lower()
+    return mimetype if mimetype in INLINE_FILE_TYPES else None
+
+def _may_read_file(uploaded):
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return False
+    if get_jwt_identity() is None:
+        return False
+    return get_jwt_identity() == uploaded.owner_id or any(
+        token_has_permission(permission) for permission in FILE_READER_PERMISSIONS
+    )
+
+@advanced_bp.route('/api/files/<string:file_id>', methods=['GET'])
+def get_file(file_id):
+    """Download an uploaded file; private files only for their owner and staff"""
+    try:
+        uploaded = db.session.get(UploadedFile, file_id)
+        if uploaded is not None and not uploaded.is_public and not _may_read_file(uploaded):
+            uploaded = None
+        if uploaded is None:
+            return jsonify({'success': False, 'message': 'File not found'}), 404
+        
+        inline_type = _inline_type(uploaded.content_type)
+        response = send_file(
+            blob_path(uploaded.sha256),
+            mimetype=inline_type or 'application/octet-stream',
+            as_attachment=inline_type is None,
+            download_name=uploaded.filename,
+            etag=uploaded.sha256,
+            conditional=True,
+            max_age=FILE_MAX_AGE if uploaded.is_public else None
+        )
+        if not uploaded.is_public:
+            response.cache_control.no_cache = None
+            response.cache_control.private = True
+            response.cache_control.max_age = FILE_MAX_AGE
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        return response
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -254,56 +439,34 @@ def search():
     try:
         query = request.args.get('q', '')
         category = request.args.get('category', 'all')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
         
         if not query:
             return jsonify({'success': False, 'message': 'Search query required'}), 400
         
-        # Mock search results
-        results = {
-            'education': [
-                {
-                    'type': 'course',
-                    'title': 'Digital Marketing Fundamentals',
-                    'description': 'Learn the basics of digital marketing and online promotion',
-                    'url': '/education/courses/digital-marketing'
-                }
-            ],
-            'healthcare': [
-                {
-                    'type': 'service',
-                    'title': 'Telemedicine Consultation',
-                    'description': 'Online consultation with certified doctors',
-                    'url': '/healthcare/telemedicine'
-                }
-            ],
-            'agriculture': [
-                {
-                    'type': 'guide',
-                    'title': 'Rice Cultivation Guide',
-                    'description': 'Complete guide for rice farming techniques',
-                    'url': '/agriculture/guides/rice-cultivation'
-                }
-            ],
-            'business': [
-                {
-                    'type': 'service',
-                    'title': 'Microfinance Loan Application',
-                    'description': 'Apply for small business loans and financial support',
-                    'url': '/business/microfinance'
-                }
-            ]
-        }
+        documents, total = search_documents(
+            query,
+            category=None if category == 'all' else category,
+            page=page,
+            per_page=per_page
+        )
         
-        if category != 'all' and category in results:
-            filtered_results = {category: results[category]}
-        else:
-            filtered_results = results
+        # Ranked results grouped by module, best match first within each
+        results = {}
+        for document in documents:
+            result = document.to_dict()
+            result['score'] = document.score
+            results.setdefault(document.category, []).append(result)
         
         return jsonify({
             'success': True,
             'query': query,
-            'results': filtered_results,
-            'total_results': sum(len(v) for v in filtered_results.values())
+            'results': results,
+            'total_results': total,
+            'pages': (total + per_page - 1) // per_page,
+            'current_page': page,
+            'per_page': per_page
         }), 200
         
     except Exception as e:
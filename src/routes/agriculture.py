@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
+from src.identity import load_current_user
 from src.models.agriculture import *
+from src.cache import response_cache
+from src.conditional import QueryValidators
+from src.pagination import paginate_list
+from src.models.search import matching_ids
+from src.models.geo import near_arguments, to_dicts_near, within_radius
 from datetime import datetime
 
 agriculture_bp = Blueprint('agriculture', __name__)
@@ -16,7 +22,7 @@ def create_farmer_profile():
     """Create farmer profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -70,6 +76,7 @@ def get_farmer_profile():
 # =============================================
 
 @agriculture_bp.route('/crops', methods=['GET'])
+@response_cache.cached(depends_on=[Crop])
 def get_crops():
     """Get all available crops"""
     try:
@@ -204,26 +211,39 @@ def get_agricultural_products():
         crop_id = request.args.get('crop_id', type=int)
         location = request.args.get('location', '')
         is_organic = request.args.get('is_organic', type=bool)
+        search = request.args.get('search', '')
+        try:
+            origin, radius_km = near_arguments(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        query = AgriculturalProduct.query.filter_by(is_available=True)
+        query = AgriculturalProduct.query.options(*AgriculturalProduct.load_plan()).filter_by(is_available=True)
         
         if crop_id:
             query = query.filter_by(crop_id=crop_id)
         
         if location:
-            query = query.filter(AgriculturalProduct.location_address.ilike(f'%{location}%'))
+            query = query.filter(AgriculturalProduct.id.in_(matching_ids(AgriculturalProduct, location, location=True)))
         
         if is_organic is not None:
             query = query.filter_by(is_organic=is_organic)
         
-        products = query.paginate(page=page, per_page=per_page, error_out=False)
+        if search:
+            query = query.filter(AgriculturalProduct.id.in_(matching_ids(AgriculturalProduct, search)))
+        
+        if origin:
+            query = within_radius(query, AgriculturalProduct, origin, radius_km)
+        
+        try:
+            products = paginate_list(
+                query, [AgriculturalProduct.created_at.desc(), AgriculturalProduct.id.desc()], page, per_page, seekable=not origin
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'products': [product.to_dict() for product in products.items],
-            'total': products.total,
-            'pages': products.pages,
-            'current_page': page,
-            'per_page': per_page
+            'products': to_dicts_near(products.items, origin),
+            **products.meta
         }), 200
         
     except Exception as e:
@@ -308,13 +328,19 @@ def create_product_inquiry():
 def get_agricultural_advisories():
     """Get active agricultural advisories"""
     try:
-        advisories = AgriculturalAdvisory.query.filter(
+        query = AgriculturalAdvisory.query.filter(
             AgriculturalAdvisory.valid_until >= datetime.utcnow().date()
-        ).all()
+        )
         
-        return jsonify({
+        validators = QueryValidators(query, AgriculturalAdvisory.updated_at, related=[AgriculturalAdvisory.issuer])
+        if validators.not_modified:
+            return validators.not_modified_response()
+        
+        advisories = query.all()
+        
+        return validators.apply(jsonify({
             'advisories': [advisory.to_dict() for advisory in advisories if advisory.is_active]
-        }), 200
+        })), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -329,13 +355,27 @@ def get_weather_data():
         if not location:
             return jsonify({'error': 'Location parameter required'}), 400
         
-        weather_data = WeatherData.query.filter(
-            WeatherData.location_coordinates == location
-        ).order_by(WeatherData.date.desc()).limit(days).all()
+        query = WeatherData.query.filter(WeatherData.location_coordinates == location)
         
-        return jsonify({
-            'weather_data': [data.to_dict() for data in weather_data]
-        }), 200
+        validators = QueryValidators(query, WeatherData.updated_at)
+        if validators.not_modified:
+            return validators.not_modified_response()
+        
+        try:
+            fields = WeatherData.row_serializer.fields_from(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        weather_data = db.session.execute(
+            WeatherData.row_serializer.select(names=fields)
+            .where(WeatherData.location_coordinates == location)
+            .order_by(WeatherData.date.desc())
+            .limit(days)
+        )
+        
+        return validators.apply(jsonify({
+            'weather_data': WeatherData.row_serializer.dump(weather_data, fields)
+        })), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
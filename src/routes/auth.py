@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_refresh_token, jwt_required, get_jwt_identity
 from src.models.user import db, User, Role
+from src.identity import issue_access_token, load_current_user
+from src.passwords import PasswordHashingBusy
+from src.engines import write_queue
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
@@ -46,7 +51,7 @@ def register():
         db.session.commit()
         
         # Create tokens
-        access_token = create_access_token(identity=user.id)
+        access_token = issue_access_token(user)
         refresh_token = create_refresh_token(identity=user.id)
         
         return jsonify({
@@ -56,6 +61,9 @@ def register():
             'refresh_token': refresh_token
         }), 201
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -77,12 +85,16 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 401
         
-        # Update last login
-        user.last_login_at = datetime.utcnow()
-        db.session.commit()
+        # Record the login through the batched write queue; only a password
+        # rehash needs this session to commit
+        logged_in_at = datetime.utcnow()
+        write_queue.submit(_record_login, user.id, logged_in_at)
+        set_committed_value(user, 'last_login_at', logged_in_at)
+        if db.session.dirty:
+            db.session.commit()
         
         # Create tokens
-        access_token = create_access_token(identity=user.id)
+        access_token = issue_access_token(user)
         refresh_token = create_refresh_token(identity=user.id)
         
         return jsonify({
@@ -92,21 +104,27 @@ def login():
             'refresh_token': refresh_token
         }), 200
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _record_login(session, user_id, logged_in_at):
+    session.execute(update(User).where(User.id == user_id).values(last_login_at=logged_in_at))
+
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh():
     """Refresh access token"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user or not user.is_active:
             return jsonify({'error': 'User not found or inactive'}), 404
         
-        access_token = create_access_token(identity=user.id)
+        access_token = issue_access_token(user)
         
         return jsonify({
             'access_token': access_token
@@ -121,7 +139,7 @@ def get_profile():
     """Get current user profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -139,7 +157,7 @@ def update_profile():
     """Update current user profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -177,7 +195,7 @@ def change_password():
     """Change user password"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -201,6 +219,9 @@ def change_password():
             'message': 'Password changed successfully'
         }), 200
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -211,7 +232,7 @@ def verify_email():
     """Verify user email (simplified version)"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -248,7 +269,7 @@ def assign_role():
     """Assign additional role to current user"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -269,9 +290,11 @@ def assign_role():
         user.roles.append(role)
         db.session.commit()
         
+        # The role change revokes the caller's current access token
         return jsonify({
             'message': f'Role {role_name} assigned successfully',
-            'user': user.to_dict()
+            'user': user.to_dict(),
+            'access_token': issue_access_token(user)
         }), 200
         
     except Exception as e:
@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
 from src.models.business import *
+from src.models.search import matching_ids
+from src.cache import response_cache
+from src.pagination import paginate_list
 from datetime import datetime
 
 business_bp = Blueprint('business', __name__)
@@ -11,6 +14,7 @@ business_bp = Blueprint('business', __name__)
 # =============================================
 
 @business_bp.route('/loan-products', methods=['GET'])
+@response_cache.cached(depends_on=[LoanProduct])
 def get_loan_products():
     """Get all active loan products"""
     try:
@@ -75,10 +79,16 @@ def get_my_loan_applications():
     """Get current user's loan applications"""
     try:
         current_user_id = get_jwt_identity()
-        applications = LoanApplication.query.filter_by(applicant_id=current_user_id).all()
+        
+        try:
+            selection = LoanApplication.api_fields.select(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        applications = LoanApplication.query.options(*selection.options()).filter_by(applicant_id=current_user_id).all()
         
         return jsonify({
-            'applications': [application.to_dict() for application in applications]
+            'applications': [selection.dump(application) for application in applications]
         }), 200
         
     except Exception as e:
@@ -90,7 +100,7 @@ def get_my_loans():
     """Get current user's active loans"""
     try:
         current_user_id = get_jwt_identity()
-        loans = Loan.query.filter_by(borrower_id=current_user_id).all()
+        loans = Loan.query.options(*Loan.load_plan()).filter_by(borrower_id=current_user_id).all()
         
         return jsonify({
             'loans': [loan.to_dict() for loan in loans]
@@ -181,6 +191,7 @@ def get_my_training_enrollments():
 # =============================================
 
 @business_bp.route('/job-categories', methods=['GET'])
+@response_cache.cached(depends_on=[JobCategory])
 def get_job_categories():
     """Get all job categories"""
     try:
@@ -202,28 +213,33 @@ def get_jobs():
         employment_type = request.args.get('employment_type', '')
         search = request.args.get('search', '')
         
-        query = JobPosting.query.filter_by(is_active=True)
+        try:
+            selection = JobPosting.api_fields.select(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = JobPosting.query.options(*selection.options(JobPosting.created_at)).filter_by(is_active=True)
         
         if category_id:
             query = query.filter_by(category_id=category_id)
         
         if location:
-            query = query.filter(JobPosting.location_address.ilike(f'%{location}%'))
+            query = query.filter(JobPosting.id.in_(matching_ids(JobPosting, location, location=True)))
         
         if employment_type:
             query = query.filter_by(employment_type=employment_type)
         
         if search:
-            query = query.filter(JobPosting.title.ilike(f'%{search}%'))
+            query = query.filter(JobPosting.id.in_(matching_ids(JobPosting, search)))
         
-        jobs = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            jobs = paginate_list(query, [JobPosting.created_at.desc(), JobPosting.id.desc()], page, per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'jobs': [job.to_dict() for job in jobs.items],
-            'total': jobs.total,
-            'pages': jobs.pages,
-            'current_page': page,
-            'per_page': per_page
+            'jobs': [selection.dump(job) for job in jobs.items],
+            **jobs.meta
         }), 200
         
     except Exception as e:
@@ -336,7 +352,7 @@ def get_my_job_postings():
     """Get current user's job postings"""
     try:
         current_user_id = get_jwt_identity()
-        jobs = JobPosting.query.filter_by(employer_id=current_user_id).all()
+        jobs = JobPosting.query.options(*JobPosting.load_plan()).filter_by(employer_id=current_user_id).all()
         
         return jsonify({
             'jobs': [job.to_dict() for job in jobs]
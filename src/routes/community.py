@@ -2,6 +2,11 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
 from src.models.community import *
+from src.cache import response_cache
+from src.conditional import QueryValidators
+from src.pagination import paginate_list
+from src.models.search import matching_ids
+from src.models.geo import near_arguments, to_dicts_near, within_radius
 from datetime import datetime
 
 community_bp = Blueprint('community', __name__)
@@ -11,6 +16,7 @@ community_bp = Blueprint('community', __name__)
 # =============================================
 
 @community_bp.route('/forums', methods=['GET'])
+@response_cache.cached(depends_on=[Forum, ForumPost, User.first_name, User.last_name])
 def get_forums():
     """Get all active forums"""
     try:
@@ -29,16 +35,18 @@ def get_forum_posts(forum_id):
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        posts = ForumPost.query.filter_by(forum_id=forum_id).order_by(
-            ForumPost.is_pinned.desc(), ForumPost.created_at.desc()
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        query = ForumPost.query.options(*ForumPost.load_plan()).filter_by(forum_id=forum_id)
+        
+        try:
+            posts = paginate_list(
+                query, [ForumPost.is_pinned.desc(), ForumPost.created_at.desc(), ForumPost.id.desc()], page, per_page
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'posts': [post.to_dict() for post in posts.items],
-            'total': posts.total,
-            'pages': posts.pages,
-            'current_page': page,
-            'per_page': per_page
+            **posts.meta
         }), 200
         
     except Exception as e:
@@ -78,10 +86,20 @@ def get_post_replies(post_id):
     """Get replies to a forum post"""
     try:
         post = ForumPost.query.get_or_404(post_id)
-        replies = ForumReply.query.filter_by(post_id=post_id).order_by(ForumReply.created_at.asc()).all()
+        
+        try:
+            fields = ForumReply.row_serializer.fields_from(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        replies = db.session.execute(
+            ForumReply.row_serializer.select(names=fields)
+            .where(ForumReply.post_id == post_id)
+            .order_by(ForumReply.created_at.asc())
+        )
         
         return jsonify({
-            'replies': [reply.to_dict() for reply in replies]
+            'replies': ForumReply.row_serializer.dump(replies, fields)
         }), 200
         
     except Exception as e:
@@ -132,29 +150,38 @@ def get_events():
         event_type = request.args.get('event_type', '')
         location = request.args.get('location', '')
         upcoming_only = request.args.get('upcoming_only', True, type=bool)
+        try:
+            origin, radius_km = near_arguments(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        query = Event.query.filter_by(is_active=True, is_public=True)
+        query = Event.query.options(*Event.load_plan()).filter_by(is_active=True, is_public=True)
         
         if event_type:
             query = query.filter_by(event_type=event_type)
         
         if location:
-            query = query.filter(Event.location_address.ilike(f'%{location}%'))
+            query = query.filter(Event.id.in_(matching_ids(Event, location, location=True)))
         
         if upcoming_only:
             query = query.filter(Event.start_datetime >= datetime.utcnow())
         
-        events = query.order_by(Event.start_datetime.asc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        if origin:
+            query = within_radius(query, Event, origin, radius_km)
         
-        return jsonify({
-            'events': [event.to_dict() for event in events.items],
-            'total': events.total,
-            'pages': events.pages,
-            'current_page': page,
-            'per_page': per_page
-        }), 200
+        validators = QueryValidators(query, Event.updated_at, related=[Event.organizer])
+        if validators.not_modified:
+            return validators.not_modified_response()
+        
+        try:
+            events = paginate_list(query, [Event.start_datetime.asc(), Event.id.asc()], page, per_page, seekable=not origin)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return validators.apply(jsonify({
+            'events': to_dicts_near(events.items, origin),
+            **events.meta
+        })), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -274,26 +301,35 @@ def get_volunteer_opportunities():
         category = request.args.get('category', '')
         location = request.args.get('location', '')
         is_remote = request.args.get('is_remote', type=bool)
+        try:
+            origin, radius_km = near_arguments(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        query = VolunteerOpportunity.query.filter_by(is_active=True)
+        query = VolunteerOpportunity.query.options(*VolunteerOpportunity.load_plan()).filter_by(is_active=True)
         
         if category:
             query = query.filter_by(category=category)
         
         if location:
-            query = query.filter(VolunteerOpportunity.location_address.ilike(f'%{location}%'))
+            query = query.filter(VolunteerOpportunity.id.in_(matching_ids(VolunteerOpportunity, location, location=True)))
         
         if is_remote is not None:
             query = query.filter_by(is_remote=is_remote)
         
-        opportunities = query.paginate(page=page, per_page=per_page, error_out=False)
+        if origin:
+            query = within_radius(query, VolunteerOpportunity, origin, radius_km)
+        
+        try:
+            opportunities = paginate_list(
+                query, [VolunteerOpportunity.created_at.desc(), VolunteerOpportunity.id.desc()], page, per_page, seekable=not origin
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'opportunities': [opp.to_dict() for opp in opportunities.items],
-            'total': opportunities.total,
-            'pages': opportunities.pages,
-            'current_page': page,
-            'per_page': per_page
+            'opportunities': to_dicts_near(opportunities.items, origin),
+            **opportunities.meta
         }), 200
         
     except Exception as e:
@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
+from src.identity import token_has_permission, token_has_role
 from src.models.education import (
     CourseCategory, Course, CourseModule, Lesson, Enrollment, 
     LessonProgress, Assessment, AssessmentQuestion, AssessmentSubmission,
     Scholarship, ScholarshipApplication
 )
+from src.models.search import matching_ids
+from src.cache import response_cache
+from src.pagination import paginate_list
 from datetime import datetime
 
 education_bp = Blueprint('education', __name__)
@@ -15,6 +19,7 @@ education_bp = Blueprint('education', __name__)
 # =============================================
 
 @education_bp.route('/categories', methods=['GET'])
+@response_cache.cached(depends_on=[CourseCategory])
 def get_categories():
     """Get all course categories"""
     try:
@@ -30,10 +35,7 @@ def get_categories():
 def create_category():
     """Create new course category (admin only)"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user.has_permission('course_management'):
+        if not token_has_permission('course_management'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         data = request.get_json()
@@ -72,13 +74,18 @@ def get_courses():
         difficulty = request.args.get('difficulty', '')
         is_free = request.args.get('is_free', type=bool)
         
-        query = Course.query.filter_by(is_published=True)
+        try:
+            selection = Course.api_fields.select(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = Course.query.options(*selection.options(Course.created_at)).filter_by(is_published=True)
         
         if category_id:
             query = query.filter_by(category_id=category_id)
         
         if search:
-            query = query.filter(Course.title.ilike(f'%{search}%'))
+            query = query.filter(Course.id.in_(matching_ids(Course, search)))
         
         if difficulty:
             query = query.filter_by(difficulty_level=difficulty)
@@ -86,14 +93,14 @@ def get_courses():
         if is_free is not None:
             query = query.filter_by(is_free=is_free)
         
-        courses = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            courses = paginate_list(query, [Course.created_at.desc(), Course.id.desc()], page, per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'courses': [course.to_dict() for course in courses.items],
-            'total': courses.total,
-            'pages': courses.pages,
-            'current_page': page,
-            'per_page': per_page
+            'courses': [selection.dump(course) for course in courses.items],
+            **courses.meta
         }), 200
         
     except Exception as e:
@@ -121,9 +128,8 @@ def create_course():
     """Create new course (educators only)"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
         
-        if not (current_user.has_role('educator') or current_user.has_permission('course_management')):
+        if not (token_has_role('educator') or token_has_permission('course_management')):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         data = request.get_json()
@@ -164,11 +170,10 @@ def update_course(course_id):
     """Update course (instructor or admin only)"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
         
         course = Course.query.get_or_404(course_id)
         
-        if not (course.instructor_id == current_user_id or current_user.has_permission('course_management')):
+        if not (course.instructor_id == current_user_id or token_has_permission('course_management')):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         data = request.get_json()
@@ -514,10 +519,15 @@ def get_my_courses_as_instructor():
     try:
         current_user_id = get_jwt_identity()
         
-        courses = Course.query.filter_by(instructor_id=current_user_id).all()
+        try:
+            selection = Course.api_fields.select(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        courses = Course.query.options(*selection.options()).filter_by(instructor_id=current_user_id).all()
         
         return jsonify({
-            'courses': [course.to_dict() for course in courses]
+            'courses': [selection.dump(course) for course in courses]
         }), 200
         
     except Exception as e:
@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
+from src.identity import load_current_user
 from src.models.healthcare import *
+from src.cache import response_cache
+from src.models.geo import add_distances, near_arguments, parse_coordinates, parse_radius, to_dicts_near, within_radius
 from datetime import datetime
+from sqlalchemy import true
 
 healthcare_bp = Blueprint('healthcare', __name__)
 
@@ -11,6 +15,7 @@ healthcare_bp = Blueprint('healthcare', __name__)
 # =============================================
 
 @healthcare_bp.route('/providers', methods=['GET'])
+@response_cache.cached(depends_on=[HealthcareProvider, User.first_name, User.last_name])
 def get_providers():
     """Get all verified healthcare providers"""
     try:
@@ -27,7 +32,7 @@ def create_provider_profile():
     """Create healthcare provider profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -124,16 +129,30 @@ def get_blood_donors():
     """Get available blood donors"""
     try:
         blood_group = request.args.get('blood_group')
-        
-        query = BloodDonor.query.filter_by(is_available=True, health_status='eligible')
+        try:
+            origin, radius_km = near_arguments(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            fields = BloodDonor.row_serializer.fields_from(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = BloodDonor.row_serializer.select(BloodDonor.latitude, BloodDonor.longitude, names=fields).where(
+            BloodDonor.is_available == true(), BloodDonor.health_status == 'eligible'
+        )
         
         if blood_group:
-            query = query.filter_by(blood_group=blood_group)
+            query = query.where(BloodDonor.blood_group == blood_group)
         
-        donors = query.all()
+        if origin:
+            query = within_radius(query, BloodDonor, origin, radius_km)
+        
+        donors = db.session.execute(query).all()
         
         return jsonify({
-            'donors': [donor.to_dict() for donor in donors]
+            'donors': add_distances(BloodDonor.row_serializer.dump(donors, fields), donors, origin)
         }), 200
         
     except Exception as e:
@@ -155,6 +174,7 @@ def create_blood_request():
             urgency_level=data.get('urgency_level', 'medium'),
             hospital_name=data.get('hospital_name'),
             hospital_address=data.get('hospital_address'),
+            location_coordinates=data.get('location_coordinates'),
             contact_phone=data.get('contact_phone'),
             needed_by_date=datetime.strptime(data['needed_by_date'], '%Y-%m-%d').date() if data.get('needed_by_date') else None
         )
@@ -184,6 +204,33 @@ def get_blood_requests():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@healthcare_bp.route('/blood-requests/<int:request_id>/donors', methods=['GET'])
+@jwt_required()
+def get_matching_donors(request_id):
+    """Get eligible, compatible donors for a blood request, best match first"""
+    try:
+        blood_request = BloodRequest.query.get_or_404(request_id)
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        try:
+            origin, radius_km = near_arguments(request.args)
+            # Fall back to the hospital's coordinates when the caller gives no point
+            if origin is None:
+                origin = parse_coordinates(blood_request.location_coordinates)
+                radius_km = parse_radius(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        donors = blood_request.matching_donors(origin=origin, radius_km=radius_km, limit=limit)
+        
+        return jsonify({
+            'blood_request': blood_request.to_dict(),
+            'compatible_groups': COMPATIBLE_DONOR_GROUPS.get(blood_request.blood_group, [blood_request.blood_group]),
+            'donors': to_dicts_near(donors, origin)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # =============================================
 # MEDICAL CAMP ROUTES
 # =============================================
@@ -192,10 +239,20 @@ def get_blood_requests():
 def get_medical_camps():
     """Get active medical camps"""
     try:
-        camps = MedicalCamp.query.filter_by(is_active=True).all()
+        try:
+            origin, radius_km = near_arguments(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = MedicalCamp.query.filter_by(is_active=True)
+        
+        if origin:
+            query = within_radius(query, MedicalCamp, origin, radius_km)
+        
+        camps = query.all()
         
         return jsonify({
-            'medical_camps': [camp.to_dict() for camp in camps]
+            'medical_camps': to_dicts_near(camps, origin)
         }), 200
         
     except Exception as e:
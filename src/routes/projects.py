@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
+from src.identity import token_has_permission
 from src.models.community import Project, Donation, ProjectExpense, PaymentTransaction
+from src.conditional import QueryValidators
+from src.pagination import paginate_list
 from datetime import datetime
+from sqlalchemy import false, func, or_, update
 
 projects_bp = Blueprint('projects', __name__)
 
@@ -20,7 +24,12 @@ def get_projects():
         status = request.args.get('status', 'active')
         featured_only = request.args.get('featured_only', False, type=bool)
         
-        query = Project.query.filter_by(status=status)
+        try:
+            selection = Project.api_fields.select(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = Project.query.options(*selection.options(Project.created_at)).filter_by(status=status)
         
         if category:
             query = query.filter_by(category=category)
@@ -28,17 +37,19 @@ def get_projects():
         if featured_only:
             query = query.filter_by(is_featured=True)
         
-        projects = query.order_by(Project.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        validators = QueryValidators(query, Project.updated_at, related=[Project.manager])
+        if validators.not_modified:
+            return validators.not_modified_response()
         
-        return jsonify({
-            'projects': [project.to_dict() for project in projects.items],
-            'total': projects.total,
-            'pages': projects.pages,
-            'current_page': page,
-            'per_page': per_page
-        }), 200
+        try:
+            projects = paginate_list(query, [Project.created_at.desc(), Project.id.desc()], page, per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return validators.apply(jsonify({
+            'projects': [selection.dump(project) for project in projects.items],
+            **projects.meta
+        })), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -133,10 +144,16 @@ def get_my_projects():
     """Get current user's managed projects"""
     try:
         current_user_id = get_jwt_identity()
-        projects = Project.query.filter_by(manager_id=current_user_id).all()
+        
+        try:
+            selection = Project.api_fields.select(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        projects = Project.query.options(*selection.options()).filter_by(manager_id=current_user_id).all()
         
         return jsonify({
-            'projects': [project.to_dict() for project in projects]
+            'projects': [selection.dump(project) for project in projects]
         }), 200
         
     except Exception as e:
@@ -209,18 +226,40 @@ def confirm_donation(donation_id):
             return jsonify({'error': 'Access denied'}), 403
         
         # In a real implementation, you would verify payment with the gateway
-        # For now, we'll just mark as completed
-        donation.payment_status = 'completed'
-        donation.processed_at = datetime.utcnow()
-        
-        # Update project raised amount
-        project = donation.project
-        if project:
-            project.raised_amount = (project.raised_amount or 0) + donation.amount
+        # For now, we'll just mark as completed. The status change is a
+        # conditional UPDATE so only one of several concurrent confirmations
+        # of the same donation gets to credit the project.
+        confirmed = db.session.execute(
+            update(Donation)
+            .where(Donation.id == donation_id)
+            .where(or_(Donation.payment_status.is_(None), Donation.payment_status != 'completed'))
+            .values(payment_status='completed', processed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        
+        if not confirmed:
+            db.session.rollback()
+            return jsonify({
+                'message': 'Donation already confirmed',
+                'donation': donation.to_dict()
+            }), 200
+        
+        # Update project raised amount with an in-database increment
+        if donation.project_id:
+            db.session.execute(
+                update(Project)
+                .where(Project.id == donation.project_id)
+                .values(raised_amount=func.coalesce(Project.raised_amount, 0) + donation.amount)
+                .execution_options(synchronize_session=False)
+            )
         
         # Update transaction status
-        for transaction in donation.transactions:
-            transaction.status = 'success'
+        db.session.execute(
+            update(PaymentTransaction)
+            .where(PaymentTransaction.donation_id == donation_id)
+            .values(status='success')
+            .execution_options(synchronize_session=False)
+        )
         
         db.session.commit()
         
@@ -239,12 +278,20 @@ def get_project_donations(project_id):
     try:
         project = Project.query.get_or_404(project_id)
         
+        try:
+            fields = Donation.row_serializer.fields_from(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Only show non-anonymous donations or basic stats
-        donations = Donation.query.filter_by(
-            project_id=project_id, 
-            payment_status='completed',
-            is_anonymous=False
-        ).order_by(Donation.donated_at.desc()).limit(50).all()
+        donations = db.session.execute(
+            Donation.row_serializer.select(names=fields)
+            .where(Donation.project_id == project_id,
+                   Donation.payment_status == 'completed',
+                   Donation.is_anonymous == false())
+            .order_by(Donation.donated_at.desc())
+            .limit(50)
+        )
         
         total_donations = Donation.query.filter_by(
             project_id=project_id, 
@@ -252,7 +299,7 @@ def get_project_donations(project_id):
         ).count()
         
         return jsonify({
-            'donations': [donation.to_dict() for donation in donations],
+            'donations': Donation.row_serializer.dump(donations, fields),
             'total_donations': total_donations,
             'total_amount': float(project.raised_amount) if project.raised_amount else 0
         }), 200
@@ -344,9 +391,8 @@ def approve_expense(expense_id):
     """Approve a project expense (admin only)"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
         
-        if not current_user.has_permission('project_management'):
+        if not token_has_permission('project_management'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         expense = ProjectExpense.query.get_or_404(expense_id)
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, db, DonorProfile, VolunteerProfile, BeneficiaryProfile
+from src.identity import issue_access_token, load_current_user, token_has_permission
+from src.pagination import paginate_list
 from datetime import datetime
 
 user_bp = Blueprint('user', __name__)
@@ -10,10 +12,7 @@ user_bp = Blueprint('user', __name__)
 def get_users():
     """Get all users (admin only)"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user or not current_user.has_permission('user_management'):
+        if not token_has_permission('user_management'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         page = request.args.get('page', 1, type=int)
@@ -21,7 +20,12 @@ def get_users():
         search = request.args.get('search', '')
         role_filter = request.args.get('role', '')
         
-        query = User.query
+        try:
+            selection = User.api_fields.select(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = User.query.options(*selection.options(User.created_at))
         
         if search:
             query = query.filter(
@@ -33,16 +37,14 @@ def get_users():
         if role_filter:
             query = query.join(User.roles).filter_by(name=role_filter)
         
-        users = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        try:
+            users = paginate_list(query, [User.created_at.desc(), User.id.desc()], page, per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'users': [user.to_dict() for user in users.items],
-            'total': users.total,
-            'pages': users.pages,
-            'current_page': page,
-            'per_page': per_page
+            'users': [selection.dump(user) for user in users.items],
+            **users.meta
         }), 200
         
     except Exception as e:
@@ -54,10 +56,9 @@ def get_user(user_id):
     """Get specific user details"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
         
         # Users can view their own profile or admins can view any profile
-        if current_user_id != user_id and not current_user.has_permission('user_management'):
+        if current_user_id != user_id and not token_has_permission('user_management'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         user = User.query.get(user_id)
@@ -77,10 +78,9 @@ def update_user(user_id):
     """Update user details"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
         
         # Users can update their own profile or admins can update any profile
-        if current_user_id != user_id and not current_user.has_permission('user_management'):
+        if current_user_id != user_id and not token_has_permission('user_management'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         user = User.query.get(user_id)
@@ -96,7 +96,7 @@ def update_user(user_id):
         ]
         
         # Admin can update additional fields
-        if current_user.has_permission('user_management'):
+        if token_has_permission('user_management'):
             allowed_fields.extend(['is_active', 'is_verified'])
         
         for field in allowed_fields:
@@ -124,9 +124,8 @@ def delete_user(user_id):
     """Delete user (admin only)"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
         
-        if not current_user.has_permission('user_management'):
+        if not token_has_permission('user_management'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         user = User.query.get(user_id)
@@ -156,7 +155,7 @@ def get_donor_profile():
     """Get current user's donor profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -177,7 +176,7 @@ def create_donor_profile():
     """Create donor profile for current user"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -208,9 +207,11 @@ def create_donor_profile():
         
         db.session.commit()
         
+        # Gaining the donor role revokes the caller's current access token
         return jsonify({
             'message': 'Donor profile created successfully',
-            'donor_profile': donor_profile.to_dict()
+            'donor_profile': donor_profile.to_dict(),
+            'access_token': issue_access_token(user)
         }), 201
         
     except Exception as e:
@@ -223,7 +224,7 @@ def update_donor_profile():
     """Update current user's donor profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user or not user.donor_profile:
             return jsonify({'error': 'Donor profile not found'}), 404
@@ -263,7 +264,7 @@ def get_volunteer_profile():
     """Get current user's volunteer profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -284,7 +285,7 @@ def create_volunteer_profile():
     """Create volunteer profile for current user"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -316,9 +317,11 @@ def create_volunteer_profile():
         
         db.session.commit()
         
+        # Gaining the volunteer role revokes the caller's current access token
         return jsonify({
             'message': 'Volunteer profile created successfully',
-            'volunteer_profile': volunteer_profile.to_dict()
+            'volunteer_profile': volunteer_profile.to_dict(),
+            'access_token': issue_access_token(user)
         }), 201
         
     except Exception as e:
@@ -331,7 +334,7 @@ def update_volunteer_profile():
     """Update current user's volunteer profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user or not user.volunteer_profile:
             return jsonify({'error': 'Volunteer profile not found'}), 404
@@ -371,7 +374,7 @@ def get_beneficiary_profile():
     """Get current user's beneficiary profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -392,7 +395,7 @@ def create_beneficiary_profile():
     """Create beneficiary profile for current user"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -423,9 +426,11 @@ def create_beneficiary_profile():
         
         db.session.commit()
         
+        # Gaining the beneficiary role revokes the caller's current access token
         return jsonify({
             'message': 'Beneficiary profile created successfully',
-            'beneficiary_profile': beneficiary_profile.to_dict()
+            'beneficiary_profile': beneficiary_profile.to_dict(),
+            'access_token': issue_access_token(user)
         }), 201
         
     except Exception as e:
@@ -438,7 +443,7 @@ def update_beneficiary_profile():
     """Update current user's beneficiary profile"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user or not user.beneficiary_profile:
             return jsonify({'error': 'Beneficiary profile not found'}), 404
@@ -0,0 +1,272 @@
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
+from src.cache import response_cache
+from src.models.user import db, Role, Permission, role_permissions
+from src.models.meta import SCHEMA_VERSION, get_meta, set_meta
+from src.models.education import CourseCategory
+from src.models.business import JobCategory, LoanProduct
+from src.models.agriculture import Crop
+
+# =============================================
+# DATABASE SETUP AND DEFAULT DATA
+# =============================================
+#
+# Creating tables and seeding reference data are explicit steps
+# (`flask init-db`, `flask seed`) rather than part of every app start. Each
+# seeded table costs one SELECT of the names already present and at most one
+# multi-row INSERT of the missing ones, so seeding is idempotent and never
+# touches rows an admin has since edited. There is no ON CONFLICT upsert:
+# roles.name and permissions.name are unique, but the category, loan product
+# and crop names are not. App boot only reads the recorded schema version
+# (see check_schema).
+#
+# create_all() creates missing tables but never alters existing ones, so
+# init_db() also adds the model columns an older database lacks, and refuses
+# to record the schema version while any are still missing.
+
+# Bump whenever the default data below changes, so `flask seed` re-runs
+SEED_VERSION = 1
+
+DEFAULT_ROLES = [
+    {'name': 'admin', 'description': 'System Administrator'},
+    {'name': 'donor', 'description': 'Donation Provider'},
+    {'name': 'volunteer', 'description': 'Volunteer Worker'},
+    {'name': 'beneficiary', 'description': 'Service Beneficiary'},
+    {'name': 'healthcare_provider', 'description': 'Healthcare Professional'},
+    {'name': 'educator', 'description': 'Education Provider'},
+    {'name': 'farmer', 'description': 'Agricultural Producer'},
+    {'name': 'business_owner', 'description': 'Business Entity'},
+    {'name': 'organization', 'description': 'Non-profit Organization'}
+]
+
+DEFAULT_PERMISSIONS = [
+    {'name': 'user_management', 'description': 'Manage users and roles', 'module': 'admin'},
+    {'name': 'course_management', 'description': 'Manage courses and content', 'module': 'education'},
+    {'name': 'patient_management', 'description': 'Manage patient records', 'module': 'healthcare'},
+    {'name': 'farm_management', 'description': 'Manage farm operations', 'module': 'agriculture'},
+    {'name': 'loan_management', 'description': 'Manage microfinance operations', 'module': 'finance'},
+    {'name': 'project_management', 'description': 'Manage projects and campaigns', 'module': 'projects'},
+    {'name': 'event_management', 'description': 'Manage events and activities', 'module': 'events'},
+    {'name': 'report_access', 'description': 'Access reports and analytics', 'module': 'reports'}
+]
+
+DEFAULT_COURSE_CATEGORIES = [
+    {'name': 'Technology', 'description': 'Computer and technology courses'},
+    {'name': 'Business', 'description': 'Business and entrepreneurship'},
+    {'name': 'Agriculture', 'description': 'Farming and agricultural techniques'},
+    {'name': 'Healthcare', 'description': 'Health and medical education'},
+    {'name': 'Life Skills', 'description': 'Personal development and life skills'}
+]
+
+DEFAULT_JOB_CATEGORIES = [
+    {'name': 'Technology', 'description': 'IT and software jobs'},
+    {'name': 'Agriculture', 'description': 'Farming and agricultural jobs'},
+    {'name': 'Healthcare', 'description': 'Medical and healthcare jobs'},
+    {'name': 'Education', 'description': 'Teaching and training jobs'},
+    {'name': 'Business', 'description': 'Business and finance jobs'}
+]
+
+DEFAULT_LOAN_PRODUCTS = [
+    {
+        'name': 'Micro Business Loan',
+        'description': 'Small business startup loan',
+        'min_amount': 5000,
+        'max_amount': 50000,
+        'interest_rate': 12.0,
+        'tenure_months': 12
+    },
+    {
+        'name': 'Agriculture Loan',
+        'description': 'Farming and crop financing',
+        'min_amount': 10000,
+        'max_amount': 100000,
+        'interest_rate': 10.0,
+        'tenure_months': 24
+    },
+    {
+        'name': 'Education Loan',
+        'description': 'Educational expenses financing',
+        'min_amount': 15000,
+        'max_amount': 200000,
+        'interest_rate': 8.0,
+        'tenure_months': 36
+    },
+    {
+        'name': 'Women Entrepreneur Loan',
+        'description': 'Special loan for women entrepreneurs',
+        'min_amount': 5000,
+        'max_amount': 75000,
+        'interest_rate': 10.0,
+        'tenure_months': 18
+    }
+]
+
+DEFAULT_CROPS = [
+    {
+        'name': 'Rice',
+        'scientific_name': 'Oryza sativa',
+        'category': 'cereal',
+        'growing_season': 'kharif',
+        'maturity_days': 120,
+        'water_requirements': 'high'
+    },
+    {
+        'name': 'Wheat',
+        'scientific_name': 'Triticum aestivum',
+        'category': 'cereal',
+        'growing_season': 'rabi',
+        'maturity_days': 110,
+        'water_requirements': 'medium'
+    },
+    {
+        'name': 'Potato',
+        'scientific_name': 'Solanum tuberosum',
+        'category': 'vegetable',
+        'growing_season': 'rabi',
+        'maturity_days': 90,
+        'water_requirements': 'medium'
+    },
+    {
+        'name': 'Tomato',
+        'scientific_name': 'Solanum lycopersicum',
+        'category': 'vegetable',
+        'growing_season': 'rabi',
+        'maturity_days': 75,
+        'water_requirements': 'medium'
+    }
+]
+
+# Admin holds every permission
+ADMIN_ROLE = 'admin'
+
+SEEDED_TABLES = [
+    (Role, DEFAULT_ROLES),
+    (Permission, DEFAULT_PERMISSIONS),
+    (CourseCategory, DEFAULT_COURSE_CATEGORIES),
+    (JobCategory, DEFAULT_JOB_CATEGORIES),
+    (LoanProduct, DEFAULT_LOAN_PRODUCTS),
+    (Crop, DEFAULT_CROPS),
+]
+
+class SchemaMismatch(RuntimeError):
+    """The database lacks model columns that init_db() can't add by itself"""
+
+def init_db():
+    """Create missing tables and columns, seed default data and record the schema version.
+
+    Returns ('table.column' names added, (table, rows inserted) pairs). Raises
+    SchemaMismatch, without recording the version, when columns are still missing.
+    """
+    # Primary only: read replica binds get their tables through replication
+    db.create_all(bind_key=None)
+    added = add_missing_columns()
+    missing = missing_columns()
+    if missing:
+        raise SchemaMismatch(f"Columns missing from the database: {', '.join(missing)}. "
+                             'Add them with a migration, then run `flask init-db` again.')
+    counts = seed_defaults(force=True)
+    set_meta('schema_version', SCHEMA_VERSION)
+    db.session.commit()
+    return added, counts
+
+def missing_columns():
+    """'table.column' for every model column that an existing table lacks"""
+    inspector = inspect(db.engine)
+    return [
+        f'{table.name}.{column.name}'
+        for table, present in _existing_tables(inspector)
+        for column in table.columns if column.name not in present
+    ]
+
+def add_missing_columns():
+    """ALTER TABLE ... ADD COLUMN for model columns missing from existing tables.
+
+    Only columns that may be added to a table with rows are: nullable ones,
+    or NOT NULL ones with a server default. Their indexes are created too.
+    Returns the 'table.column' names added.
+    """
+    engine = db.engine
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as connection:
+        for table, present in _existing_tables(inspect(connection)):
+            columns = [
+                column for column in table.columns
+                if column.name not in present and not column.primary_key
+                and (column.nullable or column.server_default is not None)
+            ]
+            for column in columns:
+                spec = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {spec}')
+                added.append(f'{table.name}.{column.name}')
+            for index in table.indexes:
+                if any(column in columns for column in index.columns):
+                    index.create(connection, checkfirst=True)
+    return added
+
+def _existing_tables(inspector):
+    """(model table, names of the columns it has in the database) for tables that exist"""
+    for table in db.metadata.sorted_tables:
+        if inspector.has_table(table.name):
+            yield table, {column['name'] for column in inspector.get_columns(table.name)}
+
+def seed_defaults(force=False):
+    """Insert whichever default rows are missing; returns (table, rows inserted) pairs.
+
+    Skipped when the recorded seed_version is already current unless `force`.
+    """
+    if not force and get_meta('seed_version') == str(SEED_VERSION):
+        return []
+
+    counts = []
+    for model, rows in SEEDED_TABLES:
+        existing = set(db.session.scalars(select(model.name).where(model.name.in_([row['name'] for row in rows]))))
+        missing = [row for row in rows if row['name'] not in existing]
+        if missing:
+            db.session.execute(insert(model), missing)
+        counts.append((model.__tablename__, len(missing)))
+
+    granted = set(db.session.execute(
+        select(role_permissions.c.permission_id)
+        .join(Role, Role.id == role_permissions.c.role_id)
+        .where(Role.name == ADMIN_ROLE)
+    ).scalars())
+    admin_id = db.session.scalar(select(Role.id).where(Role.name == ADMIN_ROLE))
+    missing = [
+        {'role_id': admin_id, 'permission_id': permission_id}
+        for permission_id in db.session.scalars(select(Permission.id))
+        if permission_id not in granted
+    ] if admin_id is not None else []
+    if missing:
+        db.session.execute(insert(role_permissions), missing)
+    counts.append((role_permissions.name, len(missing)))
+
+    set_meta('seed_version', SEED_VERSION)
+    db.session.commit()
+    # Bulk inserts skip the mapper events that normally invalidate cached responses
+    response_cache.invalidate([model for model, _ in SEEDED_TABLES])
+    return counts
+
+def check_schema(app):
+    """Cheap boot-time check that `flask init-db` has run for this SCHEMA_VERSION.
+
+    Runs init_db() when AUTO_INIT_DB is set (development and tests), otherwise
+    logs a warning. Returns True when the schema was already current.
+    """
+    try:
+        current = get_meta('schema_version') == str(SCHEMA_VERSION)
+    except SQLAlchemyError:
+        db.session.rollback()
+        current = False
+    if current:
+        return True
+    if app.config.get('AUTO_INIT_DB'):
+        try:
+            init_db()
+        except SchemaMismatch as e:
+            db.session.rollback()
+            app.logger.error('%s', e)
+    else:
+        app.logger.warning('Database schema is not at version %s; run `flask init-db`', SCHEMA_VERSION)
+    return False
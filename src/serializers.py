@@ -0,0 +1,116 @@
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+# =============================================
+# ROW SERIALIZERS
+# =============================================
+#
+# The busiest list endpoints skip ORM instances altogether. A model's
+# RowSerializer lists the fields of its to_dict(): plain columns, and
+# computed fields that are either a column of a related row
+# ('project.title', read through an outer join) or a Derived value of
+# several such sources. select() builds the Core statement reading exactly
+# those columns, and dump() turns its result rows into the dicts to_dict()
+# would have built, through a function generated and compiled once per model
+# and field set. `flask check-serializers` compares the two paths on the
+# rows in the database.
+
+class Derived:
+    """A field computed by `function` from the values of `sources` (field specs, in order)"""
+
+    def __init__(self, function, *sources):
+        self.function = function
+        self.sources = sources
+
+class RowSerializer:
+    def __init__(self, columns, computed=None):
+        # to_dict() key -> column name, 'relationship.column' or Derived
+        self.fields = {**{column: column for column in columns}, **(computed or {})}
+        self.model = None
+        self._compiled = {}
+
+    def __set_name__(self, model, name):
+        self.model = model
+
+    def fields_from(self, args):
+        """Field names asked for by ?fields= in `args`, or None for all; raises ValueError for unknown names
+
+        Names come back in declaration order, so each subset compiles one serializer
+        however the client orders it.
+        """
+        names = {name.strip() for name in (args.get('fields') or '').split(',') if name.strip()}
+        unknown = sorted(names - set(self.fields))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(self.fields)}")
+        return tuple(name for name in self.fields if name in names) or None
+
+    def select(self, *extra, names=None):
+        """Core select() of the columns the fields read; `extra` columns are added after them"""
+        statement = self._compile(names)[0]
+        return statement.add_columns(*extra) if extra else statement
+
+    def dump(self, rows, names=None):
+        serialize = self._compile(names)[1]
+        return [serialize(row) for row in rows]
+
+    def _compile(self, names):
+        compiled = self._compiled.get(names)
+        if compiled is None:
+            compiled = self._compiled[names] = self._build(names or tuple(self.fields))
+        return compiled
+
+    def _build(self, names):
+        model, columns, positions, joins = self.model, [], {}, {}
+
+        def position(spec):
+            if spec not in positions:
+                if '.' in spec:
+                    relationship, column = spec.split('.', 1)
+                    if relationship not in joins:
+                        joins[relationship] = aliased(getattr(model, relationship).property.mapper.class_)
+                    columns.append(getattr(joins[relationship], column).label(f'{relationship}__{column}'))
+                else:
+                    columns.append(getattr(model, spec))
+                positions[spec] = len(columns) - 1
+            return f'row[{positions[spec]}]'
+
+        namespace, items = {}, []
+        for name in names:
+            spec = self.fields[name]
+            if isinstance(spec, Derived):
+                helper = f'_derived_{len(namespace)}'
+                namespace[helper] = spec.function
+                arguments = ', '.join(position(source) for source in spec.sources)
+                items.append(f'{name!r}: {helper}({arguments})')
+            else:
+                items.append(f'{name!r}: {position(spec)}')
+        source = 'def serialize(row):\n    return {' + ', '.join(items) + '}\n'
+        exec(compile(source, f'<{model.__name__} row serializer>', 'exec'), namespace)
+
+        statement = select(*columns).select_from(model)
+        for relationship, target in joins.items():
+            statement = statement.outerjoin(getattr(model, relationship).of_type(target))
+        return statement, namespace['serialize']
+
+def full_name(first_name, last_name):
+    """User.full_name from joined columns; None when there was no user to join"""
+    return f'{first_name} {last_name}' if first_name is not None else None
+
+def check_parity(session, model, limit=500):
+    """Compare model.row_serializer with to_dict() on up to `limit` rows.
+
+    Returns a list of (primary key, field, to_dict() value, row serializer value).
+    """
+    serializer = model.row_serializer
+    key = model.__mapper__.primary_key[0]
+    instances = session.query(model).order_by(key).limit(limit).all()
+    rows = session.execute(serializer.select().order_by(key).limit(limit)).all()
+    mismatches = []
+    for instance, row in zip(instances, serializer.dump(rows)):
+        expected = instance.to_dict()
+        for field in sorted(set(expected) | set(row)):
+            if expected.get(field, KeyError) != row.get(field, KeyError):
+                mismatches.append((instance.id, field, expected.get(field), row.get(field)))
+    if len(instances) != len(rows):
+        mismatches.append((None, 'row count', len(instances), len(rows)))
+    return mismatches
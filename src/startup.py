@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+# =============================================
+# STARTUP COST
+# =============================================
+#
+# Every gunicorn worker and `flask` command pays for importing the app and
+# running create_app(). These helpers measure both in fresh interpreters so
+# regressions show up in CI: `flask check-import-time` fails when importing
+# src.main takes longer than IMPORT_TIME_BUDGET_MS, and `flask bench-startup`
+# reports full cold starts.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(script, *options):
+    return subprocess.run([sys.executable, *options, '-c', script],
+                          capture_output=True, text=True, check=True, cwd=ROOT)
+
+def import_times(module='src.main'):
+    """Import `module` in a fresh interpreter under -X importtime.
+
+    Returns (total microseconds, [(cumulative microseconds, name)] for the
+    modules `module` imports directly, slowest first).
+    """
+    result = _run(f'import {module}', '-X', 'importtime')
+    total, direct = 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if name.strip() == module:
+            total = int(cumulative)
+        elif depth == 1:
+            direct.append((int(cumulative), name.strip()))
+    return total, sorted(direct, reverse=True)
+
+def benchmark_startup(config_name, runs=5):
+    """Cold-start seconds of `runs` fresh interpreters each importing and creating the app"""
+    script = (
+        'import time; started = time.perf_counter(); '
+        'from src.main import create_app; create_app({!r}); '
+        'print(time.perf_counter() - started)'
+    ).format(config_name)
+    return [float(_run(script).stdout.strip().splitlines()[-1]) for _ in range(runs)]
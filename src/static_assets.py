@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import time
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; without it only gzip variants are offered
+    brotli = None
+
+# =============================================
+# STATIC ASSETS
+# =============================================
+#
+# The built SPA is read once when the app is created into a manifest that
+# maps each URL path to its bytes, MIME type, content-hash ETag and
+# precompressed variants, so serving an asset or the index.html fallback is
+# a dictionary lookup with no filesystem access. Variants come from .br/.gz
+# files next to the originals when the build (or `flask compress-static`)
+# produced them, and are otherwise compressed at boot with cheaper settings.
+#
+# Files Vite emits with a content hash in their name (assets/index-CVK8lUh-.js:
+# build.assetsDir, then an 8-character base64url hash) never change under
+# that name and are sent with a year-long immutable Cache-Control. Everything
+# else, index.html and the files copied from public/ included, is revalidated
+# against its ETag on each use, however hash-like its name looks
+# (android-chrome-192x192.png).
+
+HASHED_NAME = re.compile(r'^assets/[^/]+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml',
+                      'image/svg+xml', 'application/wasm', 'font/ttf', 'font/otf')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # preferred first
+BUILD_QUALITY = {'br': 11, 'gzip': 9}  # `flask compress-static`
+BOOT_QUALITY = {'br': 5, 'gzip': 6}  # files without sidecars, compressed in every worker
+
+def _compress(data, encoding, quality):
+    if encoding == 'br':
+        return brotli.compress(data, quality=quality)
+    return gzip.compress(data, compresslevel=quality, mtime=0)
+
+def _available_encodings():
+    return [(encoding, suffix) for encoding, suffix in ENCODINGS if encoding == 'gzip' or brotli is not None]
+
+def _is_compressible(mimetype, size, min_size):
+    return size >= min_size and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+def _guess_type(path):
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if mimetype.startswith('text/') or mimetype == 'application/javascript':
+        mimetype += '; charset=utf-8'
+    return mimetype
+
+class StaticAsset:
+    __slots__ = ('body', 'content_type', 'etag', 'cache_control', 'variants')
+
+    def __init__(self, body, content_type, etag, cache_control, variants):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.cache_control = cache_control
+        self.variants = variants  # encoding -> (compressed body, etag)
+
+class StaticManifest:
+    def __init__(self, app=None):
+        self.assets = {}
+        self.index = None
+        self.immutable_max_age = 31536000
+        self.min_compress_size = 1024
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.immutable_max_age = app.config.get('STATIC_IMMUTABLE_MAX_AGE', self.immutable_max_age)
+        self.min_compress_size = app.config.get('STATIC_COMPRESS_MIN_SIZE', self.min_compress_size)
+        self.build(app.static_folder)
+        app.extensions['static_manifest'] = self
+
+    def build(self, folder):
+        """Read every file under `folder` into the manifest, replacing what was there"""
+        assets = {}
+        sidecars = tuple(suffix for _, suffix in ENCODINGS)
+        for root, _, filenames in os.walk(folder or ''):
+            for filename in filenames:
+                if filename.endswith(sidecars):
+                    continue
+                path = os.path.join(root, filename)
+                url_path = os.path.relpath(path, folder).replace(os.sep, '/')
+                assets[url_path] = self._load(path, url_path)
+        self.assets = assets
+        self.index = assets.get('index.html')
+
+    def _load(self, path, url_path):
+        with open(path, 'rb') as source:
+            body = source.read()
+        mimetype = _guess_type(path)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        variants = {}
+        if _is_compressible(mimetype, len(body), self.min_compress_size):
+            for encoding, suffix in _available_encodings():
+                if os.path.exists(path + suffix):
+                    with open(path + suffix, 'rb') as source:
+                        compressed = source.read()
+                else:
+                    compressed = _compress(body, encoding, BOOT_QUALITY[encoding])
+                if len(compressed) < len(body):
+                    variants[encoding] = (compressed, f'{digest}-{encoding}')
+        if HASHED_NAME.search(url_path):
+            cache_control = f'public, max-age={self.immutable_max_age}, immutable'
+        else:
+            cache_control = 'no-cache'
+        return StaticAsset(body, mimetype, digest, cache_control, variants)
+
+    def response(self, asset):
+        """Serve `asset` in the best encoding the client accepts, or 304 if it has it"""
+        body, etag, encoding = asset.body, asset.etag, None
+        if asset.variants:
+            accepted = request.accept_encodings
+            for candidate in asset.variants:
+                if accepted[candidate]:
+                    body, etag = asset.variants[candidate]
+                    encoding = candidate
+                    break
+
+        headers = {'Cache-Control': asset.cache_control, 'ETag': f'"{etag}"'}
+        if asset.variants:
+            headers['Vary'] = 'Accept-Encoding'
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return Response(body, content_type=asset.content_type, headers=headers)
+
+    def compress_to_disk(self, folder):
+        """Write .br/.gz sidecars at full quality next to each compressible file in `folder`"""
+        written = 0
+        sidecars = tuple(suffix for _, suffix in ENCODINGS)
+        for root, _, filenames in os.walk(folder or ''):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                if filename.endswith(sidecars):
+                    continue
+                with open(path, 'rb') as source:
+                    body = source.read()
+                if not _is_compressible(_guess_type(path), len(body), self.min_compress_size):
+                    continue
+                for encoding, suffix in _available_encodings():
+                    compressed = _compress(body, encoding, BUILD_QUALITY[encoding])
+                    if len(compressed) < len(body):
+                        with open(path + suffix, 'wb') as target:
+                            target.write(compressed)
+                        written += 1
+        return written
+
+static_manifest = StaticManifest()
+
+def benchmark(app, seconds=2.0):
+    """Requests/sec through the `serve` route for an asset, index.html and SPA deep links.
+
+    Returns [(label, path, requests completed, elapsed seconds)].
+    """
+    client = app.test_client()
+    assets = [path for path in static_manifest.assets if path != 'index.html']
+    hashed = [path for path in assets if 'immutable' in static_manifest.assets[path].cache_control]
+    cases = [('asset hit', '/' + (hashed or assets or ['index.html'])[0]),
+             ('index.html', '/'),
+             ('SPA fallback', '/projects/123/edit')]
+    headers = {'Accept-Encoding': 'br, gzip'}
+    results = []
+    for label, path in cases:
+        completed = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            client.get(path, headers=headers)
+            completed += 1
+        results.append((label, path, completed, time.perf_counter() - started))
+    return results
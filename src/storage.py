@@ -0,0 +1,213 @@
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from werkzeug.utils import secure_filename
+from src.models.user import db
+from src.models.uploads import UploadedFile, UploadSession
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; concurrent appends to one session are then unguarded
+    fcntl = None
+
+# =============================================
+# FILE STORAGE
+# =============================================
+#
+# Uploads are streamed to disk CHUNK_SIZE bytes at a time, so memory stays
+# flat whatever the file size, and hashed with SHA-256 on the way through.
+# Finished files are stored once per distinct content under
+# UPLOAD_FOLDER/objects/<sha256 prefix>/<sha256>; every upload gets its own
+# UploadedFile row and stable /api/files/<id> URL pointing at that blob.
+#
+# Resumable uploads open an UploadSession, then append raw chunks at the
+# offset the server reports (the size of the partial file on disk), so a
+# client whose connection dropped asks for the offset and carries on from
+# there. The running hash of each session is kept in memory between chunks;
+# a worker that doesn't have it re-hashes the partial file once.
+
+CHUNK_SIZE = 64 * 1024
+SESSION_LIFETIME = timedelta(hours=24)
+MAX_CACHED_HASHES = 256
+
+class OffsetMismatch(ValueError):
+    """A chunk was sent for an offset other than the session's current one"""
+
+    def __init__(self, offset):
+        super().__init__(f'Upload is at offset {offset}')
+        self.offset = offset
+
+_hashes = OrderedDict()  # session id -> (sha256 object, offset it has consumed)
+_hashes_lock = threading.Lock()
+
+def _folder(*parts):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], *parts)
+
+def blob_path(sha256):
+    return _folder('objects', sha256[:2], sha256[2:4], sha256)
+
+def partial_path(session_id):
+    return _folder('partial', session_id)
+
+def max_upload_size():
+    return current_app.config.get('UPLOAD_MAX_SIZE', 256 * 1024 * 1024)
+
+def _copy(stream, target, hasher, limit):
+    """Copy `stream` into `target` while hashing it; refuses to go past `limit` bytes"""
+    copied = 0
+    while True:
+        chunk = stream.read(min(CHUNK_SIZE, limit - copied + 1))
+        if not chunk:
+            return copied
+        if copied + len(chunk) > limit:
+            raise ValueError('Upload is larger than its declared or allowed size')
+        target.write(chunk)
+        hasher.update(chunk)
+        copied += len(chunk)
+
+def _store_blob(path, sha256):
+    """Move a finished file into content-addressed storage, keeping any existing copy"""
+    destination = blob_path(sha256)
+    if os.path.exists(destination):
+        os.remove(path)
+        return
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(path, destination)
+
+def store_stream(stream, owner_id, filename, content_type=None, purpose='general', is_public=False):
+    """Stream a whole file into storage and add its UploadedFile to the session (caller commits)"""
+    os.makedirs(_folder('partial'), exist_ok=True)
+    path = partial_path(f'{uuid.uuid4()}.tmp')
+    hasher = hashlib.sha256()
+    try:
+        with open(path, 'wb') as target:
+            size = _copy(stream, target, hasher, max_upload_size())
+        _store_blob(path, hasher.hexdigest())
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    uploaded = UploadedFile(
+        owner_id=owner_id,
+        filename=secure_filename(filename) or 'file',
+        content_type=content_type,
+        size=size,
+        sha256=hasher.hexdigest(),
+        purpose=purpose,
+        is_public=is_public
+    )
+    db.session.add(uploaded)
+    return uploaded
+
+def start_session(owner_id, filename, size, content_type=None, purpose='general', is_public=False):
+    """Open a resumable upload of `size` bytes (caller commits)"""
+    if size < 0 or size > max_upload_size():
+        raise ValueError(f'size must be between 0 and {max_upload_size()} bytes')
+    session = UploadSession(
+        owner_id=owner_id,
+        filename=secure_filename(filename) or 'file',
+        content_type=content_type,
+        size=size,
+        purpose=purpose,
+        is_public=is_public,
+        expires_at=datetime.utcnow() + SESSION_LIFETIME
+    )
+    db.session.add(session)
+    db.session.flush()
+    os.makedirs(_folder('partial'), exist_ok=True)
+    open(partial_path(session.id), 'wb').close()
+    return session
+
+def session_offset(session):
+    """Bytes received so far"""
+    if session.file_id:
+        return session.size
+    path = partial_path(session.id)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def append_chunk(session, offset, stream):
+    """Append `stream` at `offset`; completes the upload once every byte has arrived.
+
+    Returns the new offset. Raises OffsetMismatch when `offset` is not where
+    the upload stands, or another request is appending to it right now.
+    """
+    if session.file_id:
+        raise OffsetMismatch(session.size)
+    path = partial_path(session.id)
+    with open(path, 'ab') as target:
+        if fcntl is not None:
+            try:
+                fcntl.flock(target, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise OffsetMismatch(session_offset(session))
+        current = os.path.getsize(path)
+        if offset != current:
+            raise OffsetMismatch(current)
+        hasher = _session_hash(session.id, current)
+        try:
+            current += _copy(stream, target, hasher, session.size - current)
+        except BaseException:
+            _forget_hash(session.id)
+            raise
+        target.flush()
+
+    if current < session.size:
+        _remember_hash(session.id, hasher, current)
+        return current
+    _finish(session, hasher)
+    return current
+
+def _finish(session, hasher):
+    sha256 = hasher.hexdigest()
+    _store_blob(partial_path(session.id), sha256)
+    _forget_hash(session.id)
+    session.file = UploadedFile(
+        owner_id=session.owner_id,
+        filename=session.filename,
+        content_type=session.content_type,
+        size=session.size,
+        sha256=sha256,
+        purpose=session.purpose,
+        is_public=session.is_public
+    )
+
+def _session_hash(session_id, offset):
+    with _hashes_lock:
+        entry = _hashes.pop(session_id, None)
+    if entry is not None and entry[1] == offset:
+        return entry[0]
+    # Another worker took the earlier chunks (or a chunk broke off): catch up from disk
+    hasher = hashlib.sha256()
+    with open(partial_path(session_id), 'rb') as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher
+
+def _remember_hash(session_id, hasher, offset):
+    with _hashes_lock:
+        _hashes[session_id] = (hasher, offset)
+        while len(_hashes) > MAX_CACHED_HASHES:
+            _hashes.popitem(last=False)
+
+def _forget_hash(session_id):
+    with _hashes_lock:
+        _hashes.pop(session_id, None)
+
+def purge_expired_sessions():
+    """Drop unfinished upload sessions past their expiry along with their partial files"""
+    expired = UploadSession.query.filter(
+        UploadSession.file_id.is_(None),
+        UploadSession.expires_at < datetime.utcnow()
+    ).all()
+    for session in expired:
+        path = partial_path(session.id)
+        if os.path.exists(path):
+            os.remove(path)
+        _forget_hash(session.id)
+        db.session.delete(session)
+    db.session.commit()
+    return len(expired)
@@ -0,0 +1,56 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+import pytest
+from src.config import SQLiteProfile, TestingConfig, config
+from src.main import create_app
+from src.models.user import User, db
+
+_emails = itertools.count(1)
+
+class SQLiteTestingConfig(SQLiteProfile, TestingConfig):
+    """Testing with the Development/Production engine setup: WAL, read pool, single writer"""
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Build testing apps on a temporary SQLite file; tables and default data are created at boot"""
+    apps = []
+
+    def make_app(config_class=TestingConfig):
+        class PytestConfig(config_class):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+            UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        name = f'pytest-{config_class.__name__}'
+        monkeypatch.setitem(config, name, PytestConfig)
+        apps.append(create_app(name))
+        return apps[-1]
+
+    yield make_app
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def sqlite_app(make_app):
+    return make_app(SQLiteTestingConfig)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def make_user(**fields):
+    """An unsaved User with a unique email"""
+    number = next(_emails)
+    fields.setdefault('email', f'user{number}@example.com')
+    fields.setdefault('first_name', 'User')
+    fields.setdefault('last_name', str(number))
+    fields.setdefault('password_hash', 'x')
+    return User(**fields)
@@ -0,0 +1,38 @@
+import pytest
+from conftest import make_user
+from src.identity import issue_access_token
+from src.models.healthcare import BloodDonor, BloodRequest
+from src.models.user import db
+
+@pytest.fixture
+def blood_request(app):
+    with app.app_context():
+        requester = make_user()
+        blood_request = BloodRequest(requester=requester, blood_group='A+')
+        db.session.add_all([requester, blood_request])
+        db.session.add_all(BloodDonor(user=make_user(), blood_group=group) for group in ('A+', 'A-', 'O-'))
+        db.session.commit()
+        return {'id': blood_request.id, 'headers': {'Authorization': f'Bearer {issue_access_token(requester)}'}}
+
+@pytest.mark.parametrize('limit, count', [(-1, 1), (0, 1), (2, 2), (500, 3)])
+def test_matching_donor_limit_is_clamped(client, blood_request, limit, count):
+    response = client.get(f"/api/healthcare/blood-requests/{blood_request['id']}/donors?limit={limit}",
+                          headers=blood_request['headers'])
+    assert response.status_code == 200
+    assert len(response.json['donors']) == count
+
+@pytest.mark.parametrize('radius, status', [('nan', 400), ('inf', 400), ('-5', 200), ('100000', 200)])
+def test_hospital_fallback_radius_is_validated(app, client, radius, status):
+    with app.app_context():
+        requester = make_user()
+        blood_request = BloodRequest(requester=requester, blood_group='A+', location_coordinates='23.8103,90.4125')
+        db.session.add_all([requester, blood_request])
+        db.session.add(BloodDonor(user=make_user(), blood_group='A+', location_coordinates='23.8203,90.4125'))
+        db.session.commit()
+        url = f'/api/healthcare/blood-requests/{blood_request.id}/donors?radius_km={radius}'
+        headers = {'Authorization': f'Bearer {issue_access_token(requester)}'}
+    response = client.get(url, headers=headers)
+    assert response.status_code == status
+    if status == 200:
+        # A negative radius is clamped to 0 km, which leaves out the donor 1.1 km away
+        assert len(response.json['donors']) == (0 if radius == '-5' else 1)
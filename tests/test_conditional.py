@@ -0,0 +1,38 @@
+from datetime import date, datetime, timedelta
+import pytest
+from conftest import make_user
+from src.models.agriculture import AgriculturalAdvisory
+from src.models.community import Event, Project
+from src.models.user import User, db
+
+@pytest.fixture
+def owner_id(app):
+    with app.app_context():
+        owner = make_user(first_name='Rahim')
+        db.session.add_all([
+            Project(title='Clean water', manager=owner),
+            Event(title='Health camp', organizer=owner, start_datetime=datetime.utcnow() + timedelta(days=7)),
+            AgriculturalAdvisory(title='Rain ahead', issuer=owner, valid_until=date.today() + timedelta(days=7)),
+        ])
+        db.session.commit()
+        return owner.id
+
+@pytest.mark.parametrize('url, key, name_field', [
+    ('/api/projects/', 'projects', 'manager_name'),
+    ('/api/community/events', 'events', 'organizer_name'),
+    ('/api/agriculture/advisories', 'advisories', 'issuer_name'),
+])
+def test_renaming_a_related_user_changes_the_etag(app, client, owner_id, url, key, name_field):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.get(User, owner_id).first_name = 'Karim'
+        db.session.commit()
+
+    renamed = client.get(url, headers={'If-None-Match': etag})
+    assert renamed.status_code == 200
+    assert renamed.headers['ETag'] != etag
+    assert renamed.json[key][0][name_field].startswith('Karim ')
@@ -0,0 +1,60 @@
+import random
+import threading
+from decimal import Decimal
+from conftest import make_user
+from src.identity import issue_access_token
+from src.models.community import Donation, PaymentTransaction, Project
+from src.models.counters import reconcile_counters
+from src.models.user import db
+
+DONATIONS = 200
+THREADS = 8
+
+def test_concurrent_confirmations_credit_each_donation_once(sqlite_app):
+    with sqlite_app.app_context():
+        donor = make_user()
+        project = Project(title='Flood relief', manager=make_user(), target_amount=Decimal('100000'))
+        donations = [
+            Donation(project=project, donor=donor, amount=Decimal(index % 50 + 1) + Decimal('0.25'), payment_status='pending')
+            for index in range(DONATIONS)
+        ]
+        db.session.add_all([donor, project, *donations])
+        db.session.flush()
+        db.session.add_all(PaymentTransaction(donation_id=donation.id, amount=donation.amount, status='pending')
+                           for donation in donations)
+        db.session.commit()
+        project_id = project.id
+        donation_ids = [donation.id for donation in donations]
+        expected = sum(donation.amount for donation in donations)
+        headers = {'Authorization': f'Bearer {issue_access_token(donor)}'}
+
+    statuses = []
+    statuses_lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def confirm_all(seed):
+        # Every thread confirms every donation, in its own order
+        client = sqlite_app.test_client()
+        order = donation_ids[:]
+        random.Random(seed).shuffle(order)
+        start.wait()
+        for donation_id in order:
+            response = client.post(f'/api/projects/donations/{donation_id}/confirm', headers=headers)
+            with statuses_lock:
+                statuses.append((response.status_code, response.get_json()['message']))
+
+    threads = [threading.Thread(target=confirm_all, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {status for status, _ in statuses} == {200}
+    messages = [message for _, message in statuses]
+    assert messages.count('Donation confirmed successfully') == DONATIONS
+    assert messages.count('Donation already confirmed') == DONATIONS * (THREADS - 1)
+
+    with sqlite_app.app_context():
+        assert db.session.get(Project, project_id).raised_amount == expected
+        assert PaymentTransaction.query.filter_by(status='success').count() == DONATIONS
+        assert [(name, corrected) for name, corrected in reconcile_counters() if corrected] == []
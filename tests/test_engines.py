@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy import select, text
+from src.engines import READ_ENGINE
+from src.models.user import User, db
+
+MAINTENANCE_COMMANDS = [
+    'init-db', 'seed --force', 'reconcile-counters', 'reindex-search', 'reindex-locations',
+    'refresh-donor-eligibility', 'purge-uploads', 'check-serializers',
+]
+
+def test_only_selects_use_the_read_pool(sqlite_app):
+    with sqlite_app.app_context():
+        reader = sqlite_app.extensions[READ_ENGINE]
+        assert db.session.get_bind(clause=select(User.id)) is reader
+        assert db.session.get_bind(clause=text('DELETE FROM search_terms')) is db.engine
+        db.session.rollback()
+        assert db.session.connection().engine is db.engine
+
+@pytest.mark.parametrize('command', MAINTENANCE_COMMANDS)
+def test_maintenance_commands_run_under_the_sqlite_profile(sqlite_app, command):
+    result = sqlite_app.test_cli_runner().invoke(args=command.split())
+    assert result.exit_code == 0, result.output
@@ -0,0 +1,48 @@
+from decimal import Decimal
+import pytest
+from conftest import make_user
+from src.models.business import JobPosting
+from src.models.community import Project
+from src.models.education import Course
+from src.models.user import db
+
+# Default list items are the model's to_dict(), deferred fields included;
+# only clients that ask for ?compact=true get them without.
+
+LISTS = [
+    ('/api/education/courses', 'courses', Course),
+    ('/api/business/jobs', 'jobs', JobPosting),
+    ('/api/projects/', 'projects', Project),
+]
+
+@pytest.fixture
+def listed(app):
+    with app.app_context():
+        owner = make_user()
+        db.session.add_all([
+            Course(title='Soil health', instructor=owner, description='Cover crops and compost', is_published=True,
+                   prerequisites='None'),
+            JobPosting(title='Field officer', employer=owner, description='Visit farms in Sylhet'),
+            Project(title='Tube wells', manager=owner, description='Safe water', target_amount=Decimal('1000'),
+                    images=['/api/files/1'], documents=[]),
+        ])
+        db.session.commit()
+        return {model: model.query.one().to_dict() for _, _, model in LISTS}
+
+@pytest.mark.parametrize('url, key, model', LISTS, ids=lambda value: getattr(value, '__name__', None))
+def test_default_list_items_are_unchanged(client, listed, url, key, model):
+    [item] = client.get(url).json[key]
+    expected = listed[model]
+    assert set(item) == set(expected)
+    assert set(model.api_fields.deferred) <= set(item)
+    assert item['description'] == expected['description']
+
+@pytest.mark.parametrize('url, key, model', LISTS, ids=lambda value: getattr(value, '__name__', None))
+def test_compact_list_items_leave_out_deferred_fields(client, listed, url, key, model):
+    deferred = set(model.api_fields.deferred)
+    [item] = client.get(f'{url}?compact=true').json[key]
+    assert not deferred & set(item)
+    first = model.api_fields.deferred[0]
+    [item] = client.get(f'{url}?compact=true&expand={first}').json[key]
+    assert item[first] == listed[model][first]
+    assert not (deferred - {first}) & set(item)
@@ -0,0 +1,12 @@
+import pytest
+
+@pytest.mark.parametrize('url', ['/api/healthcare/medical-camps', '/api/healthcare/blood-donors'])
+@pytest.mark.parametrize('radius', ['nan', 'inf', '-inf'])
+def test_non_finite_radius_is_rejected(client, url, radius):
+    response = client.get(f'{url}?near=23.8103,90.4125&radius_km={radius}')
+    assert response.status_code == 400
+    assert 'radius_km' in response.json['error']
+
+@pytest.mark.parametrize('radius', ['-5', '0', '10', '100000'])
+def test_finite_radius_is_clamped(client, radius):
+    assert client.get(f'/api/healthcare/medical-camps?near=23.8103,90.4125&radius_km={radius}').status_code == 200
@@ -0,0 +1,37 @@
+from conftest import make_user
+from src.identity import issue_access_token
+from src.models.user import User, db
+
+# Each test client request runs in this process, which stands in for one
+# worker; a Core UPDATE bumps authz_version the way another worker's commit
+# would, without touching this worker's cached version.
+
+def bump_elsewhere(user_id):
+    db.session.execute(User.__table__.update().where(User.id == user_id)
+                       .values(authz_version=User.__table__.c.authz_version + 1))
+    db.session.commit()
+
+def test_token_issued_after_another_workers_bump_is_accepted(app, client):
+    with app.app_context():
+        user = make_user()
+        db.session.add(user)
+        db.session.commit()
+        stale = {'Authorization': f'Bearer {issue_access_token(user)}'}
+    assert client.get('/api/notifications', headers=stale).status_code == 200  # caches version 1
+
+    with app.app_context():
+        bump_elsewhere(user.id)
+        fresh = {'Authorization': f'Bearer {issue_access_token(db.session.get(User, user.id))}'}
+    assert client.get('/api/notifications', headers=fresh).status_code == 200
+    # Reading the newer version also revokes the token issued before the bump
+    assert client.get('/api/notifications', headers=stale).status_code == 401
+
+def test_token_of_deleted_account_is_revoked(app, client):
+    with app.app_context():
+        user = make_user()
+        db.session.add(user)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {issue_access_token(user)}'}
+        db.session.execute(User.__table__.delete().where(User.id == user.id))
+        db.session.commit()
+    assert client.get('/api/notifications', headers=headers).status_code == 401
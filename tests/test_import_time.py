@@ -0,0 +1,13 @@
+import subprocess
+import sys
+from src.main import BLUEPRINTS, MODEL_MODULES
+from src.startup import ROOT
+
+# The wall-clock budget is enforced by `flask check-import-time`, where the
+# machine is known; here only what importing src.main pulls in is checked.
+
+def test_importing_main_defers_models_routes_and_commands():
+    deferred = [*MODEL_MODULES, *(module for module, _, _ in BLUEPRINTS), 'src.cli', 'src.seed']
+    script = f'import sys, src.main; print(" ".join(m for m in {deferred!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert result.stdout.split() == []
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime, timedelta
+import pytest
+from conftest import make_user
+from src.models.business import JobPosting
+from src.models.community import Forum, ForumPost
+from src.models.user import db
+
+@pytest.fixture
+def forum_id(app):
+    """Posts and jobs whose is_pinned and created_at sort keys include NULLs and ties"""
+    with app.app_context():
+        author, forum = make_user(), Forum(name='General')
+        start = datetime(2026, 1, 1)
+        for index in range(14):
+            post = ForumPost(forum=forum, author=author, title=f'Post {index}', content='...',
+                             is_pinned=[True, False, None][index % 3],
+                             created_at=start + timedelta(hours=index // 2))
+            job = JobPosting(employer=author, title=f'Job {index}', created_at=start + timedelta(hours=index // 2))
+            db.session.add_all([post, job])
+        db.session.flush()
+        # The column defaults fill in NULLs on insert, so clear some afterwards
+        for model in (ForumPost, JobPosting):
+            model.query.filter(model.id.in_([4, 5, 9])).update({'created_at': None}, synchronize_session=False)
+        db.session.commit()
+        return forum.id
+
+def encode(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+@pytest.mark.parametrize('url, key', [
+    ('/api/community/forums/{forum_id}/posts', 'posts'),
+    ('/api/business/jobs', 'jobs'),
+])
+def test_cursor_pages_cover_rows_with_null_sort_keys(client, forum_id, url, key):
+    url = url.format(forum_id=forum_id)
+    expected = [item['id'] for item in client.get(f'{url}?per_page=100').json[key]]
+    assert len(expected) == 14
+
+    seen, cursor = [], ''
+    while cursor is not None:
+        response = client.get(f'{url}?per_page=3&cursor={cursor}')
+        assert response.status_code == 200
+        seen += [item['id'] for item in response.json[key]]
+        cursor = response.json['next_cursor']
+    assert seen == expected
+
+@pytest.mark.parametrize('values', [
+    [True, '2026-01-01T00:00:00', {'id': 1}],
+    [True, '2026-01-01T00:00:00', [1]],
+    [True, '2026-01-01T00:00:00', True],
+    [True, '2026-01-01T00:00:00', None],
+    ['yes', '2026-01-01T00:00:00', 1],
+    [True, 20260101, 1],
+    [True, '2026-01-01T00:00:00'],
+])
+def test_malformed_cursor_values_are_rejected(client, forum_id, values):
+    response = client.get(f'/api/community/forums/{forum_id}/posts?cursor={encode(values)}')
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid cursor'}
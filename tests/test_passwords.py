@@ -0,0 +1,27 @@
+from werkzeug.security import generate_password_hash
+from conftest import make_user
+from src.models.user import User, db
+from src.passwords import PasswordHashingBusy, password_hasher
+
+OLD_METHOD = 'pbkdf2:sha256:500'  # TestingConfig hashes with 1000 iterations
+
+def test_busy_pool_postpones_the_rehash_but_not_the_login(app, client, monkeypatch):
+    with app.app_context():
+        user = make_user(password_hash=generate_password_hash('correct horse', OLD_METHOD))
+        db.session.add(user)
+        db.session.commit()
+        user_id, email = user.id, user.email
+
+    def busy(password):
+        raise PasswordHashingBusy('Too many password checks in progress, try again shortly')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(password_hasher, 'hash', busy)
+        response = client.post('/api/auth/login', json={'email': email, 'password': 'correct horse'})
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(User, user_id).password_hash.startswith(OLD_METHOD + '$')
+
+    assert client.post('/api/auth/login', json={'email': email, 'password': 'correct horse'}).status_code == 200
+    with app.app_context():
+        assert not password_hasher.needs_rehash(db.session.get(User, user_id).password_hash)
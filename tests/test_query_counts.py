@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from conftest import make_user
+from src.identity import issue_access_token
+from src.models.agriculture import AgriculturalProduct, Crop, Farmer, ProductInquiry
+from src.models.business import JobApplication, JobCategory, JobPosting
+from src.models.community import (
+    Donation, Event, EventRegistration, Forum, ForumPost, ForumReply, Project, ProjectExpense,
+    VolunteerApplication, VolunteerOpportunity
+)
+from src.models.education import Course, CourseCategory, CourseModule, Enrollment
+from src.models.user import Role, db
+
+# Statements per list request must not depend on the page size: each row has
+# its own related users and children, so a lazy load left in to_dict() shows
+# up as extra statements on the larger page.
+
+ROWS = 12
+PER_PAGE = 5
+
+LIST_ROUTES = [
+    '/api/projects/',
+    '/api/education/courses',
+    '/api/business/jobs',
+    '/api/community/events',
+    '/api/community/volunteer-opportunities',
+    '/api/agriculture/products',
+    '/api/community/forums/{forum_id}/posts',
+    '/api/users/',
+]
+
+@pytest.fixture
+def listed(app):
+    """ROWS rows behind every list route, plus an admin token for /api/users/"""
+    with app.app_context():
+        admin = make_user(roles=[Role.query.filter_by(name='admin').one()])
+        forum = Forum(name='General')
+        db.session.add_all([admin, forum])
+        start = datetime.utcnow() + timedelta(days=30)
+        for index in range(ROWS):
+            owner, member = make_user(), make_user()
+            project = Project(title=f'Project {index}', manager=owner, target_amount=Decimal('1000'))
+            db.session.add_all([
+                project,
+                Donation(project=project, donor=member, amount=Decimal('10.00')),
+                ProjectExpense(project=project, amount=Decimal('5.00')),
+            ])
+            course = Course(title=f'Course {index}', instructor=owner, is_published=True,
+                            category=CourseCategory(name=f'Category {index}'))
+            db.session.add_all([course, CourseModule(course=course, title='Module'), Enrollment(course=course, student=member)])
+            job = JobPosting(title=f'Job {index}', employer=owner, category=JobCategory(name=f'Jobs {index}'))
+            db.session.add_all([job, JobApplication(job=job, applicant=member)])
+            event = Event(title=f'Event {index}', organizer=owner, start_datetime=start + timedelta(hours=index))
+            db.session.add_all([event, EventRegistration(event=event, participant=member)])
+            opportunity = VolunteerOpportunity(title=f'Opportunity {index}', organization=owner)
+            db.session.add_all([opportunity, VolunteerApplication(opportunity=opportunity, volunteer=member)])
+            product = AgriculturalProduct(title=f'Product {index}', farmer=Farmer(user=owner), crop=Crop(name=f'Crop {index}'))
+            db.session.add_all([product, ProductInquiry(product=product, buyer=member)])
+            post = ForumPost(forum=forum, author=owner, title=f'Post {index}', content='...')
+            db.session.add_all([post, ForumReply(post=post, author=member, content='...')])
+        db.session.commit()
+        return {'forum_id': forum.id, 'headers': {'Authorization': f'Bearer {issue_access_token(admin)}'}}
+
+def count_statements(client, url, headers):
+    with client:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        return len(get_recorded_queries())
+
+@pytest.mark.parametrize('route', LIST_ROUTES)
+def test_statement_count_does_not_grow_with_page_size(client, listed, route):
+    url = route.format(forum_id=listed['forum_id'])
+    # Warm the per-process caches (role map, token versions) that only the first request fills
+    count_statements(client, url, listed['headers'])
+    # Exact totals, so a cached COUNT(*) from the first request doesn't lower the second
+    counts = [
+        count_statements(client, f'{url}?per_page={per_page}&totals=exact', listed['headers'])
+        for per_page in (PER_PAGE, 2 * PER_PAGE)
+    ]
+    assert counts[0] == counts[1]
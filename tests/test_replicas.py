@@ -0,0 +1,60 @@
+import shutil
+import time
+import pytest
+from conftest import make_user
+from src.config import TestingConfig
+from src.engines import REPLICAS
+from src.identity import current_authz_version
+from src.models.agriculture import Crop
+from src.models.business import JobPosting
+from src.models.user import Role, db, permission_map
+
+@pytest.fixture
+def replica_app(make_app, tmp_path):
+    """An app whose replica is a copy of the primary taken at boot, and never catches up"""
+    class ReplicaTestingConfig(TestingConfig):
+        SQLALCHEMY_BINDS = {'replica': f'sqlite:///{tmp_path / "replica.db"}'}
+        READ_REPLICA_BINDS = ['replica']
+        REPLICA_LAG_CHECK_INTERVAL = 3600
+
+    app = make_app(ReplicaTestingConfig)
+    shutil.copy(tmp_path / 'test.db', tmp_path / 'replica.db')
+    replicas = app.extensions[REPLICAS]
+    replicas.healthy, replicas.checked_at = ['replica'], time.monotonic()
+    return app
+
+def test_cached_responses_are_filled_from_the_primary(replica_app):
+    client = replica_app.test_client()
+    assert 'Jute' not in [crop['name'] for crop in client.get('/api/agriculture/crops').json['crops']]
+    with replica_app.app_context():
+        crop = Crop(name='Jute')
+        db.session.add(crop)
+        db.session.commit()
+
+    response = client.get('/api/agriculture/crops')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert 'Jute' in [crop['name'] for crop in response.json['crops']]
+
+def test_cached_totals_are_counted_on_the_primary(replica_app):
+    client = replica_app.test_client()
+    assert client.get('/api/business/jobs?totals=cached').json['total'] == 0
+    with replica_app.app_context():
+        db.session.add(JobPosting(title='Field officer', employer=make_user()))
+        db.session.commit()
+    response = client.get('/api/business/jobs?totals=cached')
+    # The page itself still comes from the lagging replica; only the cached total must not
+    assert (response.json['jobs'], response.json['total']) == ([], 1)
+
+def test_authorization_caches_are_filled_from_the_primary(replica_app):
+    with replica_app.app_context():
+        admin = Role.query.filter_by(name='admin').one()
+        revoked = admin.permissions.pop()
+        user = make_user()
+        db.session.add(user)
+        db.session.commit()
+        admin_id, revoked_name, user_id = admin.id, revoked.name, user.id
+
+    # A GET may read from the replica, which still has the old grants and no such user
+    with replica_app.test_request_context('/api/projects/', method='GET'):
+        assert revoked_name not in permission_map().roles[admin_id]
+        assert current_authz_version(user_id) == 1
@@ -0,0 +1,43 @@
+import pytest
+from conftest import make_user
+from src.identity import issue_access_token
+from src.models.business import JobPosting
+from src.models.search import search_documents
+from src.models.user import db
+
+@pytest.fixture
+def headers(app):
+    with app.app_context():
+        user = make_user()
+        db.session.add(user)
+        db.session.commit()
+        return {'Authorization': f'Bearer {issue_access_token(user)}'}
+
+@pytest.mark.parametrize('args, page, per_page', [
+    ('per_page=0', 1, 1),
+    ('per_page=-5&page=-2', 1, 1),
+    ('per_page=100000', 1, 100),
+    ('page=0&per_page=10', 1, 10),
+])
+def test_search_paging_is_clamped(client, headers, args, page, per_page):
+    response = client.get(f'/api/search?q=rice&{args}', headers=headers)
+    assert response.status_code == 200
+    assert (response.json['current_page'], response.json['per_page']) == (page, per_page)
+
+def test_location_filter_does_not_match_on_sound_keys(app, client):
+    with app.app_context():
+        employer = make_user()
+        db.session.add_all([
+            JobPosting(title='Office clerk', employer=employer, location_address='Dhaka'),
+            JobPosting(title='Dock hand', employer=employer, location_address='Dock Road, Chattogram'),
+        ])
+        db.session.commit()
+    response = client.get('/api/business/jobs?location=dhaka')
+    assert [job['location_address'] for job in response.json['jobs']] == ['Dhaka']
+
+def test_ranked_search_still_matches_other_spellings(app):
+    with app.app_context():
+        db.session.add(JobPosting(title='Dhaka office clerk', employer=make_user()))
+        db.session.commit()
+        documents, _ = search_documents('ঢাকা')
+        assert [document.title for document in documents] == ['Dhaka office clerk']
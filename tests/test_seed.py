@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import text
+from src.models.meta import SCHEMA_VERSION, get_meta, set_meta
+from src.models.user import db
+from src.seed import SchemaMismatch, init_db, missing_columns
+
+def drop_columns(*statements):
+    with db.engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+def test_init_db_adds_columns_that_existing_tables_lack(app):
+    with app.app_context():
+        drop_columns(
+            'DROP INDEX ix_farms_geohash',
+            'ALTER TABLE farms DROP COLUMN geohash',
+            'ALTER TABLE users DROP COLUMN authz_version',
+            'ALTER TABLE projects DROP COLUMN donation_count',
+        )
+        assert sorted(missing_columns()) == ['farms.geohash', 'projects.donation_count', 'users.authz_version']
+
+        added, _ = init_db()
+        assert sorted(added) == ['farms.geohash', 'projects.donation_count', 'users.authz_version']
+        assert missing_columns() == []
+        assert 'ix_farms_geohash' in {index['name'] for index in db.inspect(db.engine).get_indexes('farms')}
+
+def test_init_db_refuses_to_record_the_version_when_columns_are_still_missing(app):
+    with app.app_context():
+        set_meta('schema_version', SCHEMA_VERSION - 1)
+        db.session.commit()
+        # NOT NULL without a server default: can't be added to a table with rows
+        drop_columns('ALTER TABLE uploaded_files DROP COLUMN filename')
+
+        with pytest.raises(SchemaMismatch, match='uploaded_files.filename'):
+            init_db()
+        db.session.rollback()
+        assert get_meta('schema_version') == str(SCHEMA_VERSION - 1)
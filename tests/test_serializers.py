@@ -0,0 +1,114 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import permutations
+import pytest
+from conftest import make_user
+from src.models.agriculture import WeatherData
+from src.models.community import Donation, Forum, ForumPost, ForumReply, Project
+from src.models.healthcare import BloodDonor
+from src.models.user import db
+from src.serializers import check_parity
+
+# The row serializers must reproduce to_dict() exactly, including rows whose
+# related user or project is missing (outer joins read NULL) and Decimal and
+# date columns, which Core rows and ORM attributes both return typed. A user
+# id that matches no row stands in for a deleted user; SQLite doesn't
+# enforce the foreign key.
+
+MISSING_USER = '00000000-0000-0000-0000-000000000000'
+
+@pytest.fixture
+def rows(app):
+    with app.app_context():
+        donor, author = make_user(first_name='Rahim', last_name='Uddin'), make_user(first_name='Karim', last_name='Mia')
+        project = Project(title='Flood relief', manager=make_user(), target_amount=Decimal('5000'))
+        post = ForumPost(forum=Forum(name='General'), author=author, title='Irrigation', content='...')
+        reply = ForumReply(post=post, author=author, content='Drip lines', likes_count=3)
+        today = date.today()
+        db.session.add_all([
+            WeatherData(location_coordinates='23.8103,90.4125', date=today, temperature_min=Decimal('18.5'),
+                        temperature_max=Decimal('31.0'), humidity=Decimal('72.25'), rainfall_mm=Decimal('12.40'),
+                        wind_speed=Decimal('8.10'), weather_condition='Rain'),
+            WeatherData(location_coordinates='22.3569,91.7832'),
+            WeatherData(location_coordinates='24.8949,91.8687', date=today - timedelta(days=1), humidity=Decimal('90')),
+            Donation(project=project, donor=donor, amount=Decimal('250.75'), payment_status='completed',
+                     processed_at=datetime.utcnow(), message='For the boats'),
+            Donation(project=project, donor=donor, amount=Decimal('10.00'), is_anonymous=True),
+            Donation(project=project, amount=Decimal('99.99'), payment_status='completed'),
+            Donation(donor_id=MISSING_USER, amount=Decimal('1.00')),
+            reply,
+            ForumReply(post=post, author=donor, parent_reply=reply, content='Thanks'),
+            ForumReply(post=post, author_id=MISSING_USER, content='[deleted]'),
+            BloodDonor(user=donor, blood_group='O+', health_status='eligible', is_available=True,
+                       last_donation_date=today - timedelta(days=120), total_donations=4),
+            BloodDonor(user=author, blood_group='AB-', health_status='eligible', is_available=True,
+                       last_donation_date=today - timedelta(days=10)),
+            BloodDonor(user=make_user(), blood_group='A+', health_status='eligible', is_available=True),
+            BloodDonor(user_id=MISSING_USER, blood_group='B+', is_available=False),
+        ])
+        db.session.commit()
+    return app
+
+MODELS = [WeatherData, Donation, ForumReply, BloodDonor]
+
+def dump_all(model, names=None):
+    key = model.__mapper__.primary_key[0]
+    return model.row_serializer.dump(
+        db.session.execute(model.row_serializer.select(names=names).order_by(key)).all(), names
+    )
+
+@pytest.mark.parametrize('model', MODELS, ids=lambda model: model.__name__)
+def test_row_serializer_matches_to_dict(rows, model):
+    with rows.app_context():
+        key = model.__mapper__.primary_key[0]
+        expected = [instance.to_dict() for instance in model.query.order_by(key)]
+        assert len(expected) >= 3
+        assert dump_all(model) == expected
+        assert check_parity(db.session, model) == []
+
+@pytest.mark.parametrize('model, names', [
+    (WeatherData, ('date', 'temperature_max', 'rainfall_mm')),
+    (Donation, ('amount', 'donor_name', 'is_processed')),
+    (Donation, ('project_title',)),
+    (ForumReply, ('author_name', 'parent_reply_id')),
+    (BloodDonor, ('can_donate', 'last_donation_date', 'user_name')),
+], ids=lambda value: value.__name__ if isinstance(value, type) else ','.join(value))
+def test_field_subsets_match_to_dict(rows, model, names):
+    with rows.app_context():
+        key = model.__mapper__.primary_key[0]
+        expected = [{name: instance.to_dict()[name] for name in names} for instance in model.query.order_by(key)]
+        assert dump_all(model, names) == expected
+
+def test_typed_and_missing_values_survive(rows):
+    with rows.app_context():
+        weather = dump_all(WeatherData)
+        assert weather[0]['date'] == date.today()
+        assert weather[0]['humidity'] == Decimal('72.25') and isinstance(weather[0]['humidity'], Decimal)
+        assert weather[1]['date'] is None and weather[1]['temperature_min'] is None
+
+        donations = dump_all(Donation)
+        names = [donation['donor_name'] for donation in donations]
+        assert names == ['Rahim Uddin', 'Anonymous', 'Anonymous', 'Anonymous']
+        assert [donation['project_title'] for donation in donations] == ['Flood relief'] * 3 + [None]
+        assert [donation['is_processed'] for donation in donations] == [True, False, False, False]
+
+        authors = {reply['content']: reply['author_name'] for reply in dump_all(ForumReply)}
+        assert authors == {'Drip lines': 'Karim Mia', 'Thanks': 'Rahim Uddin', '[deleted]': None}
+        donors = {donor['blood_group']: (donor['can_donate'], donor['user_name']) for donor in dump_all(BloodDonor)}
+        assert donors['O+'] == (True, 'Rahim Uddin')
+        assert donors['AB-'] == (False, 'Karim Mia')  # gave blood 10 days ago
+        assert donors['A+'][0] is True  # never donated
+        assert donors['B+'] == (False, None)
+
+def test_field_order_does_not_compile_new_serializers(rows):
+    client = rows.test_client()
+    compiled = WeatherData.row_serializer._compiled
+    responses = []
+    for names in permutations(['humidity', 'date', 'id', 'wind_speed']):
+        response = client.get(f"/api/agriculture/weather?location=23.8103,90.4125&fields={','.join(names)}")
+        assert response.status_code == 200
+        responses.append(response.json)
+    assert all(response == responses[0] for response in responses)
+    assert [names for names in compiled if names and set(names) == {'humidity', 'date', 'id', 'wind_speed'}] == [
+        ('id', 'date', 'humidity', 'wind_speed')
+    ]
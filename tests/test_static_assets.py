@@ -0,0 +1,29 @@
+import pytest
+from src.static_assets import StaticManifest
+
+@pytest.mark.parametrize('path, immutable', [
+    ('assets/index-CVK8lUh-.js', True),
+    ('assets/index-Di76AY9_.css', True),
+    ('assets/vendor-react-B1x_9Qzk.js', True),
+    ('index.html', False),
+    ('favicon.ico', False),
+    ('apple-touch-icon.png', False),
+    ('android-chrome-192x192.png', False),
+    ('og-image-default.png', False),
+    ('images/og-image-default.png', False),
+    ('assets/logo.svg', False),
+])
+def test_only_bundler_hashed_files_are_immutable(tmp_path, path, immutable):
+    (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+    (tmp_path / path).write_bytes(b'x')
+    manifest = StaticManifest()
+    manifest.build(str(tmp_path))
+    assert ('immutable' in manifest.assets[path].cache_control) is immutable
+
+def test_brotli_variant_is_preferred(tmp_path):
+    pytest.importorskip('brotli')
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'index-CVK8lUh-.js').write_text('console.log("hello");\n' * 200)
+    manifest = StaticManifest()
+    manifest.build(str(tmp_path))
+    assert list(manifest.assets['assets/index-CVK8lUh-.js'].variants) == ['br', 'gzip']
@@ -0,0 +1,107 @@
+import io
+import os
+import pytest
+from conftest import make_user
+from src.identity import issue_access_token
+from src.models.uploads import UploadedFile
+from src.models.user import Role, db
+
+@pytest.fixture
+def tokens(app):
+    """Authorization headers for two plain users and an admin"""
+    with app.app_context():
+        users = {'owner': make_user(), 'other': make_user(),
+                 'admin': make_user(roles=[Role.query.filter_by(name='admin').one()])}
+        db.session.add_all(users.values())
+        db.session.commit()
+        return {name: {'Authorization': f'Bearer {issue_access_token(user)}'} for name, user in users.items()}
+
+def upload(client, headers, body, filename='report.pdf', content_type='application/pdf', public=False):
+    response = client.post('/api/upload', headers=headers, content_type='multipart/form-data', data={
+        'file': (io.BytesIO(body), filename, content_type),
+        'public': 'true' if public else 'false',
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.json['file']
+
+def test_resumable_upload_reports_offset_mismatch_and_resumes(client, tokens):
+    body = os.urandom(200 * 1024)
+    response = client.post('/api/uploads', headers=tokens['owner'], json={'filename': 'scan.pdf', 'size': len(body)})
+    assert response.status_code == 201
+    url = response.headers['Location']
+
+    def patch(offset, chunk):
+        return client.patch(url, data=chunk, headers={**tokens['owner'], 'Upload-Offset': str(offset)})
+
+    assert patch(0, body[:70000]).headers['Upload-Offset'] == '70000'
+    # A retry of a chunk that already arrived, then one sent past the end
+    for offset in (0, 90000):
+        response = patch(offset, body[offset:offset + 1000])
+        assert response.status_code == 409
+        assert response.headers['Upload-Offset'] == '70000' and response.json['offset'] == 70000
+    # After a dropped connection the client asks where to carry on from
+    assert client.head(url, headers=tokens['owner']).headers['Upload-Offset'] == '70000'
+    assert client.get(url, headers=tokens['other']).status_code == 404
+
+    response = patch(70000, body[70000:])
+    assert response.status_code == 201
+    stored = response.json['upload']['file']
+    assert stored['size'] == len(body)
+    assert client.get(stored['url'], headers=tokens['owner']).data == body
+    assert patch(len(body), b'x').status_code == 409
+
+def test_identical_content_is_stored_once(app, client, tokens):
+    first = upload(client, tokens['owner'], b'%PDF-1.4 same bytes', filename='a.pdf')
+    second = upload(client, tokens['other'], b'%PDF-1.4 same bytes', filename='b.pdf')
+    assert first['id'] != second['id'] and first['sha256'] == second['sha256']
+    objects = [name for _, _, names in os.walk(os.path.join(app.config['UPLOAD_FOLDER'], 'objects')) for name in names]
+    assert objects == [first['sha256']]
+    with app.app_context():
+        assert UploadedFile.query.filter_by(sha256=first['sha256']).count() == 2
+
+def test_private_files_are_only_served_to_owner_and_staff(client, tokens):
+    private = upload(client, tokens['owner'], b'%PDF-1.4 lab results')
+    public = upload(client, tokens['owner'], b'\x89PNG poster', filename='poster.png', content_type='image/png',
+                    public=True)
+    assert client.get(private['url']).status_code == 404
+    assert client.get(private['url'], headers=tokens['other']).status_code == 404
+    for name in ('owner', 'admin'):
+        response = client.get(private['url'], headers=tokens[name])
+        assert response.status_code == 200 and response.data == b'%PDF-1.4 lab results'
+        assert 'private' in response.headers['Cache-Control']
+    assert client.get(public['url']).status_code == 200
+
+def test_only_safe_types_are_served_inline(client, tokens):
+    page = upload(client, tokens['owner'], b'<script>steal(localStorage)</script>', filename='x.html',
+                  content_type='text/html', public=True)
+    response = client.get(page['url'])
+    assert response.status_code == 200
+    assert response.mimetype == 'application/octet-stream'
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+
+    image = upload(client, tokens['owner'], b'\x89PNG', filename='logo.png', content_type='image/png', public=True)
+    response = client.get(image['url'])
+    assert response.mimetype == 'image/png'
+    assert response.headers['Content-Disposition'].startswith('inline')
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+
+def test_oversized_uploads_are_rejected(app, client, tokens):
+    app.config['UPLOAD_MAX_SIZE'] = 1024
+    response = client.post('/api/uploads', headers=tokens['owner'], json={'filename': 'big.bin', 'size': 1025})
+    assert response.status_code == 400
+    response = client.post('/api/upload', headers=tokens['owner'], content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(b'x' * 1025), 'big.bin')})
+    assert response.status_code == 400
+    # A resumable upload can't take more bytes than it declared
+    response = client.post('/api/uploads', headers=tokens['owner'], json={'filename': 'small.bin', 'size': 10})
+    url = response.headers['Location']
+    response = client.patch(url, data=b'x' * 11, headers={**tokens['owner'], 'Upload-Offset': '0'})
+    assert response.status_code == 400
+    with app.app_context():
+        assert UploadedFile.query.count() == 0
+
+@pytest.mark.parametrize('size', [None, 'ten', [1]])
+def test_upload_session_size_must_be_a_number(client, tokens, size):
+    response = client.post('/api/uploads', headers=tokens['owner'], json={'filename': 'a.pdf', 'size': size})
+    assert response.status_code == 400